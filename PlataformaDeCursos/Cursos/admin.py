@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profesor, Curso, Inscripcion, Recurso, Progreso, Perfil
+from .models import Profesor, Curso, Inscripcion, Recurso, Progreso, Perfil, Tarea, ArchivoContenido
     # ---- REGISTRO DE LOS MODELOS EN EL ADMIN ----
 # Register your models here.
 admin.site.register(Profesor)
@@ -7,4 +7,6 @@ admin.site.register(Curso)
 admin.site.register(Inscripcion)
 admin.site.register(Recurso)
 admin.site.register(Progreso)
-admin.site.register(Perfil)
\ No newline at end of file
+admin.site.register(Perfil)
+admin.site.register(Tarea)
+admin.site.register(ArchivoContenido)
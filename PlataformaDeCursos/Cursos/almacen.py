@@ -0,0 +1,252 @@
+#  ---- ALMACENAMIENTO POR CONTENIDO ----
+# Backend de archivos por defecto (STORAGES en settings). Cada archivo se guarda una sola vez en
+# MEDIA_ROOT/contenido/ con el sha256 de su contenido como nombre: el mismo PDF subido en varios
+# cursos, o la misma foto en varios perfiles, ocupa el disco una vez. ArchivoContenido cuenta
+# cuantas filas apuntan a cada archivo; delete() resta una referencia y el archivo se borra del
+# disco cuando llega a cero. Las senales de abajo liberan la referencia cuando se borra un
+# MaterialExtra, Perfil o Certificado, o cuando se reemplaza su archivo.
+# Los archivos guardados antes (materiales/, static/perfiles/) y los PDF de certificados, que
+# generar_archivos escribe directo en cetificados/, no pasan por el almacen y se borran como
+# archivos normales.
+#  - python manage.py deduplicar_archivos   --> pasa los archivos existentes al almacen
+#  - python manage.py limpiar_almacen       --> corrige contadores y borra archivos huerfanos
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import ArchivoContenido, Certificado, MaterialExtra, Perfil, Recurso
+
+CARPETA = 'contenido'
+BLOQUE = 1024 * 1024
+LARGO_EXTENSION = 10
+
+# Campos de archivo cuyas referencias se cuentan
+CAMPOS = [(MaterialExtra, 'archivo'), (Perfil, 'imagen'), (Certificado, 'archivo')]
+# Los certificados no se deduplican: cada PDF es distinto y generar_archivos reconoce por el
+# nombre los que no cambiaron
+CAMPOS_DEDUPLICABLES = CAMPOS[:2]
+
+
+def nombre_en_almacen(sha256, extension):
+    return f'{CARPETA}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def en_almacen(nombre):
+    return bool(nombre) and nombre.startswith(CARPETA + '/')
+
+
+def sha256_de(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        while bloque := archivo.read(BLOQUE):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+class AlmacenPorContenido(FileSystemStorage):
+    # El nombre final lo decide _save segun el contenido, no hace falta buscar uno libre
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()[:LARGO_EXTENSION]
+        if hasattr(content, 'temporary_file_path'):
+            # Ya esta en disco (subidas grandes o por partes): se mueve en vez de copiarse
+            temporal, propio = content.temporary_file_path(), False
+            sha256 = sha256_de(temporal)
+        else:
+            # Se copia a un temporal dentro del almacen calculando la huella en el mismo recorrido
+            os.makedirs(self.path(CARPETA), exist_ok=True)
+            descriptor, temporal = tempfile.mkstemp(dir=self.path(CARPETA), suffix='.tmp')
+            propio = True
+            resumen = hashlib.sha256()
+            with os.fdopen(descriptor, 'wb') as destino:
+                for bloque in content.chunks():
+                    resumen.update(bloque)
+                    destino.write(bloque)
+            sha256 = resumen.hexdigest()
+
+        try:
+            # La fila bloqueada evita que otro proceso borre el archivo mientras se reutiliza
+            with transaction.atomic():
+                archivo = ArchivoContenido.objects.select_for_update().filter(sha256=sha256).first()
+                nombre = archivo.nombre if archivo else nombre_en_almacen(sha256, extension)
+                ruta = self.path(nombre)
+                if not os.path.exists(ruta):
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    file_move_safe(temporal, ruta, allow_overwrite=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(ruta, self.file_permissions_mode)
+                if archivo:
+                    ArchivoContenido.objects.filter(sha256=sha256).update(referencias=F('referencias') + 1)
+                else:
+                    ArchivoContenido.objects.create(
+                        sha256=sha256, nombre=nombre, tamano=os.path.getsize(ruta), referencias=1
+                    )
+        finally:
+            if propio and os.path.exists(temporal):
+                os.remove(temporal)
+        return nombre
+
+    def delete(self, name):
+        if not en_almacen(name):
+            return super().delete(name)
+        with transaction.atomic():
+            archivo = ArchivoContenido.objects.select_for_update().filter(nombre=name).first()
+            if archivo is None:
+                return
+            if archivo.referencias > 1:
+                ArchivoContenido.objects.filter(sha256=archivo.sha256).update(referencias=F('referencias') - 1)
+                return
+            archivo.delete()
+            super().delete(name)
+
+
+#  ---- REFERENCIAS DESDE LOS MODELOS ----
+
+def _campo(modelo, atributo):
+    return modelo._meta.get_field(atributo)
+
+
+def _liberar(campo, nombre):
+    # La imagen por defecto del perfil la comparten todos y no se borra
+    if nombre and nombre != campo.get_default():
+        campo.storage.delete(nombre)
+
+
+def _conectar(modelo, atributo):
+    campo = _campo(modelo, atributo)
+
+    def al_borrar(sender, instance, **kwargs):
+        _liberar(campo, getattr(instance, atributo).name)
+
+    # Solo se consulta el nombre anterior si se asigno un archivo nuevo o se vacio el campo
+    # (FieldFile.delete() ya libera el suyo y deja el nombre en None)
+    def antes_de_guardar(sender, instance, raw=False, **kwargs):
+        archivo = getattr(instance, atributo)
+        cambia = (archivo.name and not archivo._committed) or archivo.name == ''
+        if raw or instance.pk is None or not cambia:
+            return
+        instance._archivo_anterior = sender.objects.filter(pk=instance.pk).values_list(atributo, flat=True).first()
+
+    def despues_de_guardar(sender, instance, raw=False, **kwargs):
+        anterior = instance.__dict__.pop('_archivo_anterior', None)
+        if anterior and anterior != getattr(instance, atributo).name:
+            _liberar(campo, anterior)
+
+    uid = f'almacen_{modelo._meta.label_lower}'
+    post_delete.connect(al_borrar, sender=modelo, weak=False, dispatch_uid=uid)
+    pre_save.connect(antes_de_guardar, sender=modelo, weak=False, dispatch_uid=uid)
+    post_save.connect(despues_de_guardar, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+for _modelo, _atributo in CAMPOS:
+    _conectar(_modelo, _atributo)
+
+
+#  ---- MANTENIMIENTO ----
+
+def referencias_en_uso():
+    usados = Counter()
+    for modelo, atributo in CAMPOS:
+        usados.update(
+            modelo.objects.filter(**{f'{atributo}__startswith': CARPETA + '/'}).values_list(atributo, flat=True).iterator()
+        )
+    return usados
+
+
+# Pasa al almacen los archivos guardados con nombre propio. Devuelve
+# {'archivos', 'duplicados', 'faltantes', 'bytes_liberados'}
+def deduplicar(almacen=None):
+    almacen = almacen or default_storage
+    resultado = {'archivos': 0, 'duplicados': 0, 'faltantes': 0, 'bytes_liberados': 0}
+    for modelo, atributo in CAMPOS_DEDUPLICABLES:
+        campo = _campo(modelo, atributo)
+        nombres = (
+            modelo.objects.exclude(**{f'{atributo}__startswith': CARPETA + '/'})
+            .exclude(**{atributo: ''}).exclude(**{atributo: campo.get_default() or ''})
+            .values_list(atributo).annotate(filas=Count('pk')).order_by(atributo)
+        )
+        for viejo, filas in nombres:
+            if not almacen.exists(viejo):
+                resultado['faltantes'] += 1
+                continue
+            tamano = almacen.size(viejo)
+            with transaction.atomic():
+                # Si el contenido ya estaba en el almacen no se crea una fila nueva
+                antes = ArchivoContenido.objects.count()
+                with almacen.open(viejo, 'rb') as contenido:
+                    nuevo = almacen.save(viejo, contenido)
+                duplicado = ArchivoContenido.objects.count() == antes
+                # save() cuenta una referencia, cada fila que usaba el archivo suma una
+                if filas > 1:
+                    ArchivoContenido.objects.filter(nombre=nuevo).update(referencias=F('referencias') + filas - 1)
+                modelo.objects.filter(**{atributo: viejo}).update(**{atributo: nuevo})
+                if modelo is MaterialExtra:
+                    Recurso.objects.filter(enlace=almacen.url(viejo)).update(enlace=almacen.url(nuevo))
+                almacen.delete(viejo)
+            resultado['archivos'] += 1
+            if duplicado:
+                resultado['duplicados'] += 1
+                resultado['bytes_liberados'] += tamano
+    return resultado
+
+
+# Corrige los contadores segun las filas que de verdad usan cada archivo, borra los que nadie usa
+# y los archivos del almacen sin fila (mas viejos que `minutos`, para no tocar subidas en curso).
+# Con simular=True solo cuenta. Devuelve {'corregidos', 'borrados', 'huerfanos', 'faltantes', 'bytes_liberados'}
+def recolectar(simular=False, minutos=60, almacen=None):
+    almacen = almacen or default_storage
+    resultado = {'corregidos': 0, 'borrados': 0, 'huerfanos': 0, 'faltantes': 0, 'bytes_liberados': 0}
+    usados = referencias_en_uso()
+    registrados = set()
+    for archivo in ArchivoContenido.objects.order_by('sha256').iterator():
+        registrados.add(archivo.nombre)
+        if not os.path.exists(almacen.path(archivo.nombre)):
+            resultado['faltantes'] += 1
+        if usados[archivo.nombre] == archivo.referencias:
+            continue
+        if simular:
+            resultado['borrados' if not usados[archivo.nombre] else 'corregidos'] += 1
+            continue
+        with transaction.atomic():
+            # Se vuelve a contar con la fila bloqueada, pudo cambiar desde la primera lectura
+            fila = ArchivoContenido.objects.select_for_update().filter(sha256=archivo.sha256).first()
+            if fila is None:
+                continue
+            en_uso = sum(
+                modelo.objects.filter(**{atributo: fila.nombre}).count() for modelo, atributo in CAMPOS
+            )
+            if en_uso:
+                ArchivoContenido.objects.filter(sha256=fila.sha256).update(referencias=en_uso)
+                resultado['corregidos'] += 1
+            else:
+                fila.delete()
+                if os.path.exists(almacen.path(fila.nombre)):
+                    FileSystemStorage.delete(almacen, fila.nombre)
+                resultado['borrados'] += 1
+                resultado['bytes_liberados'] += fila.tamano
+
+    limite = time.time() - minutos * 60
+    for carpeta, _, archivos in os.walk(almacen.path(CARPETA)):
+        for nombre_archivo in archivos:
+            ruta = os.path.join(carpeta, nombre_archivo)
+            nombre = os.path.relpath(ruta, almacen.location).replace(os.sep, '/')
+            if nombre in registrados or os.path.getmtime(ruta) > limite:
+                continue
+            # Sin fila: una subida que se revirtio o un temporal que quedo de un proceso caido
+            if ArchivoContenido.objects.filter(nombre=nombre).exists():
+                continue
+            resultado['huerfanos'] += 1
+            resultado['bytes_liberados'] += os.path.getsize(ruta)
+            if not simular:
+                os.remove(ruta)
+    return resultado
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CursosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Cursos'
+
+    def ready(self):
+        # Conecta las senales que invalidan la cache del catalogo y de los usuarios, las que
+        # cuentan las referencias de los archivos del almacen y la que crea el Perfil de cada User
+        from . import almacen, autenticacion, catalogo, signals
@@ -0,0 +1,69 @@
+#  ---- REGISTRO DE ASISTENCIA POR SESION ----
+# Guarda la asistencia de todos los inscritos de una sesion con un numero fijo de consultas:
+# lee las asistencias existentes de una vez y escribe con bulk_create / bulk_update.
+# Corre en una transaccion que se reintenta si la BD esta bloqueada (ver escrituras.py).
+from . import progreso
+from .escrituras import escritura
+from .models import Asistencia, Inscripcion
+
+TAMANO_LOTE = 500
+
+
+# Inscripciones del curso de la sesion con el atributo `presente` de esa sesion (2 consultas)
+def inscripciones_con_asistencia(sesion):
+    presentes = set(
+        Asistencia.objects.filter(sesion=sesion, presente=True).values_list('inscripcion_id', flat=True)
+    )
+    inscripciones = list(Inscripcion.objects.filter(curso_id=sesion.curso_id).order_by('id'))
+    for ins in inscripciones:
+        ins.presente = ins.id in presentes
+    return inscripciones
+
+
+# Ids de inscripciones marcadas en el formulario (checkbox "presente_<id>")
+def presentes_del_formulario(datos):
+    presentes = set()
+    for clave, valor in datos.items():
+        if clave.startswith('presente_') and valor == 'on':
+            try:
+                presentes.add(int(clave[len('presente_'):]))
+            except ValueError:
+                continue
+    return presentes
+
+
+# presentes: ids de inscripciones presentes, el resto de inscritos queda ausente.
+# Devuelve (creadas, actualizadas)
+@escritura
+def guardar_asistencias(sesion, presentes):
+    inscripciones = Inscripcion.objects.filter(curso_id=sesion.curso_id).values_list('id', flat=True)
+
+    existentes = {}
+    for asistencia in Asistencia.objects.filter(sesion=sesion).order_by('id'):
+        existentes.setdefault(asistencia.inscripcion_id, asistencia)
+
+    crear = []
+    # {valor nuevo de presente: ids de Asistencia que cambian a ese valor}
+    cambios = {True: [], False: []}
+    nuevos_presentes, nuevos_ausentes = [], []
+    for ins_id in inscripciones:
+        presente = ins_id in presentes
+        asistencia = existentes.get(ins_id)
+        if asistencia is None:
+            crear.append(Asistencia(inscripcion_id=ins_id, sesion=sesion, presente=presente))
+        elif asistencia.presente != presente:
+            cambios[presente].append(asistencia.id)
+        else:
+            continue
+        if presente:
+            nuevos_presentes.append(ins_id)
+        elif asistencia is not None:
+            nuevos_ausentes.append(ins_id)
+
+    Asistencia.objects.bulk_create(crear, batch_size=TAMANO_LOTE)
+    # Un campo booleano: basta un UPDATE por valor en lugar de un CASE por fila (bulk_update)
+    for valor, ids in cambios.items():
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            Asistencia.objects.filter(id__in=ids[inicio:inicio + TAMANO_LOTE]).update(presente=valor)
+    progreso.registrar_asistencias(nuevos_presentes, nuevos_ausentes)
+    return len(crear), len(cambios[True]) + len(cambios[False])
@@ -0,0 +1,118 @@
+#  ---- SESION, USUARIO Y ROL EN CACHE ----
+# En cada peticion autenticada Django lee la sesion, el User y, al preguntar por el rol
+# (hasattr(user, 'profesor'), user.perfil en las plantillas), el Profesor y el Perfil. Aqui:
+#  - BackendCacheado trae el User con su Profesor y su Perfil en una consulta (select_related),
+#    asi user.profesor y user.perfil no consultan;
+#  - RolMiddleware deja en request.rol el rol del usuario, calculado una vez por peticion.
+# Si CACHES es compartida entre procesos (Redis, Memcached; ver CACHE_COMPARTIDA en settings)
+# ademas la sesion usa el motor cached_db y el usuario se guarda en la cache
+# (USUARIOS_EN_CACHE): una peticion autenticada no consulta la BD para nada de esto. Las senales
+# de abajo borran el usuario de la cache cuando cambia su User, Profesor o Perfil.
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+from .models import Perfil, Profesor
+
+User = get_user_model()
+
+
+def clave_usuario(user_id):
+    return f'usuario:{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'USUARIOS_CACHE_TTL', 300)
+
+
+def _usuarios():
+    return User._default_manager.select_related('profesor', 'perfil')
+
+
+class BackendCacheado(ModelBackend):
+    def get_user(self, user_id):
+        if not settings.USUARIOS_EN_CACHE:
+            user = _usuarios().filter(pk=user_id).first()
+            return user if user is not None and self.user_can_authenticate(user) else None
+        user = cache.get(clave_usuario(user_id))
+        if user is None:
+            user = _usuarios().filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(clave_usuario(user_id), user, _ttl())
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        if not settings.USUARIOS_EN_CACHE:
+            user = await _usuarios().filter(pk=user_id).afirst()
+            return user if user is not None and self.user_can_authenticate(user) else None
+        user = await cache.aget(clave_usuario(user_id))
+        if user is None:
+            user = await _usuarios().filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            await cache.aset(clave_usuario(user_id), user, _ttl())
+        return user if self.user_can_authenticate(user) else None
+
+
+def _relacionado(user, campo):
+    # Si el usuario no viene del backend (sin select_related) se consulta aqui
+    try:
+        return getattr(user, campo)
+    except ObjectDoesNotExist:
+        return None
+
+
+class Rol:
+    def __init__(self, user):
+        self.user = user
+        autenticado = user.is_authenticated
+        self.profesor = _relacionado(user, 'profesor') if autenticado else None
+        self.perfil = _relacionado(user, 'perfil') if autenticado else None
+        self.es_profesor = self.profesor is not None
+        self.es_estudiante = autenticado and not self.es_profesor
+
+    # Profesor a cargo del curso
+    def dicta(self, curso):
+        return self.es_profesor and curso.profesor_id == self.profesor.id
+
+
+# Va despues de AuthenticationMiddleware. En vistas async: Rol(await request.auser()).
+# Sincrono con WSGI y async con ASGI: solo deja el objeto perezoso, no necesita otro hilo
+class RolMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.rol = SimpleLazyObject(lambda: Rol(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.rol = SimpleLazyObject(lambda: Rol(request.user))
+        return await self.get_response(request)
+
+
+#  ---- INVALIDACION ----
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_usuario(sender, instance, **kwargs):
+    cache.delete(clave_usuario(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Profesor)
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_rol(sender, instance, **kwargs):
+    cache.delete(clave_usuario(instance.user_id))
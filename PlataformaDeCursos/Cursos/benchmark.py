@@ -0,0 +1,40 @@
+#  ---- UTILIDADES PARA BENCHMARKS ----
+# Base de datos temporal (la misma que usan los tests) y medicion de consultas y tiempo.
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+# Crea una base de datos de prueba para no tocar db.sqlite3 y la destruye al terminar.
+# Con en_archivo=True la base de SQLite se crea en un archivo temporal en vez de en memoria:
+# la memoria compartida entre hilos falla con "database table is locked" si hay escrituras concurrentes.
+@contextmanager
+def base_de_datos_temporal(en_archivo=False):
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    nombre_prueba = connection.settings_dict['TEST'].get('NAME')
+    carpeta = tempfile.TemporaryDirectory() if en_archivo and connection.vendor == 'sqlite' else None
+    if carpeta:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(carpeta.name, 'benchmark.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = nombre_prueba
+        if carpeta:
+            carpeta.cleanup()
+        teardown_test_environment()
+
+
+# Ejecuta la funcion y devuelve ({'consultas', 'segundos'}, resultado)
+def medir(funcion):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+    return {'consultas': len(consultas), 'segundos': round(segundos, 4)}, resultado
@@ -0,0 +1,82 @@
+#  ---- BUSQUEDA Y PAGINACION DEL CATALOGO ----
+# Paginacion por cursor (keyset) ordenada por (fecha_inicio, id): cada pagina continua despues
+# del ultimo curso de la anterior, asi el costo no crece con el numero de pagina.
+# La busqueda por texto usa la tabla virtual FTS5 Cursos_curso_fts (ver migracion 0003),
+# que SQLite mantiene al dia con triggers sobre Cursos_curso.
+import re
+from datetime import date
+
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Curso, Profesor
+
+TABLA_FTS = 'Cursos_curso_fts'
+TAMANO_PAGINA = 20
+TAMANO_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(curso):
+    return f'{curso.fecha_inicio.isoformat()}_{curso.id}'
+
+
+def decodificar_cursor(cursor):
+    try:
+        fecha, curso_id = cursor.split('_')
+        return date.fromisoformat(fecha), int(curso_id)
+    except ValueError:
+        raise CursorInvalido(cursor)
+
+
+# Convierte el texto del usuario en una consulta FTS5 segura: cada palabra como prefijo, todas requeridas
+def consulta_fts(texto):
+    palabras = re.findall(r'\w+', texto)
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def filtrar_texto(cursos, texto):
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return cursos
+    if connection.vendor == 'sqlite':
+        return cursos.filter(id__in=RawSQL(f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s', [consulta]))
+    condicion = Q()
+    for palabra in re.findall(r'\w+', texto):
+        condicion &= Q(titulo__icontains=palabra) | Q(descripcion__icontains=palabra)
+    return cursos.filter(condicion)
+
+
+# Devuelve (cursos de la pagina, cursor de la siguiente pagina o None)
+def buscar_cursos(texto='', especialidad=None, desde=None, hasta=None, cursor=None, tamano=TAMANO_PAGINA):
+    cursos = Curso.objects.select_related('profesor')
+    if texto:
+        cursos = filtrar_texto(cursos, texto)
+    if especialidad:
+        # EXISTS correlacionado: SQLite recorre el indice (fecha_inicio, id) en orden y se detiene al
+        # llenar la pagina, en vez de juntar todos los cursos de la especialidad y ordenarlos
+        cursos = cursos.filter(Exists(Profesor.objects.filter(id=OuterRef('profesor_id'), especialidad=especialidad)))
+    if desde:
+        cursos = cursos.filter(fecha_inicio__gte=desde)
+    if hasta:
+        cursos = cursos.filter(fecha_inicio__lte=hasta)
+    if cursor:
+        fecha, curso_id = decodificar_cursor(cursor)
+        # La primera condicion permite recorrer el indice (fecha_inicio, id) desde el cursor
+        cursos = cursos.filter(fecha_inicio__gte=fecha).filter(Q(fecha_inicio__gt=fecha) | Q(id__gt=curso_id))
+
+    tamano = max(1, min(tamano, TAMANO_MAXIMO))
+    pagina = list(cursos.order_by('fecha_inicio', 'id')[:tamano + 1])
+    siguiente = codificar_cursor(pagina[tamano - 1]) if len(pagina) > tamano else None
+    return pagina[:tamano], siguiente
+
+
+# Reconstruye el indice de texto desde Cursos_curso (por ejemplo despues de restaurar un respaldo)
+def reconstruir_indice():
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES('rebuild')")
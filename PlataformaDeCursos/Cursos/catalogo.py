@@ -0,0 +1,72 @@
+#  ---- CACHE DEL CATALOGO DE CURSOS ----
+# Guarda el HTML de cada tarjeta de curso (profesor, especialidad, perfil, titulo y descripcion),
+# que es igual para todos los usuarios. Lo que depende del usuario (si esta inscrito y los
+# botones) se agrega despues en la vista. Las senales borran solo las tarjetas afectadas.
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+
+from .models import Curso, Perfil, Profesor
+
+CLAVE_IDS = 'catalogo:ids'
+
+
+def clave_tarjeta(curso_id):
+    return f'catalogo:tarjeta:{curso_id}'
+
+
+def _ttl():
+    return getattr(settings, 'CATALOGO_CACHE_TTL', 300)
+
+
+# Ids de los cursos del catalogo en el orden en que se muestran
+def ids_catalogo():
+    ids = cache.get(CLAVE_IDS)
+    if ids is None:
+        ids = list(Curso.objects.order_by('id').values_list('id', flat=True))
+        cache.set(CLAVE_IDS, ids, _ttl())
+    return ids
+
+
+# Devuelve [(curso_id, html)] respetando el orden de ids. Solo renderiza las tarjetas que
+# no estan en cache, con una sola consulta para todas ellas.
+def tarjetas(ids=None):
+    if ids is None:
+        ids = ids_catalogo()
+    claves = {clave_tarjeta(curso_id): curso_id for curso_id in ids}
+    encontradas = cache.get_many(claves)
+
+    faltantes = [curso_id for clave, curso_id in claves.items() if clave not in encontradas]
+    if faltantes:
+        nuevas = {
+            clave_tarjeta(curso.id): render_to_string('cursos/_tarjeta_curso.html', {'curso': curso})
+            for curso in Curso.objects.filter(id__in=faltantes).select_related('profesor__user__perfil')
+        }
+        cache.set_many(nuevas, _ttl())
+        encontradas.update(nuevas)
+
+    return [(curso_id, encontradas[clave]) for clave, curso_id in claves.items() if clave in encontradas]
+
+
+def invalidar_cursos(ids):
+    cache.delete_many([clave_tarjeta(curso_id) for curso_id in ids])
+
+
+#  ---- INVALIDACION ----
+
+@receiver([post_save, post_delete], sender=Curso)
+def invalidar_curso(sender, instance, **kwargs):
+    cache.delete(CLAVE_IDS)
+    invalidar_cursos([instance.id])
+
+
+@receiver([post_save, post_delete], sender=Profesor)
+def invalidar_profesor(sender, instance, **kwargs):
+    invalidar_cursos(Curso.objects.filter(profesor_id=instance.id).values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_perfil(sender, instance, **kwargs):
+    invalidar_cursos(Curso.objects.filter(profesor__user_id=instance.user_id).values_list('id', flat=True))
@@ -0,0 +1,152 @@
+#  ---- EMISION DE CERTIFICADOS EN LOTE ----
+# Calcula el porcentaje de asistencia de todas las inscripciones de uno o varios cursos con
+# consultas agrupadas y guarda los Certificado de quienes cumplen el minimo (insertar o actualizar).
+# Los de quienes ya no lo cumplen (se corrigio la asistencia, se agregaron sesiones) se borran
+# en el mismo lote, junto con su PDF.
+# Se procesa por lotes de inscripciones ordenadas por id: volver a ejecutar es seguro y
+# se puede continuar desde el ultimo id procesado.
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from . import pdf
+from .models import Asistencia, Certificado, Inscripcion, Sesion, calcular_porcentaje
+
+MINIMO_ASISTENCIA = 80
+
+
+# Devuelve {'procesadas', 'emitidos', 'revocados', 'ultimo_id'}
+def emitir_certificados(cursos=None, minimo=MINIMO_ASISTENCIA, tamano_lote=500, desde_id=0, al_terminar_lote=None):
+    inscripciones = Inscripcion.objects.all()
+    sesiones = Sesion.objects.all()
+    if cursos is not None:
+        inscripciones = inscripciones.filter(curso__in=cursos)
+        sesiones = sesiones.filter(curso__in=cursos)
+    sesiones_por_curso = dict(sesiones.values_list('curso_id').annotate(n=Count('id')).order_by())
+
+    resultado = {'procesadas': 0, 'emitidos': 0, 'revocados': 0, 'ultimo_id': desde_id}
+    while True:
+        lote = list(
+            inscripciones.filter(id__gt=resultado['ultimo_id'])
+            .order_by('id').values_list('id', 'curso_id')[:tamano_lote]
+        )
+        if not lote:
+            break
+        with transaction.atomic():
+            emitidos, revocados = _emitir_lote(lote, sesiones_por_curso, minimo)
+        resultado['emitidos'] += emitidos
+        resultado['revocados'] += revocados
+        resultado['procesadas'] += len(lote)
+        resultado['ultimo_id'] = lote[-1][0]
+        if al_terminar_lote:
+            al_terminar_lote(resultado)
+    return resultado
+
+
+def _emitir_lote(lote, sesiones_por_curso, minimo):
+    asistidas = dict(
+        Asistencia.objects.filter(inscripcion_id__in=[ins_id for ins_id, _ in lote], presente=True)
+        .values_list('inscripcion_id').annotate(n=Count('id')).order_by()
+    )
+    certificados, no_cumplen = [], []
+    for ins_id, curso_id in lote:
+        porcentaje = calcular_porcentaje(asistidas.get(ins_id, 0), sesiones_por_curso.get(curso_id, 0))
+        if porcentaje >= minimo:
+            certificados.append(Certificado(inscripcion_id=ins_id, porcentaje_asistencia=porcentaje))
+        else:
+            no_cumplen.append(ins_id)
+
+    Certificado.objects.bulk_create(
+        certificados,
+        update_conflicts=True,
+        unique_fields=['inscripcion'],
+        update_fields=['porcentaje_asistencia'],
+    )
+    # delete() por queryset dispara post_delete por certificado: el almacen suelta sus PDF
+    revocados = Certificado.objects.filter(inscripcion_id__in=no_cumplen).delete()[1].get(Certificado._meta.label, 0)
+    return len(certificados), revocados
+
+
+#  ---- GENERACION DE LOS ARCHIVOS PDF ----
+# Los PDF se generan en un pool de procesos que escribe cada archivo directamente en
+# MEDIA_ROOT/cetificados/, sin devolver el documento al proceso principal. El nombre del
+# archivo lleva una huella de los datos: si no cambiaron y el archivo existe, se omite.
+
+def datos_certificado(certificado):
+    inscripcion = certificado.inscripcion
+    return {
+        'estudiante': inscripcion.nombre_estudiante,
+        'curso': inscripcion.curso.titulo,
+        'porcentaje': certificado.porcentaje_asistencia,
+        'fecha': certificado.fecha_emision.isoformat(),
+    }
+
+
+def nombre_archivo(certificado, datos):
+    contenido = json.dumps(datos, sort_keys=True) + f'|v{pdf.VERSION}'
+    huella = hashlib.sha256(contenido.encode()).hexdigest()[:16]
+    return f'{Certificado._meta.get_field("archivo").upload_to}certificado_{certificado.inscripcion_id}_{huella}.pdf'
+
+
+# procesos=0 genera en el proceso actual (tests), None usa un proceso por CPU.
+# Devuelve {'generados', 'omitidos', 'bytes', 'segundos', 'por_segundo'}
+def generar_archivos(certificados=None, procesos=None, tamano_lote=200, forzar=False):
+    if certificados is None:
+        certificados = Certificado.objects.all()
+    certificados = certificados.select_related('inscripcion__curso').order_by('id')
+
+    resultado = {'generados': 0, 'omitidos': 0, 'bytes': 0}
+    inicio = time.perf_counter()
+    pool = ProcessPoolExecutor(procesos) if procesos != 0 else None
+    try:
+        ultimo_id = 0
+        while True:
+            lote = list(certificados.filter(id__gt=ultimo_id)[:tamano_lote])
+            if not lote:
+                break
+            ultimo_id = lote[-1].id
+            _generar_lote(lote, pool, forzar, resultado)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    resultado['por_segundo'] = round(resultado['generados'] / resultado['segundos'], 1) if resultado['segundos'] else 0
+    return resultado
+
+
+def _generar_lote(lote, pool, forzar, resultado):
+    pendientes, rutas, datos = [], [], []
+    for certificado in lote:
+        datos_cert = datos_certificado(certificado)
+        nombre = nombre_archivo(certificado, datos_cert)
+        ruta = os.path.join(settings.MEDIA_ROOT, nombre)
+        if not forzar and certificado.archivo.name == nombre and os.path.exists(ruta):
+            resultado['omitidos'] += 1
+            continue
+        pendientes.append((certificado, nombre))
+        rutas.append(ruta)
+        datos.append(datos_cert)
+
+    if pool:
+        tamanos = pool.map(pdf.escribir_certificado, rutas, datos, chunksize=20)
+    else:
+        tamanos = map(pdf.escribir_certificado, rutas, datos)
+    resultado['bytes'] += sum(tamanos)
+
+    anteriores = []
+    for certificado, nombre in pendientes:
+        if certificado.archivo.name and certificado.archivo.name != nombre:
+            anteriores.append(certificado.archivo.name)
+        certificado.archivo.name = nombre
+    Certificado.objects.bulk_update([c for c, _ in pendientes], ['archivo'])
+    # Los archivos de una version anterior de los datos ya no se usan
+    for nombre in anteriores:
+        Certificado._meta.get_field('archivo').storage.delete(nombre)
+    resultado['generados'] += len(pendientes)
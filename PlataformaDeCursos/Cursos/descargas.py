@@ -0,0 +1,166 @@
+#  ---- ENVIO DE ARCHIVOS SUBIDOS ----
+# Los archivos de MEDIA_ROOT se sirven desde una vista (no con static(), que solo funciona con
+# DEBUG) que primero revisa que el usuario pueda verlos: material extra de un curso donde esta
+# inscrito o que dicta, su certificado o el de sus estudiantes; imagenes de perfil para todos.
+# Soporta GET condicional (ETag / Last-Modified -> 304) y rangos (Range -> 206) para que los
+# videos se puedan adelantar y las descargas cortadas continuen. Con ARCHIVOS_ENVIO =
+# 'X-Sendfile' o 'X-Accel-Redirect' Django solo revisa el acceso y el servidor web envia los bytes.
+# Con ASGI los bytes se leen de a BLOQUE con un iterador async (ver flujos.py), sin cargar el
+# archivo en memoria.
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from . import flujos, miniaturas
+from .almacen import en_almacen
+from .models import Certificado, MaterialExtra, Perfil
+
+BLOQUE = 64 * 1024
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# Nombre relativo a MEDIA_ROOT sin '.' ni '..', o None si sale de la carpeta. Las reglas de
+# permiso miran el prefijo: 'miniaturas/../materiales/x.pdf' tiene que revisarse como
+# 'materiales/x.pdf'
+def normalizar(nombre):
+    if not nombre or '\x00' in nombre:
+        return None
+    nombre = posixpath.normpath(nombre)
+    if nombre.startswith('/') or nombre == '.' or '..' in nombre.split('/'):
+        return None
+    return nombre
+
+
+# Devuelve (permitido, nombre para la descarga). Las imagenes de perfil y sus miniaturas son
+# publicas: se muestran en el catalogo, que se ve sin iniciar sesion.
+def permiso(usuario, nombre):
+    if normalizar(nombre) != nombre:
+        return False, None
+    if nombre.startswith(miniaturas.CARPETA + '/') or nombre == Perfil._meta.get_field('imagen').get_default():
+        return True, None
+    if not usuario.is_authenticated:
+        return Perfil.objects.filter(imagen=nombre).exists(), None
+    titulo = (
+        MaterialExtra.objects.filter(archivo=nombre)
+        .filter(Q(curso__inscripcion__user=usuario) | Q(curso__profesor__user=usuario))
+        .values_list('titulo', flat=True).first()
+    )
+    if titulo is not None:
+        return True, titulo + os.path.splitext(nombre)[1]
+    if usuario.is_staff:
+        return True, None
+    if Perfil.objects.filter(imagen=nombre).exists():
+        return True, None
+    certificado = Certificado.objects.filter(archivo=nombre).filter(
+        Q(inscripcion__user=usuario) | Q(inscripcion__curso__profesor__user=usuario)
+    ).exists()
+    return certificado, None
+
+
+def etiqueta(nombre, estado):
+    # En el almacen el nombre ya es el sha256 del contenido
+    if en_almacen(nombre):
+        return '"%s"' % os.path.splitext(os.path.basename(nombre))[0]
+    return '"%x-%x"' % (int(estado.st_mtime), estado.st_size)
+
+
+# (inicio, fin) inclusivos del rango pedido, o None para enviar el archivo completo. Varios
+# rangos, otras unidades o un If-Range que no coincide tambien envian el archivo completo.
+def rango_pedido(request, tamano, etag, modificado):
+    cabecera = request.headers.get('Range')
+    if not cabecera or request.method != 'GET':
+        return None
+    si_rango = request.headers.get('If-Range')
+    if si_rango and si_rango not in (etag, http_date(modificado)):
+        return None
+    coincidencia = RANGO.match(cabecera.strip())
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los ultimos N bytes
+        return max(0, tamano - int(fin)), tamano - 1
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    # Si inicio >= tamano el rango no se puede satisfacer (416)
+    return inicio, min(int(fin) if fin else tamano - 1, tamano - 1)
+
+
+def _leer(archivo, inicio, largo):
+    with archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            bloque = archivo.read(min(BLOQUE, largo))
+            if not bloque:
+                break
+            largo -= len(bloque)
+            yield bloque
+
+
+def servir(request, nombre, nombre_descarga=None):
+    try:
+        ruta = default_storage.path(nombre)
+        estado = os.stat(ruta)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(ruta):
+        raise Http404
+
+    etag = etiqueta(nombre, estado)
+    modificado = int(estado.st_mtime)
+    respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if respuesta is None:
+        respuesta = _respuesta(request, nombre, ruta, estado.st_size, etag, modificado, nombre_descarga)
+    respuesta['ETag'] = etag
+    respuesta['Last-Modified'] = http_date(modificado)
+    # Privado: depende del usuario. Lo del almacen no cambia nunca para el mismo nombre
+    respuesta['Cache-Control'] = 'private, max-age=86400' if en_almacen(nombre) else 'private, no-cache'
+    return respuesta
+
+
+def _respuesta(request, nombre, ruta, tamano, etag, modificado, nombre_descarga):
+    tipo = mimetypes.guess_type(nombre_descarga or nombre)[0] or 'application/octet-stream'
+    disposicion = content_disposition_header(False, nombre_descarga) if nombre_descarga else None
+
+    envio = getattr(settings, 'ARCHIVOS_ENVIO', None)
+    if envio:
+        # El servidor web envia el archivo (y resuelve los rangos), el worker no copia bytes
+        respuesta = HttpResponse(content_type=tipo)
+        if envio == 'X-Accel-Redirect':
+            respuesta['X-Accel-Redirect'] = settings.ARCHIVOS_ACCEL_PREFIJO + quote(nombre)
+        else:
+            respuesta['X-Sendfile'] = ruta
+    else:
+        rango = rango_pedido(request, tamano, etag, modificado)
+        if rango is None and flujos.es_asgi(request):
+            respuesta = StreamingHttpResponse(
+                flujos.contenido(request, _leer(open(ruta, 'rb'), 0, tamano)), content_type=tipo
+            )
+            respuesta['Content-Length'] = tamano
+        elif rango is None:
+            # FileResponse usa wsgi.file_wrapper (sendfile) si el servidor lo ofrece
+            respuesta = FileResponse(open(ruta, 'rb'), content_type=tipo)
+        elif rango[0] >= tamano:
+            respuesta = HttpResponse(status=416)
+            respuesta['Content-Range'] = f'bytes */{tamano}'
+            return respuesta
+        else:
+            inicio, fin = rango
+            bloques = _leer(open(ruta, 'rb'), inicio, fin - inicio + 1)
+            respuesta = StreamingHttpResponse(flujos.contenido(request, bloques), status=206, content_type=tipo)
+            respuesta['Content-Length'] = fin - inicio + 1
+            respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    respuesta['Accept-Ranges'] = 'bytes'
+    if disposicion:
+        respuesta['Content-Disposition'] = disposicion
+    return respuesta
@@ -0,0 +1,88 @@
+#  ---- FUSION DE REGISTROS DUPLICADOS ----
+# get_or_create sin restricciones unicas podia crear filas repetidas de Inscripcion (user, curso),
+# Progreso (inscripcion, recurso) y Asistencia (inscripcion, sesion). Se conserva la fila de menor
+# id y se le pasa la informacion de las demas antes de borrarlas. Las funciones reciben el registro
+# de apps para poder usarse tambien desde la migracion 0004 y desde el comando fusionar_duplicados
+# (con los modelos historicos, que coinciden con las tablas de la BD aunque falte migrar).
+from django.apps import apps as apps_globales
+from django.db.models import Count, Min
+
+
+# Grupos repetidos del queryset: [(id_conservado, [ids_duplicados])]
+def _grupos_duplicados(queryset, campos):
+    grupos = (
+        queryset.values(*campos)
+        .annotate(n=Count('id'), primero=Min('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    resultado = []
+    for grupo in grupos:
+        filtro = {campo: grupo[campo] for campo in campos}
+        ids = list(queryset.filter(**filtro).exclude(id=grupo['primero']).values_list('id', flat=True))
+        resultado.append((grupo['primero'], ids))
+    return resultado
+
+
+def _fusionar_inscripciones(apps):
+    Inscripcion = apps.get_model('Cursos', 'Inscripcion')
+    Progreso = apps.get_model('Cursos', 'Progreso')
+    Asistencia = apps.get_model('Cursos', 'Asistencia')
+    Certificado = apps.get_model('Cursos', 'Certificado')
+    try:
+        ResumenProgreso = apps.get_model('Cursos', 'ResumenProgreso')
+    except LookupError:
+        # BD anterior a la migracion 0002, todavia no hay resumenes
+        ResumenProgreso = None
+
+    # Las inscripciones sin usuario no se consideran duplicadas entre si
+    grupos = _grupos_duplicados(Inscripcion.objects.exclude(user=None), ['user', 'curso'])
+    for conservado, duplicados in grupos:
+        # El progreso y la asistencia pasan a la inscripcion conservada (se fusionan despues)
+        Progreso.objects.filter(inscripcion_id__in=duplicados).update(inscripcion_id=conservado)
+        Asistencia.objects.filter(inscripcion_id__in=duplicados).update(inscripcion_id=conservado)
+        if not Certificado.objects.filter(inscripcion_id=conservado).exists():
+            mejor = Certificado.objects.filter(inscripcion_id__in=duplicados).order_by('-porcentaje_asistencia').first()
+            if mejor:
+                Certificado.objects.filter(id=mejor.id).update(inscripcion_id=conservado)
+        # El resumen de la inscripcion conservada se vuelve a crear al leerlo (o con recalcular_progreso)
+        if ResumenProgreso:
+            ResumenProgreso.objects.filter(inscripcion_id__in=duplicados + [conservado]).delete()
+        Inscripcion.objects.filter(id__in=duplicados).delete()
+    return len(grupos)
+
+
+def _fusionar_progresos(apps):
+    Progreso = apps.get_model('Cursos', 'Progreso')
+    grupos = _grupos_duplicados(Progreso.objects.all(), ['inscripcion', 'recurso'])
+    for conservado, duplicados in grupos:
+        # Queda completado si alguno lo estaba, con la primera fecha de completado
+        completados = Progreso.objects.filter(id__in=duplicados + [conservado], completado=True)
+        if completados.exists():
+            primero = completados.exclude(fecha_completado=None).order_by('fecha_completado').first()
+            Progreso.objects.filter(id=conservado).update(
+                completado=True, fecha_completado=primero.fecha_completado if primero else None
+            )
+        Progreso.objects.filter(id__in=duplicados).delete()
+    return len(grupos)
+
+
+def _fusionar_asistencias(apps):
+    Asistencia = apps.get_model('Cursos', 'Asistencia')
+    grupos = _grupos_duplicados(Asistencia.objects.all(), ['inscripcion', 'sesion'])
+    for conservado, duplicados in grupos:
+        # Queda presente si en alguna de las filas estaba presente
+        if Asistencia.objects.filter(id__in=duplicados, presente=True).exists():
+            Asistencia.objects.filter(id=conservado).update(presente=True)
+        Asistencia.objects.filter(id__in=duplicados).delete()
+    return len(grupos)
+
+
+# Devuelve {'inscripciones', 'progresos', 'asistencias'}: cantidad de grupos fusionados.
+# Las inscripciones van primero porque mover su progreso/asistencia puede crear nuevos duplicados.
+def fusionar_duplicados(apps=apps_globales):
+    return {
+        'inscripciones': _fusionar_inscripciones(apps),
+        'progresos': _fusionar_progresos(apps),
+        'asistencias': _fusionar_asistencias(apps),
+    }
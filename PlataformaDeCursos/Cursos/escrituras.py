@@ -0,0 +1,55 @@
+#  ---- ESCRITURAS EN SQLITE ----
+# SQLite admite un solo escritor a la vez. Con WAL (ver SQLITE_PRAGMAS en settings) los lectores
+# no esperan, pero dos transacciones que escriben se turnan: la segunda espera el bloqueo hasta
+# `timeout` y si no lo obtiene falla con "database is locked". Las funciones decoradas con
+# @escritura corren en su propia transaccion y:
+#  - dentro del mismo proceso se hacen de a una (un cerrojo de Python), asi los hilos de un
+#    servidor o de trabajar_tareas hacen fila sin gastar el busy timeout de SQLite;
+#  - si la BD esta bloqueada por otro proceso, se deshace la transaccion y se reintenta con espera
+#    exponencial hasta ESCRITURAS_INTENTOS veces.
+# La funcion tiene que poder repetirse entera. Si se llama dentro de otra transaccion corre como
+# parte de ella, sin cerrojo ni reintentos (el reintento le corresponde a la transaccion de afuera).
+#  - python manage.py benchmark_escrituras --escritores 1 4 16   --> escrituras/s y errores por bloqueo
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+ESPERA_INICIAL = 0.05
+ESPERA_MAXIMA = 2.0
+
+_cerrojo = threading.Lock()
+
+
+def bloqueada(error):
+    mensaje = str(error).lower()
+    return 'database is locked' in mensaje or 'database is busy' in mensaje
+
+
+def espera(intento):
+    # Con variacion al azar para que los procesos que chocaron no vuelvan a chocar
+    return min(ESPERA_INICIAL * 2 ** intento, ESPERA_MAXIMA) * random.uniform(0.5, 1.5)
+
+
+def escritura(funcion):
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if connection.in_atomic_block:
+            return funcion(*args, **kwargs)
+        serializar = connection.vendor == 'sqlite' and settings.ESCRITURAS_SERIALIZADAS
+        intentos = settings.ESCRITURAS_INTENTOS
+        for intento in range(intentos):
+            try:
+                if serializar:
+                    with _cerrojo, transaction.atomic():
+                        return funcion(*args, **kwargs)
+                with transaction.atomic():
+                    return funcion(*args, **kwargs)
+            except OperationalError as error:
+                if not bloqueada(error) or intento == intentos - 1:
+                    raise
+            time.sleep(espera(intento))
+    return envoltura
@@ -0,0 +1,34 @@
+#  ---- RESPUESTAS EN FLUJO CON WSGI Y ASGI ----
+# Un StreamingHttpResponse (o FileResponse) con un iterador sincrono se envia a medida que se
+# genera con WSGI, pero con ASGI Django 5.2 lo consume entero con sync_to_async(list) antes de
+# enviar el primer byte: un reporte o un video quedarian completos en memoria. contenido() deja
+# el iterador como esta con WSGI y con ASGI lo envuelve en uno async que pide `por_vez` partes
+# en cada salto a sync_to_async, asi la memoria queda en unas pocas partes con los dos servidores.
+# Las partes se piden en el hilo de la peticion (thread_sensitive), el mismo donde corrio la
+# vista: los iterator() de la BD siguen usando su conexion.
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+def es_asgi(request):
+    return isinstance(request, ASGIRequest)
+
+
+async def _asincrono(iterador, por_vez):
+    iterador = iter(iterador)
+    siguientes = sync_to_async(lambda: list(islice(iterador, por_vez)))
+    try:
+        while partes := await siguientes():
+            for parte in partes:
+                yield parte
+    finally:
+        # Cierra el generador (y el archivo o el cursor que tenga abierto) aunque se corte el envio
+        cerrar = getattr(iterador, 'close', None)
+        if cerrar:
+            await sync_to_async(cerrar)()
+
+
+def contenido(request, iterador, por_vez=1):
+    return _asincrono(iterador, por_vez) if es_asgi(request) else iterador
@@ -0,0 +1,123 @@
+#  ---- GENERADOR DE DATOS SINTETICOS ----
+# Crea profesores, cursos, sesiones, recursos, estudiantes, inscripciones, progreso y asistencia
+# con bulk_create. Con la misma semilla y escala siempre genera los mismos datos.
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from .models import Asistencia, Curso, Inscripcion, Perfil, Profesor, Progreso, Recurso, Sesion
+from .progreso import recalcular_resumenes
+
+ESPECIALIDADES = ['Ingles', 'Frances', 'Aleman', 'Portugues', 'Italiano', 'Quechua', 'Aymara']
+TEMAS = ['gramatica', 'conversacion', 'lectura', 'escritura', 'pronunciacion', 'vocabulario',
+         'cultura', 'negocios', 'viajes', 'literatura', 'basico', 'intermedio', 'avanzado']
+CONTRASENA = 'clave12345'
+
+
+# Parametros de escala por defecto (ver el comando generar_datos)
+ESCALA = {
+    'profesores': 10,
+    'cursos': 50,
+    'sesiones': 10,  # por curso
+    'recursos': 10,  # por curso
+    'estudiantes': 1000,
+    'inscripciones': 3,  # cursos por estudiante
+    'progreso': 0.5,  # fraccion de recursos completados
+    'asistencia': 0.8,  # fraccion de sesiones con presente
+}
+
+
+def _en_lotes(modelo, objetos, lote):
+    modelo.objects.bulk_create(objetos, batch_size=lote)
+
+
+def generar_datos(semilla=1, prefijo='gen', lote=5000, **escala):
+    escala = {**ESCALA, **escala}
+    azar = random.Random(semilla)
+    # Todos los usuarios comparten la misma contraseña: se calcula el hash una sola vez
+    contrasena = make_password(CONTRASENA)
+    inicio = date(2025, 1, 1)
+
+    # Profesores (con usuario y perfil)
+    _en_lotes(User, (
+        User(username=f'{prefijo}_profesor_{i}', email=f'{prefijo}_profesor_{i}@correo.com', password=contrasena)
+        for i in range(escala['profesores'])
+    ), lote)
+    usuarios_profesores = list(
+        User.objects.filter(username__startswith=f'{prefijo}_profesor_').order_by('id').values_list('id', flat=True)
+    )
+    _en_lotes(Profesor, (
+        Profesor(user_id=user_id, nombre=f'Profesor {i}', email=f'{prefijo}_profesor_{i}@correo.com',
+                 especialidad=ESPECIALIDADES[i % len(ESPECIALIDADES)])
+        for i, user_id in enumerate(usuarios_profesores)
+    ), lote)
+    profesores = list(Profesor.objects.filter(user_id__in=usuarios_profesores).order_by('id').values_list('id', flat=True))
+
+    # Cursos, sesiones y recursos
+    _en_lotes(Curso, (
+        Curso(
+            titulo=f"{' '.join(azar.sample(TEMAS, 2)).capitalize()} {i}",
+            descripcion=' '.join(azar.choices(TEMAS, k=8)),
+            fecha_inicio=inicio + timedelta(days=azar.randrange(365)),
+            fecha_fin=inicio + timedelta(days=400),
+            profesor_id=profesores[i % len(profesores)],
+        ) for i in range(escala['cursos'])
+    ), lote)
+    # Los filtros usan subconsultas: listas de ids muy largas superan el limite de parametros de SQLite
+    cursos_qs = Curso.objects.filter(profesor_id__in=profesores)
+    cursos = list(cursos_qs.order_by('id').values_list('id', flat=True))
+    _en_lotes(Sesion, (
+        Sesion(curso_id=curso_id, titulo=f'Sesion {s + 1}', fecha=inicio + timedelta(days=7 * s))
+        for curso_id in cursos for s in range(escala['sesiones'])
+    ), lote)
+    _en_lotes(Recurso, (
+        Recurso(curso_id=curso_id, titulo=f'Recurso {r + 1}', descripcion='-', tipo_archivo='Archivo',
+                enlace=f'https://ejemplo.com/{curso_id}/{r + 1}')
+        for curso_id in cursos for r in range(escala['recursos'])
+    ), lote)
+
+    # Estudiantes e inscripciones
+    _en_lotes(User, (
+        User(username=f'{prefijo}_estudiante_{i}', email=f'{prefijo}_estudiante_{i}@correo.com', password=contrasena)
+        for i in range(escala['estudiantes'])
+    ), lote)
+    estudiantes_qs = User.objects.filter(username__startswith=f'{prefijo}_estudiante_')
+    estudiantes = list(estudiantes_qs.order_by('id').values_list('id', flat=True))
+    _en_lotes(Perfil, (Perfil(user_id=user_id) for user_id in usuarios_profesores + estudiantes), lote)
+    por_estudiante = min(escala['inscripciones'], len(cursos))
+    _en_lotes(Inscripcion, (
+        Inscripcion(user_id=user_id, curso_id=curso_id, nombre_estudiante=f'Estudiante {n}',
+                    email_estudiante=f'{prefijo}_estudiante_{n}@correo.com')
+        for n, user_id in enumerate(estudiantes) for curso_id in azar.sample(cursos, por_estudiante)
+    ), lote)
+
+    # Progreso y asistencia
+    recursos, sesiones = {}, {}
+    for recurso_id, curso_id in Recurso.objects.filter(curso__in=cursos_qs.values('id')).values_list('id', 'curso_id'):
+        recursos.setdefault(curso_id, []).append(recurso_id)
+    for sesion_id, curso_id in Sesion.objects.filter(curso__in=cursos_qs.values('id')).values_list('id', 'curso_id'):
+        sesiones.setdefault(curso_id, []).append(sesion_id)
+    inscripciones = Inscripcion.objects.filter(curso__in=cursos_qs.values('id'), user__in=estudiantes_qs.values('id'))
+    lista = list(inscripciones.order_by('id').values_list('id', 'curso_id'))
+
+    _en_lotes(Progreso, (
+        Progreso(inscripcion_id=ins_id, recurso_id=recurso_id, completado=True, fecha_completado=inicio)
+        for ins_id, curso_id in lista for recurso_id in recursos.get(curso_id, [])
+        if azar.random() < escala['progreso']
+    ), lote)
+    _en_lotes(Asistencia, (
+        Asistencia(inscripcion_id=ins_id, sesion_id=sesion_id, presente=azar.random() < escala['asistencia'])
+        for ins_id, curso_id in lista for sesion_id in sesiones.get(curso_id, [])
+    ), lote)
+
+    recalcular_resumenes(inscripciones, tamano_lote=lote)
+    return {
+        'profesores': len(profesores),
+        'cursos': len(cursos),
+        'estudiantes': len(estudiantes),
+        'inscripciones': len(lista),
+        'progresos': Progreso.objects.filter(inscripcion__in=inscripciones).count(),
+        'asistencias': Asistencia.objects.filter(inscripcion__in=inscripciones).count(),
+    }
@@ -0,0 +1,341 @@
+#  ---- IMPORTACION MASIVA DESDE CSV / JSON LINES ----
+# Lee el archivo fila por fila y guarda en lotes de `lote` filas con bulk_create, cada lote en su
+# propia transaccion: la memoria no crece con el tamaño del archivo y si el proceso se corta lo
+# ya importado queda guardado (volver a importar el mismo archivo omite lo que ya existe).
+# Las filas se relacionan por claves naturales, email del usuario / profesor y titulo del curso,
+# resueltas con indices en memoria que consultan la BD una vez por lote para las claves nuevas.
+# Los Perfil se crean en lote junto con los usuarios (usuarios.crear_usuarios) y los
+# contadores de ResumenProgreso se actualizan como lo hacen las vistas.
+#
+# Columnas por tipo (las marcadas con ? son opcionales):
+#   profesores:    email, nombre, especialidad, username?
+#   estudiantes:   email, nombre?, username?
+#   cursos:        titulo, descripcion?, fecha_inicio, fecha_fin (AAAA-MM-DD), profesor (email)
+#   sesiones:      curso (titulo), titulo, fecha
+#   recursos:      curso (titulo), titulo, enlace, descripcion?, tipo_archivo?
+#   inscripciones: email, curso (titulo), nombre?, username?   (crea el estudiante si no existe)
+import csv
+import json
+import time
+from datetime import date
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from . import catalogo
+from .models import Curso, Inscripcion, Profesor, Recurso, ResumenProgreso, Sesion
+from .progreso import calcular_contadores, registrar_agregados
+from .usuarios import crear_usuarios
+
+LOTE = 5000
+# Claves guardadas por indice antes de vaciarlo (memoria acotada con archivos enormes)
+MAXIMO_INDICE = 200_000
+# Cuantos errores se guardan con su linea para el reporte
+MAXIMO_ERRORES = 100
+
+
+class FilaInvalida(ValueError):
+    pass
+
+
+#  ---- LECTURA Y VALIDACION DE CADA FILA ----
+
+def formato_de(ruta):
+    return 'csv' if ruta.lower().endswith('.csv') else 'jsonl'
+
+
+# Devuelve (numero_de_linea, fila) de a una, sin leer el archivo entero
+def leer_filas(archivo, formato):
+    if formato == 'csv':
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+        return
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except json.JSONDecodeError:
+            yield numero, None
+
+
+def en_lotes(filas, tamano):
+    filas = iter(filas)
+    while lote := list(islice(filas, tamano)):
+        yield lote
+
+
+def _texto(fila, campo, obligatorio=True, largo=None):
+    valor = str(fila.get(campo) or '').strip()
+    if obligatorio and not valor:
+        raise FilaInvalida(f'falta {campo}')
+    return valor[:largo] if largo else valor
+
+
+def _fecha(fila, campo):
+    try:
+        return date.fromisoformat(_texto(fila, campo))
+    except ValueError:
+        raise FilaInvalida(f'{campo} no es una fecha AAAA-MM-DD')
+
+
+def _usuario(fila):
+    email = _texto(fila, 'email', largo=254).lower()
+    return {
+        'email': email,
+        'username': _texto(fila, 'username', False, 150) or email[:150],
+        'nombre': _texto(fila, 'nombre', False, 100),
+    }
+
+
+CONVERTIR = {
+    'profesores': lambda fila: {**_usuario(fila), 'especialidad': _texto(fila, 'especialidad', largo=100)},
+    'estudiantes': _usuario,
+    'cursos': lambda fila: {
+        'titulo': _texto(fila, 'titulo', largo=200), 'descripcion': _texto(fila, 'descripcion', False),
+        'fecha_inicio': _fecha(fila, 'fecha_inicio'), 'fecha_fin': _fecha(fila, 'fecha_fin'),
+        'profesor': _texto(fila, 'profesor').lower(),
+    },
+    'sesiones': lambda fila: {
+        'curso': _texto(fila, 'curso'), 'titulo': _texto(fila, 'titulo', largo=200), 'fecha': _fecha(fila, 'fecha'),
+    },
+    'recursos': lambda fila: {
+        'curso': _texto(fila, 'curso'), 'titulo': _texto(fila, 'titulo', largo=200), 'enlace': _texto(fila, 'enlace'),
+        'descripcion': _texto(fila, 'descripcion', False) or '-',
+        'tipo_archivo': _texto(fila, 'tipo_archivo', False, 50) or 'Enlace',
+    },
+    'inscripciones': lambda fila: {**_usuario(fila), 'curso': _texto(fila, 'curso')},
+}
+TIPOS = list(CONVERTIR)
+
+
+#  ---- INDICES DE CLAVES NATURALES ----
+
+class Indice:
+    def __init__(self, queryset, campo, maximo=MAXIMO_INDICE):
+        self.queryset = queryset
+        self.campo = campo
+        self.maximo = maximo
+        self.ids = {}
+
+    # Carga con una consulta las claves que todavia no estan en memoria, devuelve {clave: id}
+    def resolver(self, claves):
+        faltantes = {clave for clave in claves if clave not in self.ids}
+        if faltantes:
+            if len(self.ids) + len(faltantes) > self.maximo:
+                self.ids.clear()
+            # Con claves repetidas en la BD (emails, titulos) gana la fila mas antigua
+            consulta = self.queryset.filter(**{f'{self.campo}__in': faltantes}).order_by('-id')
+            self.ids.update(consulta.values_list(self.campo, 'id'))
+        return {clave: self.ids[clave] for clave in claves if clave in self.ids}
+
+    def agregar(self, clave, id_):
+        self.ids[clave] = id_
+
+
+#  ---- GUARDADO POR LOTES ----
+# Cada metodo guardar_<tipo> recibe [(linea, registro)] ya validados y devuelve
+# (creados, existentes, [(linea, error)]) para las filas que no se pudieron relacionar
+
+class Importador:
+    def __init__(self, lote=LOTE):
+        self.lote = lote
+        self.usuarios = Indice(User.objects.all(), 'email')
+        self.profesores = Indice(Profesor.objects.all(), 'email')
+        self.cursos = Indice(Curso.objects.all(), 'titulo')
+        # Contraseña inutilizable compartida: los usuarios importados la definen al recuperar la cuenta
+        self.contrasena = make_password(None)
+        self.cursos_nuevos = []
+
+    # Crea los usuarios (con su perfil) que no existan y devuelve {email: user_id} y cuantos creo
+    def _usuarios(self, registros):
+        por_email = {registro['email']: registro for registro in registros}
+        ids = self.usuarios.resolver(por_email)
+        nuevos = [registro for email, registro in por_email.items() if email not in ids]
+        ocupados = set(
+            User.objects.filter(username__in=[registro['username'] for registro in nuevos]).values_list('username', flat=True)
+        )
+        usuarios, vistos = [], set()
+        for registro in nuevos:
+            if registro['username'] in ocupados or registro['username'] in vistos:
+                continue
+            vistos.add(registro['username'])
+            usuarios.append(User(
+                username=registro['username'], email=registro['email'], first_name=registro['nombre'],
+                password=self.contrasena,
+            ))
+        crear_usuarios(usuarios, self.lote)
+        for usuario in usuarios:
+            self.usuarios.agregar(usuario.email, usuario.id)
+            ids[usuario.email] = usuario.id
+        return ids, len(usuarios)
+
+    def _sin_usuario(self, lote, ids):
+        return [(linea, f"el nombre de usuario {registro['username']} ya esta en uso")
+                for linea, registro in lote if registro['email'] not in ids]
+
+    def guardar_estudiantes(self, lote):
+        ids, creados = self._usuarios([registro for _, registro in lote])
+        errores = self._sin_usuario(lote, ids)
+        return creados, len(lote) - creados - len(errores), errores
+
+    def guardar_profesores(self, lote):
+        registros = [registro for _, registro in lote]
+        ya = self.profesores.resolver({registro['email'] for registro in registros})
+        ids, _ = self._usuarios([registro for registro in registros if registro['email'] not in ya])
+        errores = self._sin_usuario([(linea, r) for linea, r in lote if r['email'] not in ya], ids)
+        con_profesor = set(Profesor.objects.filter(user_id__in=ids.values()).values_list('user_id', flat=True))
+        profesores = {}
+        for registro in registros:
+            email = registro['email']
+            if email in ids and email not in ya and ids[email] not in con_profesor:
+                profesores[email] = Profesor(
+                    user_id=ids[email], nombre=registro['nombre'] or email[:100], email=email,
+                    especialidad=registro['especialidad'],
+                )
+        Profesor.objects.bulk_create(profesores.values(), batch_size=self.lote)
+        for profesor in profesores.values():
+            self.profesores.agregar(profesor.email, profesor.id)
+        return len(profesores), len(lote) - len(profesores) - len(errores), errores
+
+    def guardar_cursos(self, lote):
+        ya = self.cursos.resolver({registro['titulo'] for _, registro in lote})
+        profesores = self.profesores.resolver({registro['profesor'] for _, registro in lote})
+        cursos, errores = {}, []
+        for linea, registro in lote:
+            if registro['titulo'] in ya or registro['titulo'] in cursos:
+                continue
+            if registro['profesor'] not in profesores:
+                errores.append((linea, f"el profesor {registro['profesor']} no existe"))
+                continue
+            cursos[registro['titulo']] = Curso(
+                titulo=registro['titulo'], descripcion=registro['descripcion'],
+                fecha_inicio=registro['fecha_inicio'], fecha_fin=registro['fecha_fin'],
+                profesor_id=profesores[registro['profesor']],
+            )
+        Curso.objects.bulk_create(cursos.values(), batch_size=self.lote)
+        for curso in cursos.values():
+            self.cursos.agregar(curso.titulo, curso.id)
+            self.cursos_nuevos.append(curso.id)
+        return len(cursos), len(lote) - len(cursos) - len(errores), errores
+
+    # Relaciona cada registro con su curso. Devuelve ({curso_id: [(linea, registro)]}, errores)
+    def _por_curso(self, lote):
+        cursos = self.cursos.resolver({registro['curso'] for _, registro in lote})
+        por_curso, errores = {}, []
+        for linea, registro in lote:
+            if registro['curso'] in cursos:
+                por_curso.setdefault(cursos[registro['curso']], []).append((linea, registro))
+            else:
+                errores.append((linea, f"el curso {registro['curso']} no existe"))
+        return por_curso, errores
+
+    # Sesiones y recursos: se omiten los que ya existen con el mismo titulo en el curso
+    def _guardar_del_curso(self, lote, modelo, campos, campo_resumen):
+        por_curso, errores = self._por_curso(lote)
+        ya = set(modelo.objects.filter(curso_id__in=list(por_curso)).values_list('curso_id', 'titulo'))
+        nuevos = {}
+        for curso_id, registros in por_curso.items():
+            for _, registro in registros:
+                if (curso_id, registro['titulo']) not in ya:
+                    nuevos[(curso_id, registro['titulo'])] = modelo(
+                        curso_id=curso_id, **{campo: registro[campo] for campo in campos}
+                    )
+        modelo.objects.bulk_create(nuevos.values(), batch_size=self.lote)
+        agregados = {}
+        for curso_id, _ in nuevos:
+            agregados[curso_id] = agregados.get(curso_id, 0) + 1
+        registrar_agregados(campo_resumen, agregados)
+        return len(nuevos), len(lote) - len(nuevos) - len(errores), errores
+
+    def guardar_sesiones(self, lote):
+        return self._guardar_del_curso(lote, Sesion, ['titulo', 'fecha'], 'sesiones_totales')
+
+    def guardar_recursos(self, lote):
+        return self._guardar_del_curso(
+            lote, Recurso, ['titulo', 'descripcion', 'tipo_archivo', 'enlace'], 'recursos_totales'
+        )
+
+    def guardar_inscripciones(self, lote):
+        por_curso, errores = self._por_curso(lote)
+        registros = [registro for registros in por_curso.values() for _, registro in registros]
+        ids, _ = self._usuarios(registros)
+        errores += self._sin_usuario([fila for filas in por_curso.values() for fila in filas], ids)
+        ya = set(
+            Inscripcion.objects.filter(user_id__in=set(ids.values()), curso_id__in=list(por_curso))
+            .values_list('user_id', 'curso_id')
+        )
+        inscripciones = {}
+        for curso_id, filas in por_curso.items():
+            for _, registro in filas:
+                user_id = ids.get(registro['email'])
+                if user_id and (user_id, curso_id) not in ya:
+                    inscripciones[(user_id, curso_id)] = Inscripcion(
+                        user_id=user_id, curso_id=curso_id, email_estudiante=registro['email'],
+                        nombre_estudiante=registro['nombre'] or registro['email'][:100],
+                    )
+        Inscripcion.objects.bulk_create(inscripciones.values(), batch_size=self.lote)
+        # Los nuevos empiezan con los totales del curso y sin progreso ni asistencia
+        contadores = calcular_contadores(Inscripcion.objects.filter(id__in=[ins.id for ins in inscripciones.values()]))
+        ResumenProgreso.objects.bulk_create(
+            [ResumenProgreso(inscripcion_id=ins_id, **valores) for ins_id, valores in contadores.items()],
+            batch_size=self.lote,
+        )
+        return len(inscripciones), len(lote) - len(inscripciones) - len(errores), errores
+
+    # Las tarjetas del catalogo en cache no conocen los cursos nuevos
+    def terminar(self):
+        if self.cursos_nuevos:
+            cache.delete(catalogo.CLAVE_IDS)
+            catalogo.invalidar_cursos(self.cursos_nuevos)
+
+
+# Importa `archivo` (abierto en modo texto) del tipo dado. al_avanzar(resultado) se llama
+# despues de cada lote. Devuelve {'filas', 'creados', 'existentes', 'errores', 'detalle_errores',
+# 'segundos', 'filas_por_segundo'}
+def importar(tipo, archivo, formato='csv', lote=LOTE, al_avanzar=None):
+    if tipo not in CONVERTIR:
+        raise ValueError(f'Tipo desconocido: {tipo} (opciones: {", ".join(TIPOS)})')
+    importador = Importador(lote)
+    guardar = getattr(importador, f'guardar_{tipo}')
+    resultado = {'filas': 0, 'creados': 0, 'existentes': 0, 'errores': 0, 'detalle_errores': []}
+    inicio = time.perf_counter()
+
+    def error(linea, mensaje):
+        resultado['errores'] += 1
+        if len(resultado['detalle_errores']) < MAXIMO_ERRORES:
+            resultado['detalle_errores'].append((linea, mensaje))
+
+    for filas in en_lotes(leer_filas(archivo, formato), lote):
+        validos = []
+        for linea, fila in filas:
+            if not isinstance(fila, dict):
+                error(linea, 'fila con formato invalido')
+                continue
+            try:
+                validos.append((linea, CONVERTIR[tipo](fila)))
+            except FilaInvalida as motivo:
+                error(linea, str(motivo))
+        with transaction.atomic():
+            creados, existentes, errores = guardar(validos)
+        for linea, mensaje in errores:
+            error(linea, mensaje)
+        resultado['filas'] += len(filas)
+        resultado['creados'] += creados
+        resultado['existentes'] += existentes
+        _medir(resultado, inicio)
+        if al_avanzar:
+            al_avanzar(resultado)
+
+    importador.terminar()
+    return _medir(resultado, inicio)
+
+
+def _medir(resultado, inicio):
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    resultado['filas_por_segundo'] = round(resultado['filas'] / resultado['segundos']) if resultado['segundos'] else 0
+    return resultado
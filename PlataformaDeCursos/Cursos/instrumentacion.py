@@ -0,0 +1,182 @@
+#  ---- INSTRUMENTACION DE PETICIONES ----
+# Middleware opcional (INSTRUMENTACION_ACTIVA = True en settings) que mide por peticion:
+# consultas SQL, tiempo en la BD, consultas repetidas (N+1), tiempo de plantillas y tamaño
+# de la respuesta. Cada medicion se escribe como una linea JSON en el logger
+# 'Cursos.instrumentacion' y se acumula en un resumen en memoria por nombre de URL
+# (ultimas INSTRUMENTACION_VENTANA peticiones), visible en /instrumentacion/ para staff.
+# INSTRUMENTACION_PRESUPUESTO = {'dashboard': 10, ...} fija el maximo de consultas por vista;
+# con INSTRUMENTACION_ESTRICTA = True pasarse del presupuesto lanza PresupuestoExcedido
+# (pensado para las pruebas).
+# El tiempo de plantillas lo mide el backend PlantillasMedidas (TEMPLATES en settings): fuera de
+# una peticion medida renderiza igual que DjangoTemplates.
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('Cursos.instrumentacion')
+
+VENTANA = 200
+# Cuantas huellas de consultas repetidas se guardan por peticion
+MAXIMO_REPETIDAS = 5
+_SIN_NOMBRE = '(sin nombre)'
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+_resumen = defaultdict(lambda: deque(maxlen=getattr(settings, 'INSTRUMENTACION_VENTANA', VENTANA)))
+_candado = threading.Lock()
+
+
+class PresupuestoExcedido(AssertionError):
+    pass
+
+
+# Huella de una consulta: el SQL sin los valores. Las listas IN (%s, %s, ...) de distinto largo
+# cuentan como la misma consulta.
+def huella(sql):
+    return re.sub(r'%s(\s*,\s*%s)+', '%s, ...', sql)
+
+
+class Medicion:
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_bd = 0.0
+        self.segundos_plantillas = 0.0
+        self.huellas = Counter()
+        self._profundidad_plantillas = 0
+
+    # execute_wrapper de la conexion: se llama en cada consulta
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_bd += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[huella(sql)] += 1
+
+    def repetidas(self):
+        return [
+            {'sql': sql, 'veces': veces}
+            for sql, veces in self.huellas.most_common(MAXIMO_REPETIDAS) if veces > 1
+        ]
+
+
+# Solo se mide el render mas externo para no contar dos veces las plantillas que se renderizan
+# dentro de otras (render_to_string desde una vista o una etiqueta)
+class _PlantillaMedida(Template):
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return super().render(context, request)
+        medicion._profundidad_plantillas += 1
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion._profundidad_plantillas -= 1
+            if medicion._profundidad_plantillas == 0:
+                medicion.segundos_plantillas += time.perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    def from_string(self, template_code):
+        return _PlantillaMedida(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return _PlantillaMedida(super().get_template(template_name).template, self)
+
+
+def registrar(registro):
+    with _candado:
+        _resumen[registro['url']].append(registro)
+    logger.info(json.dumps(registro, ensure_ascii=False))
+
+
+def _percentil(valores, fraccion):
+    valores = sorted(valores)
+    return valores[max(0, int(len(valores) * fraccion + 0.5) - 1)]
+
+
+# Resumen por nombre de URL de las ultimas peticiones registradas
+def resumen():
+    with _candado:
+        copia = {url: list(registros) for url, registros in _resumen.items()}
+    resultado = {}
+    for url, registros in sorted(copia.items()):
+        n = len(registros)
+        repetidas = Counter()
+        for registro in registros:
+            for consulta in registro['repetidas']:
+                repetidas[consulta['sql']] += 1
+        resultado[url] = {
+            'peticiones': n,
+            'consultas_promedio': round(sum(r['consultas'] for r in registros) / n, 1),
+            'consultas_maximo': max(r['consultas'] for r in registros),
+            'ms_mediana': _percentil([r['ms'] for r in registros], 0.5),
+            'ms_p95': _percentil([r['ms'] for r in registros], 0.95),
+            'ms_bd_promedio': round(sum(r['ms_bd'] for r in registros) / n, 2),
+            'ms_plantillas_promedio': round(sum(r['ms_plantillas'] for r in registros) / n, 2),
+            'bytes_promedio': sum(r['bytes'] for r in registros) // n,
+            # Consultas que se repitieron dentro de una misma peticion, y en cuantas peticiones paso
+            'repetidas': [{'sql': sql, 'peticiones': veces} for sql, veces in repetidas.most_common(MAXIMO_REPETIDAS)],
+        }
+    return resultado
+
+
+def reiniciar():
+    with _candado:
+        _resumen.clear()
+
+
+class InstrumentacionMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_ACTIVA', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for alias in connections:
+                    pila.enter_context(connections[alias].execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        segundos = time.perf_counter() - inicio
+
+        coincidencia = request.resolver_match
+        url = (coincidencia.url_name if coincidencia else None) or _SIN_NOMBRE
+        if url == 'instrumentacion':
+            return response
+        registro = {
+            'url': url,
+            'metodo': request.method,
+            'estado': response.status_code,
+            'consultas': medicion.consultas,
+            'ms': round(segundos * 1000, 2),
+            'ms_bd': round(medicion.segundos_bd * 1000, 2),
+            'ms_plantillas': round(medicion.segundos_plantillas * 1000, 2),
+            'bytes': 0 if response.streaming else len(response.content),
+            'repetidas': medicion.repetidas(),
+        }
+        registrar(registro)
+
+        presupuesto = getattr(settings, 'INSTRUMENTACION_PRESUPUESTO', {}).get(url)
+        if presupuesto is not None and medicion.consultas > presupuesto:
+            mensaje = f'{url} hizo {medicion.consultas} consultas (presupuesto {presupuesto})'
+            if getattr(settings, 'INSTRUMENTACION_ESTRICTA', False):
+                raise PresupuestoExcedido(mensaje)
+            logger.warning(mensaje)
+        return response
@@ -0,0 +1,127 @@
+# Compara WSGI (vistas sincronas, un hilo por peticion como un servidor con hilos) contra ASGI
+# (vistas async de urls_asgi, todas las peticiones en un event loop) con clientes concurrentes.
+# Reporta peticiones por segundo y latencia p50/p99 por vista.
+#  - python manage.py benchmark_asgi
+#  - python manage.py benchmark_asgi --concurrencia 1 10 50 --peticiones 500 --estudiantes 5000
+# Las peticiones se hacen dentro del proceso con Client / AsyncClient (sin red ni servidor), asi
+# se compara solo el manejo de Django. Usa una base de datos temporal, no modifica db.sqlite3
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from Cursos.benchmark import base_de_datos_temporal
+from Cursos.generador import generar_datos
+from Cursos.models import Inscripcion, Profesor, Recurso
+
+URLS_ASGI = 'PlataformaDeCursos.urls_asgi'
+
+
+def percentil(tiempos, fraccion):
+    return tiempos[min(len(tiempos) - 1, int(len(tiempos) * fraccion))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de carga WSGI contra ASGI para las vistas de solo lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 10, 50])
+        parser.add_argument('--peticiones', type=int, default=300, help='Peticiones por vista y concurrencia')
+        parser.add_argument('--estudiantes', type=int, default=2000)
+        parser.add_argument('--cursos', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # En archivo: los hilos del modo WSGI escriben sesiones a la vez
+        with base_de_datos_temporal(en_archivo=True):
+            generar_datos(estudiantes=options['estudiantes'], cursos=options['cursos'])
+            casos = self.casos()
+            self.stdout.write(
+                f"{'vista':<20} {'conc.':>5} | {'WSGI pet/s':>10} {'p50 ms':>8} {'p99 ms':>8} | "
+                f"{'ASGI pet/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+            )
+            for nombre, usuario, url in casos:
+                for concurrencia in options['concurrencia']:
+                    wsgi = self.medir_wsgi(usuario, url, concurrencia, options['peticiones'])
+                    with override_settings(ROOT_URLCONF=URLS_ASGI):
+                        asgi = asyncio.run(self.medir_asgi(usuario, url, concurrencia, options['peticiones']))
+                    self.stdout.write(
+                        f"{nombre:<20} {concurrencia:>5} | {wsgi[0]:>10.0f} {wsgi[1]:>8.2f} {wsgi[2]:>8.2f} | "
+                        f"{asgi[0]:>10.0f} {asgi[1]:>8.2f} {asgi[2]:>8.2f}"
+                    )
+
+    def casos(self):
+        profesor = Profesor.objects.select_related('user').order_by('id').first()
+        inscripcion = Inscripcion.objects.select_related('user').order_by('id').first()
+        recurso = Recurso.objects.filter(curso_id=inscripcion.curso_id).order_by('id').first()
+        return [
+            ('lista_cursos', None, reverse('lista_cursos')),
+            ('detalle_curso', inscripcion.user, reverse('detalle_curso', args=[inscripcion.curso_id])),
+            ('ver_recurso', inscripcion.user, reverse('ver_recurso', args=[recurso.id])),
+            ('progreso_estudiante', inscripcion.user, reverse('progreso_estudiante')),
+            ('dashboard', profesor.user, reverse('dashboard')),
+        ]
+
+    def resultado(self, tiempos, total):
+        tiempos.sort()
+        return len(tiempos) / total, percentil(tiempos, 0.5) * 1000, percentil(tiempos, 0.99) * 1000
+
+    # Un cliente por hilo, como los hilos de un servidor WSGI
+    def medir_wsgi(self, usuario, url, concurrencia, peticiones):
+        local = threading.local()
+        barrera = threading.Barrier(concurrencia)
+
+        # La barrera asegura que cada hilo prepare su cliente una vez (login y calentamiento)
+        def preparar(_):
+            try:
+                local.cliente = Client()
+                if usuario:
+                    local.cliente.force_login(usuario)
+                local.cliente.get(url)
+            finally:
+                barrera.wait()
+
+        def peticion(_):
+            inicio = time.perf_counter()
+            respuesta = local.cliente.get(url)
+            assert respuesta.status_code == 200, respuesta.status_code
+            return time.perf_counter() - inicio
+
+        # Cada hilo abrio su propia conexion a la BD
+        def cerrar(_):
+            connections.close_all()
+            barrera.wait()
+
+        with ThreadPoolExecutor(concurrencia) as grupo:
+            list(grupo.map(preparar, range(concurrencia)))
+            inicio = time.perf_counter()
+            tiempos = list(grupo.map(peticion, range(peticiones)))
+            total = time.perf_counter() - inicio
+            list(grupo.map(cerrar, range(concurrencia)))
+        return self.resultado(tiempos, total)
+
+    # `concurrencia` clientes async en el mismo event loop
+    async def medir_asgi(self, usuario, url, concurrencia, peticiones):
+        clientes = [AsyncClient() for _ in range(concurrencia)]
+        for cliente in clientes:
+            if usuario:
+                await cliente.aforce_login(usuario)
+            await cliente.get(url)  # calentamiento
+
+        pendientes = iter(range(peticiones))
+        tiempos = []
+
+        async def trabajar(cliente):
+            for _ in pendientes:
+                inicio = time.perf_counter()
+                respuesta = await cliente.get(url)
+                assert respuesta.status_code == 200, respuesta.status_code
+                tiempos.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajar(cliente) for cliente in clientes))
+        return self.resultado(tiempos, time.perf_counter() - inicio)
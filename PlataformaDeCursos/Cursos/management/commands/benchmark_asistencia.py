@@ -0,0 +1,57 @@
+# Mide consultas y tiempo de un POST a tomar_asistencia con distintos tamaños de curso
+#  - python manage.py benchmark_asistencia
+#  - python manage.py benchmark_asistencia --estudiantes 50 500 5000
+# Usa una base de datos temporal, no modifica db.sqlite3
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from Cursos.benchmark import base_de_datos_temporal, medir
+from Cursos.models import Curso, Inscripcion, Profesor, Sesion
+
+
+class Command(BaseCommand):
+    help = 'Benchmark del guardado de asistencia (consultas y tiempo por POST)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, nargs='+', default=[50, 500, 5000])
+
+    def handle(self, *args, **options):
+        with base_de_datos_temporal():
+            for cantidad in options['estudiantes']:
+                self.medir_curso(cantidad)
+
+    def medir_curso(self, cantidad):
+        user = User.objects.create(username=f'profesor_{cantidad}')
+        profesor = Profesor.objects.create(user=user, nombre='Profesor', email=f'p{cantidad}@correo.com',
+                                           especialidad='-')
+        curso = Curso.objects.create(titulo=f'Curso {cantidad}', descripcion='-', profesor=profesor,
+                                     fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1))
+        sesion = Sesion.objects.create(curso=curso, titulo='Sesion 1', fecha=date(2025, 1, 2))
+        Inscripcion.objects.bulk_create(
+            Inscripcion(curso=curso, nombre_estudiante=f'Estudiante {i}', email_estudiante='e@correo.com')
+            for i in range(cantidad)
+        )
+        ids = list(Inscripcion.objects.filter(curso=curso).values_list('id', flat=True))
+
+        cliente = Client()
+        cliente.force_login(user)
+        url = reverse('tomar_asistencia', args=[sesion.id])
+
+        # Primer POST crea todas las asistencias, el segundo cambia la mitad
+        pares = {f'presente_{i}': 'on' for i in ids[::2]}
+        impares = {f'presente_{i}': 'on' for i in ids[1::2]}
+        for etapa, datos in (('crear', pares), ('actualizar', impares)):
+            resultado, _ = medir(lambda: cliente.post(url, datos))
+            self.stdout.write(
+                f"{cantidad:>6} estudiantes | {etapa:<10} | {resultado['consultas']:>4} consultas | "
+                f"{resultado['segundos'] * 1000:9.1f} ms"
+            )
+        resultado, _ = medir(lambda: cliente.get(url))
+        self.stdout.write(
+            f"{cantidad:>6} estudiantes | {'mostrar':<10} | {resultado['consultas']:>4} consultas | "
+            f"{resultado['segundos'] * 1000:9.1f} ms"
+        )
@@ -0,0 +1,91 @@
+# Mide la latencia de api_cursos en la primera pagina, en una pagina profunda, con filtros
+# y con busqueda de texto, para distintos tamaños de catalogo.
+#  - python manage.py benchmark_busqueda
+#  - python manage.py benchmark_busqueda --cursos 1000 100000
+# Usa una base de datos temporal, no modifica db.sqlite3
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from Cursos.benchmark import base_de_datos_temporal, medir
+from Cursos.busqueda import codificar_cursor
+from Cursos.models import Curso, Profesor
+
+TEMAS = ['ingles', 'frances', 'gramatica', 'conversacion', 'lectura', 'escritura', 'basico',
+         'intermedio', 'avanzado', 'pronunciacion', 'vocabulario', 'cultura', 'negocios', 'viajes']
+# Vocabulario de relleno para que las descripciones no repitan siempre las mismas palabras
+SILABAS = ['ka', 'lo', 'mi', 'ne', 'pu', 'ra', 'si', 'to', 'ul', 've']
+RELLENO = [a + b + c for a in SILABAS for b in SILABAS for c in SILABAS]
+ESPECIALIDADES = ['Ingles', 'Frances', 'Aleman', 'Portugues', 'Italiano']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de la paginacion por cursor y la busqueda del catalogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursos', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        with base_de_datos_temporal():
+            profesores = self.crear_profesores()
+            total = 0
+            for cantidad in sorted(options['cursos']):
+                self.agregar_cursos(cantidad - total, profesores, azar)
+                total = cantidad
+                # Estadisticas para el planificador de SQLite (como hace PRAGMA optimize)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                self.medir_paginas(cantidad, options['repeticiones'])
+
+    def crear_profesores(self):
+        profesores = []
+        for i in range(50):
+            user = User.objects.create(username=f'profesor_{i}')
+            profesores.append(Profesor.objects.create(
+                user=user, nombre=f'Profesor {i}', email=f'p{i}@correo.com',
+                especialidad=ESPECIALIDADES[i % len(ESPECIALIDADES)],
+            ))
+        return profesores
+
+    def agregar_cursos(self, cantidad, profesores, azar):
+        inicio = date(2020, 1, 1)
+        Curso.objects.bulk_create((
+            Curso(
+                titulo=' '.join(azar.sample(TEMAS, 2)).capitalize(),
+                descripcion=' '.join(azar.sample(TEMAS, 2) + azar.choices(RELLENO, k=10)),
+                fecha_inicio=inicio + timedelta(days=azar.randrange(2000)),
+                fecha_fin=inicio + timedelta(days=2100),
+                profesor=azar.choice(profesores),
+            ) for _ in range(cantidad)
+        ), batch_size=2000)
+
+    def medir_paginas(self, cantidad, repeticiones):
+        cliente = Client()
+        url = reverse('api_cursos')
+        profundo = Curso.objects.order_by('fecha_inicio', 'id')[cantidad * 9 // 10]
+        casos = {
+            'primera pagina': {},
+            'pagina profunda (90%)': {'cursor': codificar_cursor(profundo)},
+            'especialidad': {'especialidad': 'Frances'},
+            'rango de fechas': {'desde': '2022-01-01', 'hasta': '2022-06-30'},
+            'texto': {'q': 'pronunciacion negocios'},
+            'texto + especialidad': {'q': 'vocab', 'especialidad': 'Aleman'},
+        }
+        for nombre, parametros in casos.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                resultado, _ = medir(lambda: cliente.get(url, parametros))
+                tiempos.append(resultado['segundos'])
+            tiempos.sort()
+            self.stdout.write(
+                f"{cantidad:>7} cursos | {nombre:<22} | mediana {tiempos[len(tiempos) // 2] * 1000:7.2f} ms | "
+                f"p95 {tiempos[int(len(tiempos) * 0.95) - 1] * 1000:7.2f} ms"
+            )
@@ -0,0 +1,75 @@
+# Compara lista_cursos con la cache del catalogo vacia (fria) y llena (caliente)
+#  - python manage.py benchmark_catalogo
+#  - python manage.py benchmark_catalogo --cursos 100 1000 --repeticiones 10
+# Usa una base de datos temporal, no modifica db.sqlite3
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from Cursos.benchmark import base_de_datos_temporal, medir
+from Cursos.models import Curso, Inscripcion, Perfil, Profesor
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de lista_cursos con la cache del catalogo fria y caliente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursos', type=int, nargs='+', default=[100, 1000])
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with base_de_datos_temporal():
+            for cantidad in options['cursos']:
+                self.medir_catalogo(cantidad, options['repeticiones'])
+
+    def crear_cursos(self, cantidad):
+        Curso.objects.all().delete()
+        Profesor.objects.all().delete()
+        User.objects.all().delete()
+        # Un profesor (con perfil) cada 10 cursos
+        profesores = []
+        for i in range(max(1, cantidad // 10)):
+            user = User.objects.create(username=f'profesor_{i}')
+            # El Perfil lo crea la senal de User
+            Perfil.objects.filter(user=user).update(biografia=f'Biografia {i}', intereses='Idiomas')
+            profesores.append(Profesor.objects.create(
+                user=user, nombre=f'Profesor {i}', email=f'p{i}@correo.com', especialidad='Ingles'
+            ))
+        Curso.objects.bulk_create(
+            Curso(titulo=f'Curso {i}', descripcion='Descripcion del curso', profesor=profesores[i % len(profesores)],
+                  fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1))
+            for i in range(cantidad)
+        )
+        estudiante = User.objects.create(username='estudiante')
+        Inscripcion.objects.bulk_create(
+            Inscripcion(user=estudiante, curso=curso, nombre_estudiante='Estudiante', email_estudiante='e@correo.com')
+            for curso in Curso.objects.all()[:5]
+        )
+        return estudiante
+
+    def medir_catalogo(self, cantidad, repeticiones):
+        estudiante = self.crear_cursos(cantidad)
+        anonimo, autenticado = Client(), Client()
+        autenticado.force_login(estudiante)
+        url = reverse('lista_cursos')
+
+        for nombre, cliente in (('anonimo', anonimo), ('estudiante', autenticado)):
+            for etapa in ('fria', 'caliente'):
+                tiempos, consultas = [], 0
+                for _ in range(repeticiones):
+                    if etapa == 'fria':
+                        cache.clear()
+                    else:
+                        cliente.get(url)
+                    resultado, _ = medir(lambda: cliente.get(url))
+                    tiempos.append(resultado['segundos'])
+                    consultas = resultado['consultas']
+                tiempos.sort()
+                self.stdout.write(
+                    f"{cantidad:>6} cursos | {nombre:<10} | cache {etapa:<8} | {consultas:>3} consultas | "
+                    f"mediana {tiempos[len(tiempos) // 2] * 1000:8.1f} ms"
+                )
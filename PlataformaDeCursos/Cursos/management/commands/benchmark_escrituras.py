@@ -0,0 +1,126 @@
+# Prueba de carga de escrituras concurrentes: N procesos (como los workers de gunicorn) marcan
+# recursos completados y guardan asistencias a la vez sobre la misma BD. Compara la configuracion
+# original (journal DELETE, transacciones diferidas, sin reintentos) con el perfil de settings
+# (WAL, pragmas, BEGIN IMMEDIATE y @escritura). Reporta escrituras/s, p99 y errores por bloqueo.
+#  - python manage.py benchmark_escrituras
+#  - python manage.py benchmark_escrituras --escritores 1 4 16 --operaciones 300
+# Usa una base de datos temporal en archivo, no modifica db.sqlite3
+import multiprocessing
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from Cursos.asistencia import guardar_asistencias
+from Cursos.benchmark import base_de_datos_temporal
+from Cursos.escrituras import bloqueada
+from Cursos.generador import generar_datos
+from Cursos.models import Inscripcion, Recurso, Sesion
+from Cursos.progreso import completar_recurso
+
+# Una de cada cinco escrituras es una toma de asistencia completa, el resto clics en "completar"
+FRACCION_ASISTENCIA = 0.2
+
+PERFILES = {
+    'original': {'opciones': {'timeout': 5}, 'journal_mode': 'DELETE', 'serializar': False, 'intentos': 1},
+    'ajustado': {
+        'opciones': settings.DATABASES['default']['OPTIONS'], 'journal_mode': 'WAL',
+        'serializar': settings.ESCRITURAS_SERIALIZADAS, 'intentos': settings.ESCRITURAS_INTENTOS,
+    },
+}
+
+
+def aplicar_perfil(nombre):
+    perfil = PERFILES[nombre]
+    # Se leen al abrir cada conexion nueva
+    connection.settings_dict['OPTIONS'] = dict(perfil['opciones'])
+    settings.ESCRITURAS_SERIALIZADAS = perfil['serializar']
+    settings.ESCRITURAS_INTENTOS = perfil['intentos']
+
+
+def percentil(tiempos, fraccion):
+    return tiempos[min(len(tiempos) - 1, int(len(tiempos) * fraccion))] if tiempos else 0
+
+
+# Corre en un proceso hijo. Devuelve (tiempos de las escrituras que funcionaron, errores por bloqueo)
+def escritor(perfil, operaciones, pares, sesiones, semilla):
+    aplicar_perfil(perfil)
+    azar = random.Random(semilla)
+    tiempos, errores = [], 0
+    try:
+        for _ in range(operaciones):
+            inicio = time.perf_counter()
+            try:
+                if azar.random() < FRACCION_ASISTENCIA:
+                    sesion_id, inscritos = azar.choice(sesiones)
+                    presentes = {ins_id for ins_id in inscritos if azar.random() < 0.8}
+                    guardar_asistencias(Sesion.objects.get(id=sesion_id), presentes)
+                else:
+                    inscripcion_id, recurso_id = azar.choice(pares)
+                    completar_recurso(Inscripcion.objects.get(id=inscripcion_id), Recurso.objects.get(id=recurso_id))
+            except OperationalError as error:
+                if not bloqueada(error):
+                    raise
+                errores += 1
+                continue
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        connection.close()
+    return tiempos, errores
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga de escrituras concurrentes en SQLite (configuracion original contra el perfil)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, nargs='+', default=[1, 4, 16], help='Procesos escribiendo a la vez')
+        parser.add_argument('--operaciones', type=int, default=200, help='Escrituras por proceso')
+        parser.add_argument('--estudiantes', type=int, default=1000)
+        parser.add_argument('--cursos', type=int, default=50)
+
+    def handle(self, *args, **options):
+        originales = connection.settings_dict['OPTIONS'], settings.ESCRITURAS_SERIALIZADAS, settings.ESCRITURAS_INTENTOS
+        with base_de_datos_temporal(en_archivo=True):
+            generar_datos(estudiantes=options['estudiantes'], cursos=options['cursos'])
+            pares, sesiones = self.muestras()
+            self.stdout.write(f"{'perfil':<10} {'escritores':>10} | {'escrituras/s':>12} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+            try:
+                for perfil in PERFILES:
+                    for escritores in options['escritores']:
+                        fila = self.medir(perfil, escritores, options['operaciones'], pares, sesiones)
+                        self.stdout.write(
+                            f"{perfil:<10} {escritores:>10} | {fila[0]:>12.0f} {fila[1]:>8.2f} {fila[2]:>8.2f} {fila[3]:>8}"
+                        )
+            finally:
+                connection.settings_dict['OPTIONS'], settings.ESCRITURAS_SERIALIZADAS, settings.ESCRITURAS_INTENTOS = originales
+
+    def muestras(self):
+        recursos = {}
+        for recurso_id, curso_id in Recurso.objects.values_list('id', 'curso_id'):
+            recursos.setdefault(curso_id, []).append(recurso_id)
+        inscritos = {}
+        for inscripcion_id, curso_id in Inscripcion.objects.values_list('id', 'curso_id'):
+            inscritos.setdefault(curso_id, []).append(inscripcion_id)
+        pares = [
+            (inscripcion_id, recurso_id)
+            for curso_id, ids in inscritos.items() for inscripcion_id in ids for recurso_id in recursos.get(curso_id, [])
+        ]
+        sesiones = [(sesion_id, inscritos.get(curso_id, [])) for sesion_id, curso_id in Sesion.objects.values_list('id', 'curso_id')]
+        return pares, sesiones
+
+    def medir(self, perfil, escritores, operaciones, pares, sesiones):
+        aplicar_perfil(perfil)
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA journal_mode={PERFILES[perfil]['journal_mode']}")
+        # Los hijos abren sus propias conexiones (fork no debe heredar la del padre)
+        connections.close_all()
+        trabajos = [(perfil, operaciones, pares, sesiones, semilla) for semilla in range(escritores)]
+        inicio = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(escritores) as grupo:
+            resultados = grupo.starmap(escritor, trabajos)
+        total = time.perf_counter() - inicio
+        tiempos = sorted(tiempo for parcial, _ in resultados for tiempo in parcial)
+        errores = sum(errores for _, errores in resultados)
+        return len(tiempos) / total, percentil(tiempos, 0.5) * 1000, percentil(tiempos, 0.99) * 1000, errores
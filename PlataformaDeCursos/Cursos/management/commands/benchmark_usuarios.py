@@ -0,0 +1,112 @@
+# Mide registros y logins por segundo (y consultas por operacion) con las senales originales de
+# User (crear el Perfil y guardarlo en cada save, incluido el last_login de cada login), con la
+# senal actual (solo al crear) y con el alta en lote de usuarios.crear_usuarios.
+#  - python manage.py benchmark_usuarios
+#  - python manage.py benchmark_usuarios --usuarios 2000 --hasher real
+# Por defecto las contraseñas usan un hasher rapido para medir solo la BD; con --hasher real se
+# usa PASSWORD_HASHERS de settings. Usa una base de datos temporal, no modifica db.sqlite3
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import Client
+
+from Cursos import signals
+from Cursos.benchmark import base_de_datos_temporal
+from Cursos.models import Perfil
+from Cursos.usuarios import crear_usuarios, preparar_usuarios
+
+HASHER_RAPIDO = ['django.contrib.auth.hashers.MD5PasswordHasher']
+CONTRASENA = 'contrasena-de-prueba'
+
+
+# Senales como estaban antes en signals.py
+def crear_perfil_original(sender, instance, created, **kwargs):
+    if created:
+        Perfil.objects.create(user=instance)
+
+
+def guardar_perfil_original(sender, instance, **kwargs):
+    instance.perfil.save()
+
+
+SENALES = {
+    'original': [crear_perfil_original, guardar_perfil_original],
+    'actual': [signals.crear_perfil_usuario],
+}
+
+
+def conectar(version):
+    for receptores in SENALES.values():
+        for receptor in receptores:
+            post_save.disconnect(receptor, sender=User)
+    for receptor in SENALES[version]:
+        post_save.connect(receptor, sender=User)
+
+
+class Command(BaseCommand):
+    help = 'Registros y logins por segundo con las senales de User originales, las actuales y el alta en lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=500, help='Usuarios por medicion')
+        parser.add_argument('--hasher', choices=['rapido', 'real'], default='rapido')
+
+    def handle(self, *args, **options):
+        hashers = settings.PASSWORD_HASHERS
+        if options['hasher'] == 'rapido':
+            settings.PASSWORD_HASHERS = HASHER_RAPIDO
+        cantidad = options['usuarios']
+        try:
+            with base_de_datos_temporal(en_archivo=True):
+                self.stdout.write(f"{'senales':<10} {'operacion':<10} | {'por segundo':>12} {'consultas/op':>13}")
+                for version in SENALES:
+                    conectar(version)
+                    self.fila(version, 'registro', cantidad, self.registrar(version, cantidad))
+                    self.fila(version, 'login', cantidad, self.iniciar_sesiones(version, cantidad))
+                self.fila('lote', 'registro', cantidad, self.registrar_en_lote(cantidad))
+        finally:
+            conectar('actual')
+            settings.PASSWORD_HASHERS = hashers
+
+    def fila(self, version, operacion, cantidad, medicion):
+        segundos, consultas = medicion
+        self.stdout.write(f'{version:<10} {operacion:<10} | {cantidad / segundos:>12.0f} {consultas / cantidad:>13.1f}')
+
+    # Cuenta las consultas sin guardarlas (CaptureQueriesContext guarda solo las ultimas 9000)
+    def medir(self, funcion):
+        consultas = 0
+
+        def contar(execute, sql, params, many, context):
+            nonlocal consultas
+            consultas += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            inicio = time.perf_counter()
+            funcion()
+            segundos = time.perf_counter() - inicio
+        return segundos, consultas
+
+    # Como el formulario de registro: un create_user por usuario
+    def registrar(self, version, cantidad):
+        return self.medir(lambda: [
+            User.objects.create_user(f'{version}_{i}', f'{version}_{i}@correo.com', CONTRASENA) for i in range(cantidad)
+        ])
+
+    # Login completo con sesion (authenticate, last_login y la senal de User)
+    def iniciar_sesiones(self, version, cantidad):
+        cliente = Client()
+
+        def iniciar():
+            for i in range(cantidad):
+                cliente.login(username=f'{version}_{i}', password=CONTRASENA)
+        return self.medir(iniciar)
+
+    def registrar_en_lote(self, cantidad):
+        datos = [
+            {'username': f'lote_{i}', 'email': f'lote_{i}@correo.com', 'password': CONTRASENA} for i in range(cantidad)
+        ]
+        return self.medir(lambda: crear_usuarios(preparar_usuarios(datos)))
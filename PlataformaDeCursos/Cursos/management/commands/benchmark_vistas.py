@@ -0,0 +1,139 @@
+# Benchmark de las vistas principales con el cliente de pruebas de Django.
+# Genera los datos con generar_datos en una base temporal y guarda un reporte JSON con
+# consultas, tiempo (mediana y p95) y pico de memoria de cada vista.
+#  - python manage.py benchmark_vistas --salida reporte.json
+#  - python manage.py benchmark_vistas --estudiantes 20000 --salida nuevo.json --comparar reporte.json
+import json
+import platform
+import tracemalloc
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from Cursos.benchmark import base_de_datos_temporal, medir
+from Cursos.generador import ESCALA, generar_datos
+from Cursos.models import Inscripcion, Profesor, Recurso, Sesion
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas, tiempo y memoria de las vistas principales y guarda un reporte JSON'
+
+    def add_arguments(self, parser):
+        for nombre, valor in ESCALA.items():
+            parser.add_argument(f'--{nombre}', type=type(valor), default=valor)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar el reporte')
+        parser.add_argument('--comparar', help='Reporte JSON anterior para comparar')
+
+    def handle(self, *args, **options):
+        escala = {nombre: options[nombre] for nombre in ESCALA}
+        with base_de_datos_temporal():
+            self.stdout.write('Generando datos...')
+            creados = generar_datos(semilla=options['semilla'], **escala)
+            vistas = self.medir_vistas(options['repeticiones'])
+
+        reporte = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'escala': {**escala, 'semilla': options['semilla']},
+            'datos': creados,
+            'vistas': vistas,
+        }
+        self.mostrar(reporte)
+        if options['comparar']:
+            with open(options['comparar']) as archivo:
+                self.comparar(json.load(archivo), reporte)
+        if options['salida']:
+            with open(options['salida'], 'w') as archivo:
+                json.dump(reporte, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['salida']}"))
+
+    # Usuarios y objetos representativos: el profesor con mas inscritos y el estudiante con mas cursos
+    def escenarios(self):
+        profesor = Profesor.objects.annotate(n=Count('curso__inscripcion')).order_by('-n', 'id').first()
+        estudiante = (
+            Inscripcion.objects.values('user_id').annotate(n=Count('id')).order_by('-n', 'user_id').first()
+        )
+        inscripcion = Inscripcion.objects.filter(user_id=estudiante['user_id']).order_by('id').first()
+        recurso = Recurso.objects.filter(curso_id=inscripcion.curso_id).order_by('id').first()
+        sesion = (
+            Sesion.objects.filter(curso__profesor=profesor)
+            .annotate(n=Count('curso__inscripcion')).order_by('-n', 'id').first()
+        )
+        presentes = {
+            f'presente_{ins_id}': 'on'
+            for ins_id in Inscripcion.objects.filter(curso_id=sesion.curso_id).values_list('id', flat=True)[::2]
+        }
+        return [
+            ('lista_cursos (anonimo)', None, 'get', reverse('lista_cursos'), None),
+            ('lista_cursos', inscripcion.user, 'get', reverse('lista_cursos'), None),
+            ('detalle_curso', inscripcion.user, 'get', reverse('detalle_curso', args=[inscripcion.curso_id]), None),
+            ('progreso_estudiante', inscripcion.user, 'get', reverse('progreso_estudiante'), None),
+            ('perfil_usuario', inscripcion.user, 'get', reverse('perfil_usuario'), None),
+            ('ver_recurso', inscripcion.user, 'get', reverse('ver_recurso', args=[recurso.id]), None),
+            ('certificado', inscripcion.user, 'get', reverse('certificado', args=[inscripcion.id]), None),
+            ('dashboard', profesor.user, 'get', reverse('dashboard'), None),
+            ('tomar_asistencia', profesor.user, 'get', reverse('tomar_asistencia', args=[sesion.id]), None),
+            ('tomar_asistencia (POST)', profesor.user, 'post', reverse('tomar_asistencia', args=[sesion.id]), presentes),
+        ]
+
+    def medir_vistas(self, repeticiones):
+        resultados = {}
+        for nombre, usuario, metodo, url, datos in self.escenarios():
+            cliente = Client()
+            if usuario:
+                cliente.force_login(usuario)
+            peticion = getattr(cliente, metodo)
+            # Una peticion de calentamiento (cache, plantillas compiladas)
+            peticion(url, datos or {})
+
+            tiempos, consultas, tamano = [], 0, 0
+            for _ in range(repeticiones):
+                resultado, respuesta = medir(lambda: peticion(url, datos or {}))
+                tiempos.append(resultado['segundos'])
+                consultas = resultado['consultas']
+                tamano = len(respuesta.content)
+            tiempos.sort()
+
+            # La memoria se mide aparte: tracemalloc hace mas lentas las peticiones
+            tracemalloc.start()
+            peticion(url, datos or {})
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            resultados[nombre] = {
+                'consultas': consultas,
+                'mediana_ms': round(tiempos[len(tiempos) // 2] * 1000, 2),
+                'p95_ms': round(tiempos[max(0, int(len(tiempos) * 0.95) - 1)] * 1000, 2),
+                'memoria_pico_kb': round(pico / 1024, 1),
+                'bytes': tamano,
+            }
+        cache.clear()
+        return resultados
+
+    def mostrar(self, reporte):
+        self.stdout.write(f"Datos: {reporte['datos']}")
+        self.stdout.write(f"{'vista':<26} {'consultas':>9} {'mediana ms':>11} {'p95 ms':>9} {'memoria KB':>11}")
+        for nombre, r in reporte['vistas'].items():
+            self.stdout.write(
+                f"{nombre:<26} {r['consultas']:>9} {r['mediana_ms']:>11} {r['p95_ms']:>9} {r['memoria_pico_kb']:>11}"
+            )
+
+    def comparar(self, anterior, actual):
+        if anterior.get('escala') != actual['escala']:
+            self.stdout.write(self.style.WARNING('La escala de los reportes es distinta, la comparacion es orientativa'))
+        self.stdout.write(f"\n{'vista':<26} {'consultas':>15} {'mediana ms':>22}")
+        for nombre, r in actual['vistas'].items():
+            antes = anterior['vistas'].get(nombre)
+            if not antes:
+                continue
+            cambio = (r['mediana_ms'] - antes['mediana_ms']) / antes['mediana_ms'] * 100 if antes['mediana_ms'] else 0
+            self.stdout.write(
+                f"{nombre:<26} {antes['consultas']:>6} -> {r['consultas']:<6} "
+                f"{antes['mediana_ms']:>8} -> {r['mediana_ms']:<8} ({cambio:+.0f}%)"
+            )
@@ -0,0 +1,31 @@
+# Recalcula las recomendaciones de cursos (parecidos por curso y por estudiante, ver
+# Cursos/recomendaciones.py). Pensado para correr cada noche, por ejemplo con cron:
+#  - python manage.py calcular_recomendaciones
+#  - python manage.py calcular_recomendaciones --top 20
+#  - python manage.py calcular_recomendaciones --encolar   --> lo hace trabajar_tareas
+import time
+
+from django.core.management.base import BaseCommand
+
+from Cursos import recomendaciones, tareas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los cursos recomendados por curso y por estudiante'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=recomendaciones.TOP, help='Recomendaciones por curso y por estudiante')
+        parser.add_argument('--lote', type=int, default=recomendaciones.LOTE, help='Tamaño de lote para las escrituras')
+        parser.add_argument('--encolar', action='store_true', help='Encola la tarea en vez de calcular aqui')
+
+    def handle(self, *args, **options):
+        if options['encolar']:
+            tarea = tareas.encolar('calcular_recomendaciones')
+            self.stdout.write(f'Tarea encolada: #{tarea.id}')
+            return
+        inicio = time.perf_counter()
+        resultado = recomendaciones.recalcular(top=options['top'], lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomendaciones: {resultado['cursos']} cursos, {resultado['usuarios']} estudiantes, "
+            f"{resultado['filas']} filas en {time.perf_counter() - inicio:.1f} s"
+        ))
@@ -0,0 +1,20 @@
+# Pasa al almacen por contenido (ver Cursos/almacen.py) los materiales extra y las imagenes de
+# perfil guardados antes con su propio nombre: los archivos iguales quedan en un solo archivo
+# y se actualizan las filas y los enlaces de los Recurso que apuntaban a ellos
+#  - python manage.py deduplicar_archivos
+from django.core.management.base import BaseCommand
+
+from Cursos.almacen import deduplicar
+
+
+class Command(BaseCommand):
+    help = 'Mueve los archivos existentes al almacen por contenido eliminando duplicados'
+
+    def handle(self, *args, **options):
+        resultado = deduplicar()
+        self.stdout.write(
+            f"Archivos migrados: {resultado['archivos']}, duplicados: {resultado['duplicados']}, "
+            f"bytes liberados: {resultado['bytes_liberados']}"
+        )
+        if resultado['faltantes']:
+            self.stdout.write(self.style.WARNING(f"{resultado['faltantes']} archivos no estan en disco"))
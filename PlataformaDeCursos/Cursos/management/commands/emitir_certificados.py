@@ -0,0 +1,37 @@
+# Emite (o actualiza) los certificados de los estudiantes con asistencia suficiente
+#  - python manage.py emitir_certificados                 --> todos los cursos
+#  - python manage.py emitir_certificados --curso 3       --> solo un curso
+#  - python manage.py emitir_certificados --desde-id 1500 --> continua una ejecucion interrumpida
+from django.core.management.base import BaseCommand
+
+from Cursos.certificados import MINIMO_ASISTENCIA, emitir_certificados
+from Cursos.models import Curso
+
+
+class Command(BaseCommand):
+    help = 'Emite en lote los certificados segun el porcentaje de asistencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curso', type=int, nargs='+', help='Ids de los cursos (por defecto todos)')
+        parser.add_argument('--minimo', type=float, default=MINIMO_ASISTENCIA, help='Porcentaje minimo de asistencia')
+        parser.add_argument('--lote', type=int, default=500, help='Inscripciones por transaccion')
+        parser.add_argument('--desde-id', type=int, default=0, help='Continua despues de esta inscripcion')
+
+    def handle(self, *args, **options):
+        cursos = Curso.objects.filter(id__in=options['curso']) if options['curso'] else None
+
+        def mostrar_avance(resultado):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  ... hasta la inscripcion {resultado['ultimo_id']}")
+
+        resultado = emitir_certificados(
+            cursos,
+            minimo=options['minimo'],
+            tamano_lote=options['lote'],
+            desde_id=options['desde_id'],
+            al_terminar_lote=mostrar_avance,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Inscripciones procesadas: {resultado['procesadas']}, certificados emitidos: {resultado['emitidos']}, "
+            f"revocados: {resultado['revocados']} (ultima inscripcion: {resultado['ultimo_id']})"
+        ))
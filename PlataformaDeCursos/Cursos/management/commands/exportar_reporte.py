@@ -0,0 +1,45 @@
+# Exporta la matriz de asistencia (inscripcion x sesion) o de progreso (inscripcion x recurso)
+# de un curso en CSV o XLSX, escribiendo fila por fila (ver Cursos/reportes.py)
+#  - python manage.py exportar_reporte 12 asistencia --salida asistencia.xlsx
+#  - python manage.py exportar_reporte 12 progreso --formato csv > progreso.csv
+from django.core.management.base import BaseCommand, CommandError
+
+from Cursos import replicas, reportes
+from Cursos.models import Curso
+
+
+class Command(BaseCommand):
+    help = 'Exporta el reporte de asistencia o de progreso de un curso en CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('curso_id', type=int)
+        parser.add_argument('reporte', choices=reportes.REPORTES)
+        parser.add_argument('--formato', choices=list(reportes.FORMATOS), help='Por defecto segun la extension de --salida, o csv')
+        parser.add_argument('--salida', help='Archivo de destino (por defecto la salida estandar)')
+
+    def handle(self, *args, **options):
+        curso = Curso.objects.filter(id=options['curso_id']).first()
+        if curso is None:
+            raise CommandError(f"No existe el curso {options['curso_id']}")
+        salida = options['salida']
+        formato = options['formato'] or ('xlsx' if salida and salida.lower().endswith('.xlsx') else 'csv')
+        if formato == 'xlsx' and not salida:
+            raise CommandError('El formato xlsx necesita --salida')
+
+        # Lee de la replica si esta al dia
+        contenido, _ = reportes.exportar(curso, options['reporte'], formato, replicas.replica_disponible())
+        if not salida:
+            for bloque in contenido:
+                self.stdout.write(bloque, ending='')
+            return
+        try:
+            if formato == 'xlsx':
+                destino = open(salida, 'wb')
+            else:
+                destino = open(salida, 'w', encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with destino:
+            for bloque in contenido:
+                destino.write(bloque)
+        self.stderr.write(self.style.SUCCESS(f'Reporte guardado en {salida}'))
@@ -0,0 +1,38 @@
+# Fusiona inscripciones, progresos y asistencias repetidos (necesario antes de la migracion 0004,
+# que agrega restricciones unicas; la migracion tambien lo ejecuta)
+#  - python manage.py fusionar_duplicados
+# Se puede correr antes de migrate: usa los modelos de las migraciones ya aplicadas, asi no toca
+# tablas que la BD todavia no tiene (por ejemplo ResumenProgreso, de la migracion 0002).
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from Cursos.duplicados import fusionar_duplicados
+from Cursos.progreso import recalcular_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Fusiona los registros duplicados de Inscripcion, Progreso y Asistencia'
+
+    def handle(self, *args, **options):
+        executor = MigrationExecutor(connection)
+        aplicadas = [migracion for migracion in executor.loader.applied_migrations if migracion[0] == 'Cursos']
+        if not aplicadas:
+            raise CommandError('La BD no tiene las tablas de Cursos, ejecute: python manage.py migrate')
+        apps = executor.loader.project_state(aplicadas).apps
+        pendientes = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+        with transaction.atomic():
+            fusionados = fusionar_duplicados(apps)
+            # Los resumenes se recalculan con los modelos actuales: solo si la BD ya esta al dia
+            if any(fusionados.values()) and not pendientes:
+                recalcular_resumenes()
+
+        for modelo, cantidad in fusionados.items():
+            self.stdout.write(f'{modelo}: {cantidad} grupos de duplicados fusionados')
+        if pendientes:
+            self.stdout.write(self.style.SUCCESS(
+                'Listo, ya se puede ejecutar: python manage.py migrate (y despues recalcular_progreso)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Listo'))
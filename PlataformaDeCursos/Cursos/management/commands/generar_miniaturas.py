@@ -0,0 +1,24 @@
+# Genera las miniaturas que falten de las imagenes de perfil (ver Cursos/miniaturas.py)
+#  - python manage.py generar_miniaturas                --> un proceso por CPU
+#  - python manage.py generar_miniaturas --procesos 0   --> en el proceso actual
+from django.core.management.base import BaseCommand
+
+from Cursos.catalogo import invalidar_cursos
+from Cursos.miniaturas import generar_todas
+from Cursos.models import Curso
+
+
+class Command(BaseCommand):
+    help = 'Genera las miniaturas de las imagenes de perfil'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=None)
+
+    def handle(self, *args, **options):
+        resultado = generar_todas(procesos=options['procesos'])
+        if resultado['generadas']:
+            invalidar_cursos(Curso.objects.values_list('id', flat=True))
+        self.stdout.write(
+            f"Imagenes: {resultado['imagenes']}, miniaturas generadas: {resultado['generadas']}, "
+            f"con error: {resultado['errores']}"
+        )
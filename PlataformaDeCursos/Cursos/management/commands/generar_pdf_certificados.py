@@ -0,0 +1,35 @@
+# Genera los archivos PDF de los certificados emitidos (ver emitir_certificados)
+#  - python manage.py generar_pdf_certificados                --> un proceso por CPU
+#  - python manage.py generar_pdf_certificados --procesos 4 --curso 3
+#  - python manage.py generar_pdf_certificados --forzar       --> regenera aunque no haya cambios
+from django.core.management.base import BaseCommand
+
+from Cursos.certificados import generar_archivos
+from Cursos.models import Certificado
+
+
+class Command(BaseCommand):
+    help = 'Genera en paralelo los PDF de los certificados en MEDIA_ROOT/cetificados/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curso', type=int, nargs='+', help='Ids de los cursos (por defecto todos)')
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (0 = sin pool)')
+        parser.add_argument('--lote', type=int, default=200, help='Certificados leidos por consulta')
+        parser.add_argument('--forzar', action='store_true', help='Regenera aunque los datos no cambiaron')
+
+    def handle(self, *args, **options):
+        certificados = Certificado.objects.all()
+        if options['curso']:
+            certificados = certificados.filter(inscripcion__curso_id__in=options['curso'])
+
+        resultado = generar_archivos(
+            certificados,
+            procesos=options['procesos'],
+            tamano_lote=options['lote'],
+            forzar=options['forzar'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generados: {resultado['generados']}, sin cambios: {resultado['omitidos']}, "
+            f"{resultado['bytes'] / 1024:.1f} KB en {resultado['segundos']} s "
+            f"({resultado['por_segundo']} certificados/s)"
+        ))
@@ -0,0 +1,38 @@
+# Importa profesores, estudiantes, cursos, sesiones, recursos o inscripciones desde CSV o JSON
+# Lines en lotes, con memoria constante (ver las columnas en Cursos/importador.py)
+#  - python manage.py importar_datos profesores datos/profesores.csv
+#  - python manage.py importar_datos inscripciones datos/inscripciones.jsonl --lote 10000
+# Importar en orden: profesores, cursos, sesiones/recursos, estudiantes/inscripciones.
+# Repetir un archivo omite las filas que ya existen.
+from django.core.management.base import BaseCommand, CommandError
+
+from Cursos.importador import LOTE, TIPOS, formato_de, importar
+
+
+class Command(BaseCommand):
+    help = 'Importa datos desde CSV o JSON Lines con inserciones en lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=TIPOS)
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Por defecto segun la extension')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas por lote (y por transaccion)')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_de(options['archivo'])
+        try:
+            archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with archivo:
+            resultado = importar(options['tipo'], archivo, formato, options['lote'], al_avanzar=self.avance)
+
+        for linea, mensaje in resultado['detalle_errores']:
+            self.stdout.write(self.style.WARNING(f'Linea {linea}: {mensaje}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas: {resultado['filas']}, creados: {resultado['creados']}, ya existian: {resultado['existentes']}, "
+            f"errores: {resultado['errores']} en {resultado['segundos']:.1f} s ({resultado['filas_por_segundo']} filas/s)"
+        ))
+
+    def avance(self, resultado):
+        self.stderr.write(f"  {resultado['filas']} filas ({resultado['filas_por_segundo']} filas/s)", ending='\r')
@@ -0,0 +1,25 @@
+# Recuenta las referencias de los archivos del almacen por contenido (ver Cursos/almacen.py),
+# borra los que ya no usa ninguna fila y los archivos sueltos que quedaron sin registrar
+#  - python manage.py limpiar_almacen             --> corrige y borra
+#  - python manage.py limpiar_almacen --simular   --> solo informa
+from django.core.management.base import BaseCommand
+
+from Cursos.almacen import recolectar
+
+
+class Command(BaseCommand):
+    help = 'Corrige las referencias del almacen de archivos y borra los huerfanos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='No modifica nada, solo cuenta')
+        parser.add_argument('--minutos', type=int, default=60,
+                            help='Los archivos sin registrar mas nuevos que esto no se tocan (subidas en curso)')
+
+    def handle(self, *args, **options):
+        resultado = recolectar(simular=options['simular'], minutos=options['minutos'])
+        self.stdout.write(
+            f"Contadores corregidos: {resultado['corregidos']}, sin uso borrados: {resultado['borrados']}, "
+            f"huerfanos: {resultado['huerfanos']}, bytes liberados: {resultado['bytes_liberados']}"
+        )
+        if resultado['faltantes']:
+            self.stdout.write(self.style.WARNING(f"{resultado['faltantes']} archivos registrados no estan en disco"))
@@ -0,0 +1,27 @@
+# Cancela las subidas por partes sin actividad: dejan de contar para MATERIAL_CUOTA_POR_CURSO y
+# se borran sus archivos parciales de SUBIDAS_ROOT. Pensado para cron, por ejemplo cada hora:
+#  - python manage.py limpiar_subidas
+#  - python manage.py limpiar_subidas --horas 12
+#  - python manage.py limpiar_subidas --encolar   --> lo hace trabajar_tareas
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Cursos import subidas, tareas
+
+
+class Command(BaseCommand):
+    help = 'Cancela las subidas por partes abiertas sin actividad y borra sus archivos parciales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=24, help='Horas sin actividad para considerarla abandonada')
+        parser.add_argument('--encolar', action='store_true', help='Encola la tarea en vez de limpiar aqui')
+
+    def handle(self, *args, **options):
+        if options['encolar']:
+            # Una por hora: si cron la encola dos veces en la misma hora queda una sola
+            clave = f"limpiar_subidas:{timezone.now():%Y-%m-%dT%H}"
+            tarea = tareas.encolar('limpiar_subidas', {'horas': options['horas']}, clave=clave)
+            self.stdout.write(f'Tarea encolada: #{tarea.id}')
+            return
+        canceladas = subidas.limpiar_abandonadas(options['horas'])
+        self.stdout.write(self.style.SUCCESS(f'Subidas canceladas: {canceladas}'))
@@ -0,0 +1,34 @@
+# Reconstruye desde cero los contadores de ResumenProgreso y verifica que coincidan
+#  - python manage.py recalcular_progreso               --> reconstruye y verifica
+#  - python manage.py recalcular_progreso --solo-verificar   --> solo reporta diferencias
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Cursos.models import Inscripcion
+from Cursos.progreso import recalcular_resumenes, verificar_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye y verifica los contadores de progreso de cada inscripcion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curso', type=int, help='Solo las inscripciones de este curso (id)')
+        parser.add_argument('--solo-verificar', action='store_true', help='No modifica nada, solo compara')
+        parser.add_argument('--lote', type=int, default=1000, help='Tamaño de lote para las escrituras')
+
+    def handle(self, *args, **options):
+        inscripciones = Inscripcion.objects.all()
+        if options['curso']:
+            inscripciones = inscripciones.filter(curso_id=options['curso'])
+
+        if not options['solo_verificar']:
+            with transaction.atomic():
+                total = recalcular_resumenes(inscripciones, tamano_lote=options['lote'])
+            self.stdout.write(f'Resumenes recalculados: {total}')
+
+        diferencias = verificar_resumenes(inscripciones)
+        for ins_id, campo, guardado, esperado in diferencias[:50]:
+            self.stdout.write(f'Inscripcion {ins_id}: {campo} = {guardado}, se esperaba {esperado}')
+        if diferencias:
+            raise CommandError(f'{len(diferencias)} contadores no coinciden')
+        self.stdout.write(self.style.SUCCESS('Todos los contadores coinciden'))
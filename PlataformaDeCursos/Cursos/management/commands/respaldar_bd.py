@@ -0,0 +1,39 @@
+# Respalda la BD en una carpeta nueva de RESPALDOS_ROOT: instantanea consistente con la API de
+# respaldo de SQLite y una tabla por archivo JSON Lines + gzip. Las tablas que no cambiaron desde
+# el respaldo anterior se enlazan en vez de copiarse (ver Cursos/respaldo.py)
+#  - python manage.py respaldar_bd
+#  - python manage.py respaldar_bd --conservar 7          --> borra los respaldos mas viejos
+#  - python manage.py respaldar_bd --excluir Cursos_tarea --> (reemplaza a RESPALDOS_EXCLUIR)
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Cursos import respaldo
+
+
+class Command(BaseCommand):
+    help = 'Respalda la BD en JSON Lines comprimido, tabla por tabla y de forma incremental'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carpeta', help='Carpeta de los respaldos (por defecto RESPALDOS_ROOT)')
+        parser.add_argument('--excluir', nargs='*', help='Tablas que no se respaldan (por defecto RESPALDOS_EXCLUIR)')
+        parser.add_argument('--conservar', type=int, default=0, help='Respaldos a conservar (0: todos)')
+        parser.add_argument('--procesos', type=int, help='Procesos en paralelo (por defecto uno por CPU)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            carpeta, manifiesto = respaldo.respaldar(options['carpeta'], options['excluir'], options['procesos'])
+        except respaldo.RespaldoInvalido as error:
+            raise CommandError(error)
+
+        tablas = manifiesto['tablas']
+        reutilizadas = sum(info['reutilizado'] for info in tablas.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Respaldo en {carpeta}: {len(tablas)} tablas, {sum(info['filas'] for info in tablas.values())} filas, "
+            f"{reutilizadas} sin cambios en {time.perf_counter() - inicio:.1f} s"
+        ))
+        if options['conservar']:
+            borrados = respaldo.podar(options['conservar'], options['carpeta'])
+            if borrados:
+                self.stdout.write(f'Respaldos viejos borrados: {borrados}')
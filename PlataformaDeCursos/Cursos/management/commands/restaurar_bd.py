@@ -0,0 +1,60 @@
+# Restaura un respaldo de respaldar_bd: carga las tablas en paralelo, verifica filas y sha256,
+# recrea indices y triggers y reconstruye el indice de busqueda. La BD actual queda como
+# db.sqlite3.antes-de-restaurar. Detener el sitio y el trabajador de tareas antes de restaurar.
+#  - python manage.py restaurar_bd respaldos/20261018-101500 --verificar   --> solo revisa los archivos
+#  - python manage.py restaurar_bd respaldos/20261018-101500
+#  - python manage.py restaurar_bd respaldos/20261018-101500 --destino copia.sqlite3   --> sin tocar la BD del sitio
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Cursos import respaldo
+
+
+class Command(BaseCommand):
+    help = 'Restaura la BD desde un respaldo de respaldar_bd'
+
+    def add_arguments(self, parser):
+        parser.add_argument('carpeta')
+        parser.add_argument('--verificar', action='store_true', help='Solo verifica filas y sha256 de cada tabla')
+        parser.add_argument('--destino', help='Crea la BD en este archivo en vez de reemplazar la del sitio')
+        parser.add_argument('--procesos', type=int, help='Procesos en paralelo (por defecto uno por CPU)')
+        parser.add_argument('--noinput', action='store_false', dest='interactive', help='No pide confirmacion')
+
+    def handle(self, *args, **options):
+        carpeta = options['carpeta']
+        inicio = time.perf_counter()
+        try:
+            if options['verificar']:
+                errores = respaldo.verificar(carpeta, options['procesos'])
+                for tabla, error in errores.items():
+                    self.stderr.write(self.style.ERROR(f'{tabla}: {error}'))
+                if errores:
+                    raise CommandError(f'{len(errores)} tablas no coinciden con el manifiesto')
+                self.stdout.write(self.style.SUCCESS('El respaldo esta completo.'))
+                return
+
+            if options['destino']:
+                conteos = respaldo.restaurar(carpeta, options['destino'], options['procesos'])
+                self.informar(conteos, options['destino'], inicio)
+                return
+
+            ruta = str(settings.DATABASES['default']['NAME'])
+            if options['interactive'] and input(f'Se reemplazara {ruta}. Escriba "si" para continuar: ') != 'si':
+                raise CommandError('Restauracion cancelada.')
+            nueva = ruta + '.restaurada'
+            if os.path.exists(nueva):
+                os.remove(nueva)
+            conteos = respaldo.restaurar(carpeta, nueva, options['procesos'])
+            respaldo.instalar(nueva)
+            self.informar(conteos, ruta, inicio)
+        except respaldo.RespaldoInvalido as error:
+            raise CommandError(error)
+
+    def informar(self, conteos, ruta, inicio):
+        self.stdout.write(self.style.SUCCESS(
+            f'Restauradas {len(conteos)} tablas ({sum(conteos.values())} filas) en {ruta} '
+            f'en {time.perf_counter() - inicio:.1f} s'
+        ))
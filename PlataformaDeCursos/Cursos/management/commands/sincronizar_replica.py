@@ -0,0 +1,33 @@
+# Copia la BD principal sobre la replica de solo lectura con la API de respaldo de SQLite (ver
+# Cursos/replicas.py). Las lecturas de la replica esperan mientras se copia.
+#  - python manage.py sincronizar_replica            --> una vez
+#  - python manage.py sincronizar_replica --cada 5   --> cada 5 segundos hasta Ctrl+C
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Cursos import replicas, respaldo
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza la replica de solo lectura con la BD principal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cada', type=float, help='Segundos entre sincronizaciones (por defecto solo una)')
+
+    def handle(self, *args, **options):
+        if replicas.alias_replica() is None:
+            raise CommandError('No hay replica configurada (REPLICA_ALIAS en DATABASES).')
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    ruta = replicas.sincronizar()
+                except respaldo.RespaldoInvalido as error:
+                    raise CommandError(error)
+                self.stdout.write(f'Replica {ruta} sincronizada en {time.perf_counter() - inicio:.2f} s')
+                if not options['cada']:
+                    break
+                time.sleep(options['cada'])
+        except KeyboardInterrupt:
+            pass
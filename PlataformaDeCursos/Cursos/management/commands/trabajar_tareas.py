@@ -0,0 +1,33 @@
+# Ejecuta las tareas en segundo plano encoladas por las vistas (tabla Tarea)
+#  - python manage.py trabajar_tareas                 --> 2 hilos, espera tareas nuevas hasta Ctrl+C
+#  - python manage.py trabajar_tareas --hilos 4
+#  - python manage.py trabajar_tareas --una-vez       --> vacia la cola y termina (por ejemplo desde cron)
+# Se pueden correr varios procesos a la vez, cada tarea la ejecuta uno solo.
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from Cursos.models import Tarea
+from Cursos.tareas import trabajar
+
+
+class Command(BaseCommand):
+    help = 'Trabajador de la cola de tareas en segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=2, help='Tareas que se ejecutan a la vez')
+        parser.add_argument('--espera', type=float, default=1.0, help='Segundos entre consultas con la cola vacia')
+        parser.add_argument('--una-vez', action='store_true', help='Termina cuando no quedan tareas disponibles')
+
+    def handle(self, *args, **options):
+        detener = threading.Event()
+        # Con SIGTERM (systemd, docker stop) se terminan las tareas en curso antes de salir
+        signal.signal(signal.SIGTERM, lambda *args: detener.set())
+        if not options['una_vez']:
+            self.stdout.write(f"Trabajando con {options['hilos']} hilos (Ctrl+C para detener)")
+        trabajar(hilos=options['hilos'], espera=options['espera'], una_vez=options['una_vez'], detener=detener)
+
+        pendientes = Tarea.objects.filter(estado=Tarea.PENDIENTE).count()
+        fallidas = Tarea.objects.filter(estado=Tarea.FALLIDA).count()
+        self.stdout.write(self.style.SUCCESS(f'Tareas pendientes: {pendientes}, fallidas: {fallidas}'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sesion',
+            name='curso',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones', to='Cursos.curso'),
+        ),
+        migrations.CreateModel(
+            name='ResumenProgreso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recursos_completados', models.IntegerField(default=0)),
+                ('recursos_totales', models.IntegerField(default=0)),
+                ('sesiones_asistidas', models.IntegerField(default=0)),
+                ('sesiones_totales', models.IntegerField(default=0)),
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='Cursos.inscripcion')),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Indice de texto completo (FTS5) para titulo y descripcion de Curso, solo en SQLite.
+# Los triggers lo mantienen sincronizado con Cursos_curso (incluye bulk_create y update()).
+# OJO: si una migracion futura reconstruye la tabla Cursos_curso (AlterField en SQLite),
+# hay que volver a crear los triggers.
+CREAR_FTS = [
+    """CREATE VIRTUAL TABLE Cursos_curso_fts USING fts5(
+        titulo, descripcion, content='Cursos_curso', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER Cursos_curso_fts_ai AFTER INSERT ON Cursos_curso BEGIN
+        INSERT INTO Cursos_curso_fts(rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+    END""",
+    """CREATE TRIGGER Cursos_curso_fts_ad AFTER DELETE ON Cursos_curso BEGIN
+        INSERT INTO Cursos_curso_fts(Cursos_curso_fts, rowid, titulo, descripcion)
+        VALUES ('delete', old.id, old.titulo, old.descripcion);
+    END""",
+    """CREATE TRIGGER Cursos_curso_fts_au AFTER UPDATE ON Cursos_curso BEGIN
+        INSERT INTO Cursos_curso_fts(Cursos_curso_fts, rowid, titulo, descripcion)
+        VALUES ('delete', old.id, old.titulo, old.descripcion);
+        INSERT INTO Cursos_curso_fts(rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+    END""",
+    "INSERT INTO Cursos_curso_fts(Cursos_curso_fts) VALUES ('rebuild')",
+]
+
+BORRAR_FTS = [
+    'DROP TRIGGER IF EXISTS Cursos_curso_fts_ai',
+    'DROP TRIGGER IF EXISTS Cursos_curso_fts_ad',
+    'DROP TRIGGER IF EXISTS Cursos_curso_fts_au',
+    'DROP TABLE IF EXISTS Cursos_curso_fts',
+]
+
+
+def ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for sentencia in sentencias:
+                schema_editor.execute(sentencia)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0002_resumen_progreso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='curso',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='Cursos_curs_fecha_i_ba51cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profesor',
+            index=models.Index(fields=['especialidad'], name='Cursos_prof_especia_1eec01_idx'),
+        ),
+        migrations.RunPython(ejecutar(CREAR_FTS), ejecutar(BORRAR_FTS)),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Las restricciones unicas fallan si ya hay filas repetidas: se fusionan primero
+def fusionar_duplicados(apps, schema_editor):
+    from Cursos.duplicados import fusionar_duplicados
+    fusionar_duplicados(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0003_catalogo_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_duplicados, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='progreso',
+            index=models.Index(fields=['inscripcion', 'completado'], name='Cursos_prog_inscrip_8ad4b2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='asistencia',
+            constraint=models.UniqueConstraint(fields=('inscripcion', 'sesion'), name='asistencia_unica_por_sesion'),
+        ),
+        migrations.AddConstraint(
+            model_name='inscripcion',
+            constraint=models.UniqueConstraint(fields=('user', 'curso'), name='inscripcion_unica_por_curso'),
+        ),
+        migrations.AddConstraint(
+            model_name='progreso',
+            constraint=models.UniqueConstraint(fields=('inscripcion', 'recurso'), name='progreso_unico_por_recurso'),
+        ),
+    ]
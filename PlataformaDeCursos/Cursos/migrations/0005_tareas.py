@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0004_indices_y_restricciones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=100)),
+                ('parametros', models.JSONField(default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('clave', models.CharField(blank=True, max_length=200, null=True, unique=True)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('max_intentos', models.PositiveIntegerField(default=3)),
+                ('disponible_desde', models.DateTimeField()),
+                ('trabajador', models.CharField(blank=True, max_length=100)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('iniciada', models.DateTimeField(blank=True, null=True)),
+                ('terminada', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'disponible_desde', 'id'], name='Cursos_tare_estado_478cd0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0005_tareas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialextra',
+            name='tamano',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SubidaArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('titulo', models.CharField(max_length=100)),
+                ('descripcion', models.TextField(blank=True)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano', models.BigIntegerField()),
+                ('tamano_fragmento', models.IntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('estado', models.CharField(choices=[('abierta', 'Abierta'), ('completada', 'Completada'), ('cancelada', 'Cancelada')], default='abierta', max_length=20)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Cursos.curso')),
+                ('material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Cursos.materialextra')),
+                ('profesor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Cursos.profesor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FragmentoSubida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.IntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('subida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fragmentos', to='Cursos.subidaarchivo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('subida', 'numero'), name='fragmento_unico_por_subida')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0006_subidas_por_partes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoContenido',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('tamano', models.BigIntegerField()),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0007_almacen_por_contenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recomendacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('puntaje', models.FloatField()),
+                ('curso_origen', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to='Cursos.curso')),
+                ('recomendado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Cursos.curso')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('curso_origen', 'posicion'), name='recomendacion_unica_por_curso'), models.UniqueConstraint(fields=('user', 'posicion'), name='recomendacion_unica_por_usuario'), models.CheckConstraint(condition=models.Q(models.Q(('curso_origen__isnull', False), ('user__isnull', True)), models.Q(('curso_origen__isnull', True), ('user__isnull', False)), _connector='OR'), name='recomendacion_con_un_origen')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cursos', '0008_recomendaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,95 @@
+#  ---- MINIATURAS DE LAS IMAGENES DE PERFIL ----
+# Al cambiar la imagen del perfil (editar_perfil) se encola la tarea 'generar_miniaturas', que el
+# trabajador de tareas ejecuta fuera de la peticion: crea versiones cuadradas, reducidas y
+# recodificadas en WebP en MEDIA_ROOT/miniaturas/ para cada tamaño en que se muestra el perfil
+# (y el doble, para pantallas de alta densidad). El nombre de cada version sale de la imagen
+# original y del tamaño, asi la etiqueta {% avatar %} (templatetags/miniaturas.py) las encuentra
+# sin consultar la BD; mientras no existan usa la imagen original.
+#  - python manage.py generar_miniaturas   --> genera las de todos los perfiles en un pool de procesos
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .almacen import en_almacen
+from .models import Perfil
+
+CARPETA = 'miniaturas'
+# Tamaños (px) en que se muestran los perfiles: tarjeta del catalogo y pagina de perfil
+TAMANOS = (60, 150)
+DENSIDADES = (1, 2)
+FORMATO = 'WEBP'
+EXTENSION = '.webp'
+CALIDAD = 80
+
+
+def lados():
+    return sorted({tamano * densidad for tamano in TAMANOS for densidad in DENSIDADES})
+
+
+def es_personalizada(nombre):
+    return bool(nombre) and nombre != Perfil._meta.get_field('imagen').get_default()
+
+
+def nombre_variante(nombre, lado):
+    # En el almacen por contenido el nombre ya es el sha256 de la imagen
+    if en_almacen(nombre):
+        huella = os.path.splitext(os.path.basename(nombre))[0]
+    else:
+        huella = hashlib.sha256(nombre.encode()).hexdigest()
+    return f'{CARPETA}/{huella}_{lado}{EXTENSION}'
+
+
+def existe(nombre):
+    return os.path.exists(default_storage.path(nombre))
+
+
+# Genera las versiones que faltan de una imagen, devuelve cuantas creo
+def generar(nombre, forzar=False):
+    pendientes = [lado for lado in lados() if forzar or not existe(nombre_variante(nombre, lado))]
+    if not pendientes:
+        return 0
+    with Image.open(default_storage.path(nombre)) as original:
+        # En JPEG decodifica directo a una escala menor, mucho mas rapido en fotos grandes
+        original.draft('RGB', (max(pendientes), max(pendientes)))
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA' if imagen.mode in ('LA', 'P', 'PA') else 'RGB')
+        for lado in pendientes:
+            variante = ImageOps.fit(imagen, (lado, lado), Image.Resampling.LANCZOS)
+            destino = default_storage.path(nombre_variante(nombre, lado))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            # Se escribe aparte y se renombra: la etiqueta nunca ve un archivo a medias
+            temporal = f'{destino}.{os.getpid()}.tmp'
+            variante.save(temporal, FORMATO, quality=CALIDAD)
+            os.replace(temporal, destino)
+    return len(pendientes)
+
+
+def _generar_seguro(nombre):
+    try:
+        return generar(nombre)
+    except (OSError, Image.DecompressionBombError):
+        # Imagen que falta o que Pillow no puede abrir: queda la original
+        return -1
+
+
+# Genera las miniaturas de todos los perfiles con imagen propia. procesos=0 en el proceso
+# actual, None un proceso por CPU. Devuelve {'imagenes', 'generadas', 'errores'}
+def generar_todas(procesos=None):
+    nombres = [
+        nombre for nombre in Perfil.objects.values_list('imagen', flat=True).distinct()
+        if es_personalizada(nombre)
+    ]
+    if procesos == 0:
+        resultados = list(map(_generar_seguro, nombres))
+    else:
+        with ProcessPoolExecutor(procesos) as pool:
+            resultados = list(pool.map(_generar_seguro, nombres, chunksize=10))
+    return {
+        'imagenes': len(nombres),
+        'generadas': sum(r for r in resultados if r > 0),
+        'errores': resultados.count(-1),
+    }
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -5,12 +7,19 @@ from django.contrib.auth.models import User
   #  ---- MODELOS DE LA APLICACION ----
 from django.db import models
 
+
+def calcular_porcentaje(completados, total):
+    return round(completados / total * 100, 2) if total > 0 else 0
+
 class Profesor(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE) #Relacion de usuario para que el maestro tenga una sesion igual al estudiante
     nombre = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     especialidad = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [models.Index(fields=['especialidad'])]
+
     def __str__(self):
         return self.nombre
 
@@ -21,6 +30,10 @@ class Curso(models.Model):
     fecha_fin = models.DateField()
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE)
 
+    class Meta:
+        # Orden del catalogo paginado por cursor (busqueda.py)
+        indexes = [models.Index(fields=['fecha_inicio', 'id'])]
+
     def __str__(self):
         return self.titulo
 
@@ -31,6 +44,12 @@ class Inscripcion(models.Model):
     fecha_inscripcion = models.DateField(auto_now_add=True)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
 
+    class Meta:
+        # Antes de aplicar: python manage.py fusionar_duplicados
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'curso'], name='inscripcion_unica_por_curso'),
+        ]
+
     def __str__(self):
         return f"{self.user.username if self.user else self.nombre_estudiante} - {self.curso.titulo}"
     
@@ -60,6 +79,12 @@ class Progreso(models.Model):
     completado = models.BooleanField(default=False)
     fecha_completado = models.DateField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inscripcion', 'recurso'], name='progreso_unico_por_recurso'),
+        ]
+        indexes = [models.Index(fields=['inscripcion', 'completado'])]
+
     def __str__(self):
         return f"{self.inscripcion.nombre_estudiante} - {self.recurso.titulo}"
 
@@ -71,6 +96,8 @@ class MaterialExtra(models.Model):
     descripcion = models.TextField(blank=True)
     archivo = models.FileField(upload_to='materiales/')
     fecha_subida = models.DateTimeField(auto_now_add=True)
+    # Bytes del archivo, para el limite de espacio por curso (ver subidas.py)
+    tamano = models.BigIntegerField(default=0)
 
     def __str__(self):
         return self.titulo
@@ -97,6 +124,12 @@ class Asistencia(models.Model):
     inscripcion = models.ForeignKey(Inscripcion, on_delete=models.CASCADE)
     sesion = models.ForeignKey(Sesion, on_delete=models.CASCADE)
     presente = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inscripcion', 'sesion'], name='asistencia_unica_por_sesion'),
+        ]
+
     def __str__(self):
         return f"{self.inscripcion.nombre_estudiante} - {self.sesion.titulo}"
     
@@ -106,4 +139,146 @@ class Certificado(models.Model):
     fecha_emision = models.DateField(auto_now_add=True)
     archivo = models.FileField(upload_to='cetificados/', blank=True, null=True)
     def __str__(self):
-        return f"Certificado - {self.inscripcion.nombre_estudiante}"
\ No newline at end of file
+        return f"Certificado - {self.inscripcion.nombre_estudiante}"
+
+# Resumen desnormalizado del progreso de cada inscripcion, se actualiza de forma incremental
+# desde las vistas (ver progreso.py) y se reconstruye con: python manage.py recalcular_progreso
+class ResumenProgreso(models.Model):
+    inscripcion = models.OneToOneField(Inscripcion, on_delete=models.CASCADE, related_name='resumen')
+    recursos_completados = models.IntegerField(default=0)
+    recursos_totales = models.IntegerField(default=0)
+    sesiones_asistidas = models.IntegerField(default=0)
+    sesiones_totales = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Resumen - {self.inscripcion_id}"
+
+    @property
+    def porcentaje_recursos(self):
+        return calcular_porcentaje(self.recursos_completados, self.recursos_totales)
+
+    @property
+    def porcentaje_asistencia(self):
+        return calcular_porcentaje(self.sesiones_asistidas, self.sesiones_totales)
+
+# Archivo guardado una sola vez por su contenido y cuantas filas lo usan (ver almacen.py)
+class ArchivoContenido(models.Model):
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    nombre = models.CharField(max_length=100, unique=True)
+    tamano = models.BigIntegerField()
+    referencias = models.PositiveIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias})"
+
+# Cola de tareas en segundo plano guardada en la BD (ver tareas.py y el comando trabajar_tareas)
+class Tarea(models.Model):
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=100)
+    parametros = models.JSONField(default=dict)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    # Encolar dos veces con la misma clave devuelve la misma tarea
+    clave = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    intentos = models.PositiveIntegerField(default=0)
+    max_intentos = models.PositiveIntegerField(default=3)
+    # Los reintentos esperan hasta esta fecha (backoff exponencial)
+    disponible_desde = models.DateTimeField()
+    trabajador = models.CharField(max_length=100, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    iniciada = models.DateTimeField(null=True, blank=True)
+    # El trabajador lo renueva mientras la ejecuta (ver tareas.SEGUNDOS_LATIDO)
+    latido = models.DateTimeField(null=True, blank=True)
+    terminada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Los trabajadores buscan la siguiente tarea pendiente disponible
+        indexes = [models.Index(fields=['estado', 'disponible_desde', 'id'])]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.id} ({self.estado})"
+
+# Subida por partes de un MaterialExtra (ver subidas.py). Las partes se escriben en su posicion
+# dentro de un archivo parcial; al completarse se crean el MaterialExtra y su Recurso.
+class SubidaArchivo(models.Model):
+    ABIERTA = 'abierta'
+    COMPLETADA = 'completada'
+    CANCELADA = 'cancelada'
+    ESTADOS = [
+        (ABIERTA, 'Abierta'),
+        (COMPLETADA, 'Completada'),
+        (CANCELADA, 'Cancelada'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE)
+    titulo = models.CharField(max_length=100)
+    descripcion = models.TextField(blank=True)
+    nombre_archivo = models.CharField(max_length=255)
+    tamano = models.BigIntegerField()
+    tamano_fragmento = models.IntegerField()
+    # sha256 del archivo completo (opcional), se verifica al ensamblar
+    sha256 = models.CharField(max_length=64, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ABIERTA)
+    material = models.ForeignKey(MaterialExtra, on_delete=models.SET_NULL, null=True, blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    actualizada = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Subida {self.nombre_archivo} ({self.estado})"
+
+    @property
+    def total_fragmentos(self):
+        return -(-self.tamano // self.tamano_fragmento) if self.tamano else 0
+
+
+class FragmentoSubida(models.Model):
+    subida = models.ForeignKey(SubidaArchivo, on_delete=models.CASCADE, related_name='fragmentos')
+    numero = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subida', 'numero'], name='fragmento_unico_por_subida'),
+        ]
+
+    def __str__(self):
+        return f"Fragmento {self.numero} de {self.subida_id}"
+
+# Recomendaciones precalculadas (ver recomendaciones.py): los cursos mas parecidos a un curso
+# (curso_origen) o los recomendados a un estudiante (user), en orden por posicion
+class Recomendacion(models.Model):
+    curso_origen = models.ForeignKey(Curso, on_delete=models.CASCADE, null=True, blank=True, related_name='recomendaciones')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='recomendaciones')
+    recomendado = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='+')
+    posicion = models.PositiveSmallIntegerField()
+    puntaje = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Tambien son los indices con que se leen
+            models.UniqueConstraint(fields=['curso_origen', 'posicion'], name='recomendacion_unica_por_curso'),
+            models.UniqueConstraint(fields=['user', 'posicion'], name='recomendacion_unica_por_usuario'),
+            models.CheckConstraint(
+                condition=models.Q(curso_origen__isnull=False, user__isnull=True)
+                | models.Q(curso_origen__isnull=True, user__isnull=False),
+                name='recomendacion_con_un_origen',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.curso_origen_id or self.user_id} -> {self.recomendado_id} ({self.posicion})"
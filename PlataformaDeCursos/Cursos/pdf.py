@@ -0,0 +1,65 @@
+#  ---- GENERADOR DE PDF EN PYTHON PURO ----
+# Dibuja el certificado (los mismos datos que certificado.html) como un PDF de una pagina con
+# la fuente Helvetica incluida en todos los lectores, sin dependencias externas.
+# No usa Django: las funciones se ejecutan dentro de los procesos del pool.
+import os
+
+VERSION = 1
+
+ANCHO, ALTO = 842, 595  # A4 horizontal, en puntos
+
+
+def _texto_pdf(texto):
+    texto = texto.encode('cp1252', errors='replace').decode('latin-1')
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _linea(texto, tamano, y):
+    # Centrado aproximado: Helvetica mide ~0.5 em por caracter en promedio
+    x = max(40, (ANCHO - len(texto) * tamano * 0.5) / 2)
+    return f'BT /F1 {tamano} Tf {x:.1f} {y} Td ({_texto_pdf(texto)}) Tj ET'
+
+
+# datos: {'estudiante', 'curso', 'porcentaje', 'fecha'}
+def renderizar_certificado(datos):
+    contenido = '\n'.join([
+        '4 w 30 30 782 535 re S',
+        _linea('Certificado del Curso', 32, 450),
+        _linea('Se certifica que', 16, 390),
+        _linea(datos['estudiante'], 26, 350),
+        _linea(f"completo el curso {datos['curso']}", 16, 300),
+        _linea(f"con una asistencia de {datos['porcentaje']:.2f}%", 16, 270),
+        _linea(f"Fecha de emision: {datos['fecha']}", 12, 120),
+    ]).encode('latin-1')
+
+    objetos = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO} {ALTO}] '
+        f'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>'.encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n' % len(contenido) + contenido + b'\nendstream',
+    ]
+
+    salida = bytearray(b'%PDF-1.4\n')
+    posiciones = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += b'%d 0 obj\n' % numero + objeto + b'\nendobj\n'
+    inicio_xref = len(salida)
+    salida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+    for posicion in posiciones:
+        salida += b'%010d 00000 n \n' % posicion
+    salida += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, inicio_xref)
+    return bytes(salida)
+
+
+# Renderiza y escribe el PDF en `ruta` (archivo temporal + rename). Devuelve los bytes escritos
+def escribir_certificado(ruta, datos):
+    documento = renderizar_certificado(datos)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(documento)
+    os.replace(temporal, ruta)
+    return len(documento)
@@ -0,0 +1,278 @@
+#  ---- CALCULO DEL PROGRESO DE LOS ESTUDIANTES ----
+# Calcula recursos totales, completados y porcentaje para cada (curso, inscripcion)
+# con un numero fijo de consultas agrupadas, sin importar cuantos estudiantes haya.
+# Los contadores quedan guardados en ResumenProgreso y las vistas los mantienen al dia.
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F
+
+from .escrituras import escritura
+from .models import Asistencia, Curso, Inscripcion, Progreso, Recurso, ResumenProgreso, Sesion
+
+
+# Cuenta filas agrupadas por una columna: {valor_columna: cantidad}
+def _contar_por(queryset, campo):
+    return dict(queryset.values_list(campo).annotate(n=Count('id')).order_by())
+
+
+# Calcula desde cero los contadores de las inscripciones dadas (queryset) con 4 consultas
+def calcular_contadores(inscripciones):
+    cursos = inscripciones.values('curso_id')
+    recursos = _contar_por(Recurso.objects.filter(curso__in=cursos), 'curso_id')
+    sesiones = _contar_por(Sesion.objects.filter(curso__in=cursos), 'curso_id')
+    completados = _contar_por(
+        Progreso.objects.filter(inscripcion__in=inscripciones.values('id'), completado=True), 'inscripcion_id'
+    )
+    asistidas = _contar_por(
+        Asistencia.objects.filter(inscripcion__in=inscripciones.values('id'), presente=True), 'inscripcion_id'
+    )
+
+    contadores = {}
+    for inscripcion_id, curso_id in inscripciones.values_list('id', 'curso_id').order_by():
+        contadores[inscripcion_id] = {
+            'recursos_completados': completados.get(inscripcion_id, 0),
+            'recursos_totales': recursos.get(curso_id, 0),
+            'sesiones_asistidas': asistidas.get(inscripcion_id, 0),
+            'sesiones_totales': sesiones.get(curso_id, 0),
+        }
+    return contadores
+
+
+# Crea los resumenes que falten para las inscripciones dadas (lista de objetos Inscripcion)
+def asegurar_resumenes(inscripciones):
+    faltantes = [ins.id for ins in inscripciones if not hasattr(ins, 'resumen')]
+    if faltantes:
+        contadores = calcular_contadores(Inscripcion.objects.filter(id__in=faltantes))
+        ResumenProgreso.objects.bulk_create(
+            [ResumenProgreso(inscripcion_id=ins_id, **datos) for ins_id, datos in contadores.items()],
+            ignore_conflicts=True,
+        )
+        resumenes = ResumenProgreso.objects.in_bulk(faltantes, field_name='inscripcion_id')
+        for ins in inscripciones:
+            if ins.id in resumenes:
+                ins.resumen = resumenes[ins.id]
+    return inscripciones
+
+
+# Resumen de una sola inscripcion, creandolo si no existe
+def obtener_resumen(inscripcion):
+    return asegurar_resumenes([inscripcion])[0].resumen
+
+
+# Reconstruye todos los contadores desde cero (o solo los de las inscripciones dadas)
+def recalcular_resumenes(inscripciones=None, tamano_lote=1000):
+    if inscripciones is None:
+        inscripciones = Inscripcion.objects.all()
+    contadores = calcular_contadores(inscripciones)
+
+    existentes = ResumenProgreso.objects.filter(inscripcion__in=inscripciones.values('id'))
+    actualizar = []
+    for resumen in existentes.iterator(chunk_size=tamano_lote):
+        for campo, valor in contadores.pop(resumen.inscripcion_id, {}).items():
+            setattr(resumen, campo, valor)
+        actualizar.append(resumen)
+
+    ResumenProgreso.objects.bulk_update(
+        actualizar,
+        ['recursos_completados', 'recursos_totales', 'sesiones_asistidas', 'sesiones_totales'],
+        batch_size=tamano_lote,
+    )
+    ResumenProgreso.objects.bulk_create(
+        [ResumenProgreso(inscripcion_id=ins_id, **datos) for ins_id, datos in contadores.items()],
+        batch_size=tamano_lote,
+    )
+    return len(actualizar) + len(contadores)
+
+
+# Compara los resumenes guardados con los valores calculados desde cero.
+# Devuelve una lista de (inscripcion_id, campo, guardado, esperado)
+def verificar_resumenes(inscripciones=None):
+    if inscripciones is None:
+        inscripciones = Inscripcion.objects.all()
+    contadores = calcular_contadores(inscripciones)
+    guardados = ResumenProgreso.objects.in_bulk(contadores.keys(), field_name='inscripcion_id')
+
+    diferencias = []
+    for ins_id, esperado in contadores.items():
+        resumen = guardados.get(ins_id)
+        for campo, valor in esperado.items():
+            actual = getattr(resumen, campo) if resumen else None
+            if actual != valor:
+                diferencias.append((ins_id, campo, actual, valor))
+    return diferencias
+
+
+#  ---- ACTUALIZACIONES INCREMENTALES ----
+# Las llaman las vistas que cambian recursos, progreso, sesiones o asistencias
+
+def registrar_recurso_completado(inscripcion):
+    ResumenProgreso.objects.filter(inscripcion=inscripcion).update(
+        recursos_completados=F('recursos_completados') + 1
+    )
+
+
+# Marca el recurso como completado por el estudiante (clic en "completar")
+@escritura
+def completar_recurso(inscripcion, recurso):
+    avance, _ = Progreso.objects.get_or_create(inscripcion=inscripcion, recurso=recurso)
+    if not avance.completado:
+        obtener_resumen(inscripcion)
+        registrar_recurso_completado(inscripcion)
+    avance.completado = True
+    avance.fecha_completado = date.today()
+    avance.save()
+    return avance
+
+
+def registrar_recurso_nuevo(curso):
+    ResumenProgreso.objects.filter(inscripcion__curso=curso).update(
+        recursos_totales=F('recursos_totales') + 1
+    )
+
+
+# Se llama ANTES de borrar los recursos, para descontar los completados que se perderan
+def registrar_recursos_eliminados(curso, recursos):
+    recursos = list(recursos.values_list('id', flat=True))
+    if not recursos:
+        return
+    completados = _contar_por(
+        Progreso.objects.filter(recurso__in=recursos, completado=True), 'inscripcion_id'
+    )
+    for cantidad in set(completados.values()):
+        ids = [ins_id for ins_id, n in completados.items() if n == cantidad]
+        ResumenProgreso.objects.filter(inscripcion_id__in=ids).update(
+            recursos_completados=F('recursos_completados') - cantidad
+        )
+    ResumenProgreso.objects.filter(inscripcion__curso=curso).update(
+        recursos_totales=F('recursos_totales') - len(recursos)
+    )
+
+
+def registrar_sesion_nueva(curso):
+    ResumenProgreso.objects.filter(inscripcion__curso=curso).update(
+        sesiones_totales=F('sesiones_totales') + 1
+    )
+
+
+# Recursos o sesiones agregados en lote (importador): campo = 'recursos_totales' o
+# 'sesiones_totales', por_curso = {curso_id: cantidad}. Un UPDATE por cantidad distinta
+def registrar_agregados(campo, por_curso):
+    for cantidad in set(por_curso.values()):
+        ids = [curso_id for curso_id, n in por_curso.items() if n == cantidad]
+        ResumenProgreso.objects.filter(inscripcion__curso_id__in=ids).update(**{campo: F(campo) + cantidad})
+
+
+# presentes / ausentes: ids de inscripciones cuya asistencia cambio a presente / ausente
+def registrar_asistencias(presentes, ausentes):
+    if presentes:
+        ResumenProgreso.objects.filter(inscripcion_id__in=presentes).update(
+            sesiones_asistidas=F('sesiones_asistidas') + 1
+        )
+    if ausentes:
+        ResumenProgreso.objects.filter(inscripcion_id__in=ausentes).update(
+            sesiones_asistidas=F('sesiones_asistidas') - 1
+        )
+
+
+#  ---- LECTURAS PARA LAS VISTAS ----
+
+def _inscripciones_con_resumen(cursos):
+    return Inscripcion.objects.filter(curso__in=cursos).select_related('user', 'resumen').order_by('id')
+
+
+def _agrupar_por_curso(cursos, inscripciones):
+    estudiantes_por_curso = {curso.id: [] for curso in cursos}
+
+    for inscripcion in inscripciones:
+        resumen = inscripcion.resumen
+        estudiantes_por_curso[inscripcion.curso_id].append({
+            'inscripcion': inscripcion,
+            'progreso': resumen.porcentaje_recursos,
+            'total_recursos': resumen.recursos_totales,
+            'completados': resumen.recursos_completados,
+        })
+
+    return [
+        {'curso': curso, 'estudiantes': estudiantes_por_curso[curso.id]}
+        for curso in cursos
+    ]
+
+
+# Recibe un queryset de cursos y devuelve la lista que usa el panel del profesor:
+# [{'curso': curso, 'estudiantes': [{'inscripcion', 'progreso', 'total_recursos', 'completados'}]}]
+def progreso_por_curso(cursos):
+    cursos = list(cursos)
+    inscripciones = asegurar_resumenes(list(_inscripciones_con_resumen(cursos)))
+    return _agrupar_por_curso(cursos, inscripciones)
+
+
+# Igual que progreso_por_curso pero para todos los cursos de un profesor
+def progreso_por_profesor(profesor):
+    return progreso_por_curso(Curso.objects.filter(profesor=profesor))
+
+
+# Version asincrona de progreso_por_profesor (vistas_async.py)
+async def aprogreso_por_profesor(profesor):
+    cursos = [curso async for curso in Curso.objects.filter(profesor=profesor)]
+    inscripciones = [ins async for ins in _inscripciones_con_resumen(cursos)]
+    # Solo si faltan resumenes hay que crearlos (escritura sincrona en un hilo)
+    if any(not hasattr(ins, 'resumen') for ins in inscripciones):
+        await sync_to_async(asegurar_resumenes)(inscripciones)
+    return _agrupar_por_curso(cursos, inscripciones)
+
+
+def _inscripciones_del_estudiante(usuario):
+    return Inscripcion.objects.filter(user=usuario).select_related('curso', 'resumen').order_by('id')
+
+
+def _recursos_de(inscripciones):
+    return Recurso.objects.filter(curso__in={ins.curso_id for ins in inscripciones}).order_by('id')
+
+
+def _completados_de(inscripciones):
+    return Progreso.objects.filter(
+        inscripcion__in=[ins.id for ins in inscripciones], completado=True
+    ).values_list('inscripcion_id', 'recurso_id')
+
+
+def _armar_progreso(inscripciones, recursos, completados):
+    recursos_por_curso = {ins.curso_id: [] for ins in inscripciones}
+    for recurso in recursos:
+        recursos_por_curso[recurso.curso_id].append(recurso)
+    completados_por_inscripcion = {ins.id: set() for ins in inscripciones}
+    for inscripcion_id, recurso_id in completados:
+        completados_por_inscripcion[inscripcion_id].add(recurso_id)
+
+    # Totales y porcentaje salen de ResumenProgreso; los recursos completados solo se usan
+    # para marcar cada recurso de la lista
+    resultado = []
+    for inscripcion in inscripciones:
+        resumen = inscripcion.resumen
+        resultado.append({
+            'inscripcion': inscripcion,
+            'curso': inscripcion.curso,
+            'recursos': recursos_por_curso[inscripcion.curso_id],
+            'completados_ids': completados_por_inscripcion[inscripcion.id],
+            'total': resumen.recursos_totales,
+            'completados': resumen.recursos_completados,
+            'porcentaje': resumen.porcentaje_recursos,
+        })
+    return resultado
+
+
+# Progreso de un estudiante en todos sus cursos con 3 consultas (inscripciones con su resumen,
+# recursos y recursos completados), sin importar en cuantos cursos este inscrito:
+# [{'inscripcion', 'curso', 'recursos', 'completados_ids', 'total', 'completados', 'porcentaje'}]
+def progreso_del_estudiante(usuario):
+    inscripciones = asegurar_resumenes(list(_inscripciones_del_estudiante(usuario)))
+    return _armar_progreso(inscripciones, _recursos_de(inscripciones), _completados_de(inscripciones))
+
+
+async def aprogreso_del_estudiante(usuario):
+    inscripciones = [ins async for ins in _inscripciones_del_estudiante(usuario)]
+    if any(not hasattr(ins, 'resumen') for ins in inscripciones):
+        await sync_to_async(asegurar_resumenes)(inscripciones)
+    recursos = [recurso async for recurso in _recursos_de(inscripciones)]
+    completados = [fila async for fila in _completados_de(inscripciones)]
+    return _armar_progreso(inscripciones, recursos, completados)
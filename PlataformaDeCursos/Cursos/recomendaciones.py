@@ -0,0 +1,221 @@
+#  ---- RECOMENDACIONES DE CURSOS ----
+# Se calculan de noche (python manage.py calcular_recomendaciones, o la tarea del mismo nombre)
+# y se guardan en Recomendacion: los TOP cursos mas parecidos a cada curso y los TOP mas
+# recomendados para cada estudiante. Las vistas solo leen esas filas ya ordenadas, una consulta
+# por indice con LIMIT, sin importar cuantos cursos o inscripciones haya.
+# Parecido entre dos cursos:
+#  - coinscripcion: coseno entre los estudiantes de cada curso
+#    (inscritos en ambos / raiz(inscritos en a * inscritos en b));
+#  - contenido: coseno entre los vectores TF-IDF del titulo, la descripcion y la especialidad
+#    del profesor.
+# A un estudiante se le suman los parecidos de los cursos en que esta inscrito y la similitud
+# entre sus intereses (Perfil.intereses) y cada curso; no se le recomienda lo que ya cursa.
+# Las matrices son dispersas ({fila: {columna: valor}}) y los productos recorren indices
+# invertidos, asi el costo depende de los pares que comparten algo y no de cursos al cuadrado.
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .models import Curso, Inscripcion, Perfil, Profesor, Recomendacion
+
+TOP = 10
+# Parecidos por curso que se usan para recomendar a los estudiantes
+VECINOS = 50
+PESO_COINSCRIPCION = 0.6
+PESO_CONTENIDO = 0.4
+PESO_INTERESES = 0.5
+# Un termino que aparece en mas de esta fraccion de los cursos no los distingue (con al menos
+# MINIMO_CURSOS cursos, en catalogos chicos se usan todos)
+MAX_FRECUENCIA = 0.5
+MINIMO_CURSOS = 20
+LOTE = 2000
+
+PALABRA = re.compile(r'[a-z0-9]+')
+VACIAS = frozenset(
+    'las los del por para con una uno unos unas que como sus mas pero sin sobre entre este esta estos '
+    'estas desde hasta todo todos cada curso cursos the and for with from'.split()
+)
+
+
+def terminos(texto):
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(letra for letra in texto if not unicodedata.combining(letra))
+    return [palabra for palabra in PALABRA.findall(texto) if len(palabra) > 2 and palabra not in VACIAS]
+
+
+def _normalizar(vector):
+    norma = math.sqrt(sum(valor * valor for valor in vector.values()))
+    return {termino: valor / norma for termino, valor in vector.items()} if norma else {}
+
+
+class Vectorizador:
+    def __init__(self, documentos):
+        total = len(documentos)
+        frecuencia = Counter(termino for lista in documentos.values() for termino in set(lista))
+        limite = MAX_FRECUENCIA * total if total >= MINIMO_CURSOS else total
+        self.idf = {
+            termino: math.log((1 + total) / (1 + veces)) + 1 for termino, veces in frecuencia.items() if veces <= limite
+        }
+
+    # Vector TF-IDF normalizado; los terminos que no estan en el vocabulario de los cursos no cuentan
+    def vector(self, lista):
+        return _normalizar({
+            termino: veces * self.idf[termino] for termino, veces in Counter(lista).items() if termino in self.idf
+        })
+
+
+class _Indice:
+    # Indice invertido {termino: [(curso_id, peso)]}: el producto de un vector con todos los
+    # cursos solo recorre los cursos que comparten algun termino
+    def __init__(self, vectores):
+        self.cursos = defaultdict(list)
+        for curso_id, vector in vectores.items():
+            for termino, peso in vector.items():
+                self.cursos[termino].append((curso_id, peso))
+
+    def productos(self, vector):
+        resultado = defaultdict(float)
+        for termino, peso in vector.items():
+            for curso_id, otro in self.cursos.get(termino, ()):
+                resultado[curso_id] += peso * otro
+        return resultado
+
+
+def _vectores_de_cursos():
+    documentos = {}
+    for curso_id, titulo, descripcion, especialidad in (
+        Curso.objects.values_list('id', 'titulo', 'descripcion', 'profesor__especialidad').iterator(chunk_size=LOTE)
+    ):
+        # El titulo pesa el doble que la descripcion
+        documentos[curso_id] = terminos(titulo) * 2 + terminos(descripcion) + terminos(especialidad)
+    vectorizador = Vectorizador(documentos)
+    return vectorizador, {curso_id: vectorizador.vector(lista) for curso_id, lista in documentos.items()}
+
+
+def _cursos_por_usuario():
+    cursos = defaultdict(list)
+    for user_id, curso_id in (
+        Inscripcion.objects.filter(user__isnull=False).values_list('user_id', 'curso_id').iterator(chunk_size=LOTE)
+    ):
+        cursos[user_id].append(curso_id)
+    return cursos
+
+
+def _coinscripcion(por_usuario):
+    inscritos = Counter()
+    juntos = defaultdict(Counter)
+    for cursos in por_usuario.values():
+        inscritos.update(cursos)
+        for a in cursos:
+            for b in cursos:
+                if a != b:
+                    juntos[a][b] += 1
+    return {
+        a: {b: veces / math.sqrt(inscritos[a] * inscritos[b]) for b, veces in fila.items()}
+        for a, fila in juntos.items()
+    }
+
+
+# {curso_id: [(curso_id, puntaje)]} de mayor a menor, como mucho `cuantos` por curso
+def parecidos(vectores, coinscripcion, cuantos=VECINOS):
+    indice = _Indice(vectores)
+    resultado = {}
+    for curso_id, vector in vectores.items():
+        puntajes = defaultdict(float)
+        for otro, valor in indice.productos(vector).items():
+            puntajes[otro] += PESO_CONTENIDO * valor
+        for otro, valor in coinscripcion.get(curso_id, {}).items():
+            puntajes[otro] += PESO_COINSCRIPCION * valor
+        puntajes.pop(curso_id, None)
+        resultado[curso_id] = heapq.nlargest(
+            cuantos, ((otro, puntaje) for otro, puntaje in puntajes.items() if puntaje > 0), key=lambda par: par[1]
+        )
+    return resultado
+
+
+# {user_id: [(curso_id, puntaje)]} para los estudiantes con inscripciones o intereses
+def para_estudiantes(vecinos, por_usuario, intereses, indice, top=TOP):
+    resultado = {}
+    for user_id in por_usuario.keys() | intereses.keys():
+        inscritos = set(por_usuario.get(user_id, ()))
+        puntajes = defaultdict(float)
+        for curso_id in inscritos:
+            for otro, puntaje in vecinos.get(curso_id, ()):
+                puntajes[otro] += puntaje / len(inscritos)
+        for curso_id, valor in indice.productos(intereses.get(user_id, {})).items():
+            puntajes[curso_id] += PESO_INTERESES * valor
+        mejores = heapq.nlargest(
+            top, ((curso_id, puntaje) for curso_id, puntaje in puntajes.items() if curso_id not in inscritos and puntaje > 0),
+            key=lambda par: par[1],
+        )
+        if mejores:
+            resultado[user_id] = mejores
+    return resultado
+
+
+def calcular(top=TOP):
+    vectorizador, vectores = _vectores_de_cursos()
+    profesores = set(Profesor.objects.values_list('user_id', flat=True))
+    por_usuario = {
+        user_id: cursos for user_id, cursos in _cursos_por_usuario().items() if user_id not in profesores
+    }
+    intereses = {}
+    perfiles = Perfil.objects.exclude(intereses__isnull=True).exclude(intereses='').values_list('user_id', 'intereses')
+    for user_id, texto in perfiles.iterator(chunk_size=LOTE):
+        vector = vectorizador.vector(terminos(texto))
+        if vector and user_id not in profesores:
+            intereses[user_id] = vector
+
+    vecinos = parecidos(vectores, _coinscripcion(por_usuario), max(top, VECINOS))
+    por_curso = {curso_id: lista[:top] for curso_id, lista in vecinos.items() if lista}
+    return por_curso, para_estudiantes(vecinos, por_usuario, intereses, _Indice(vectores), top)
+
+
+# Reemplaza todas las recomendaciones en una transaccion: las vistas ven las anteriores o las nuevas
+def guardar(por_curso, por_usuario, lote=LOTE):
+    filas = [
+        Recomendacion(curso_origen_id=curso_id, recomendado_id=otro, posicion=posicion, puntaje=round(puntaje, 4))
+        for curso_id, lista in por_curso.items() for posicion, (otro, puntaje) in enumerate(lista)
+    ]
+    filas += [
+        Recomendacion(user_id=user_id, recomendado_id=curso_id, posicion=posicion, puntaje=round(puntaje, 4))
+        for user_id, lista in por_usuario.items() for posicion, (curso_id, puntaje) in enumerate(lista)
+    ]
+    with transaction.atomic():
+        Recomendacion.objects.all().delete()
+        Recomendacion.objects.bulk_create(filas, batch_size=lote)
+    return len(filas)
+
+
+def recalcular(top=TOP, lote=LOTE):
+    por_curso, por_usuario = calcular(top)
+    filas = guardar(por_curso, por_usuario, lote)
+    return {'cursos': len(por_curso), 'usuarios': len(por_usuario), 'filas': filas}
+
+
+#  ---- LECTURA (vistas) ----
+
+def similares(curso_id, cuantos=5):
+    return (
+        Recomendacion.objects.filter(curso_origen_id=curso_id).select_related('recomendado')
+        .order_by('posicion')[:cuantos]
+    )
+
+
+def ids_para_usuario(user_id, cuantos=TOP):
+    return (
+        Recomendacion.objects.filter(user_id=user_id).order_by('posicion')
+        .values_list('recomendado_id', flat=True)[:cuantos]
+    )
+
+
+# Tarjetas del catalogo (de lista_cursos) de los cursos recomendados que el usuario aun no cursa
+def tarjetas_recomendadas(ids, tarjetas, inscritos, cuantos=4):
+    html = {tarjeta['id']: tarjeta['html'] for tarjeta in tarjetas}
+    return [
+        {'id': curso_id, 'html': html[curso_id]} for curso_id in ids if curso_id in html and curso_id not in inscritos
+    ][:cuantos]
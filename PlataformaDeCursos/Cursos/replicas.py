@@ -0,0 +1,203 @@
+#  ---- LECTURAS EN LA REPLICA ----
+# La BD replica (REPLICA_ALIAS en DATABASES) es una copia de solo lectura de la principal que
+# `python manage.py sincronizar_replica --cada 5` mantiene al dia con la API de respaldo de SQLite.
+# Las vistas decoradas con @lectura_en_replica (busqueda, panel, progreso) y los reportes leen de
+# ella, asi no compiten con las escrituras de marcar_completado o tomar_asistencia. lista_cursos
+# no: guarda en cache las tarjetas que arma y una copia atrasada quedaria ahi. Se lee de la
+# principal en cambio cuando:
+#  - la replica no existe o su ultima sincronizacion tiene mas de REPLICA_RETRASO_MAXIMO segundos;
+#  - el usuario escribio despues de la ultima sincronizacion (ReplicaMiddleware guarda en una
+#    cookie cuando escribio), para que vea sus propios cambios;
+#  - la peticion ya escribio algo o hay una transaccion abierta en la principal.
+# Todas las escrituras van a la principal.
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import respaldo
+
+COOKIE = 'leer_primaria'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class Estado:
+    def __init__(self, escrito_en=None):
+        # escrito_en: momento de la ultima escritura del usuario (cookie)
+        self.escrito_en = escrito_en
+        self.lectura = False
+        self.escribio = False
+        self._replica = None
+
+    def replica(self):
+        # Se revisa una vez por peticion. Si el usuario escribio despues de que empezo la ultima
+        # sincronizacion, la replica todavia no tiene su cambio
+        if self._replica is None:
+            alias = replica_disponible()
+            if alias and self.escrito_en is not None and (ultima_sincronizacion(ruta_replica(alias)) or 0) <= self.escrito_en:
+                alias = None
+            self._replica = alias or ''
+        return self._replica
+
+
+_estado = ContextVar('estado_replica', default=None)
+
+
+def alias_replica():
+    alias = getattr(settings, 'REPLICA_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def ruta_replica(alias=None):
+    return str(connections[alias or alias_replica()].settings_dict['NAME'])
+
+
+# Momento en que empezo la ultima sincronizacion (se guarda como fecha del archivo), None si no hay replica
+def ultima_sincronizacion(ruta):
+    try:
+        return os.path.getmtime(ruta)
+    except (OSError, ValueError):
+        return None
+
+
+def retraso(alias=None):
+    sincronizada = ultima_sincronizacion(ruta_replica(alias))
+    return None if sincronizada is None else time.time() - sincronizada
+
+
+# Alias de la replica si existe y esta al dia, si no None
+def replica_disponible():
+    alias = alias_replica()
+    if alias is None:
+        return None
+    segundos = retraso(alias)
+    if segundos is None or segundos > settings.REPLICA_RETRASO_MAXIMO:
+        return None
+    return alias
+
+
+# Alias del que se debe leer ahora segun el estado de la peticion (None: la principal)
+def alias_de_lectura():
+    estado = _estado.get()
+    if estado is None or not estado.lectura or estado.escribio:
+        return None
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    return estado.replica() or None
+
+
+def sincronizar(ruta=None):
+    ruta = ruta or ruta_replica()
+    inicio = time.time()
+    respaldo.instantanea(ruta)
+    # La copia tiene al menos todo lo escrito antes de `inicio`
+    os.utime(ruta, (inicio, inicio))
+    return ruta
+
+
+@contextmanager
+def lecturas_en_replica():
+    estado = _estado.get()
+    token = None
+    if estado is None:
+        # Fuera de una peticion (comandos, tareas)
+        estado = Estado()
+        token = _estado.set(estado)
+    anterior, estado.lectura = estado.lectura, True
+    try:
+        yield estado
+    finally:
+        estado.lectura = anterior
+        if token is not None:
+            _estado.reset(token)
+
+
+# Para vistas que solo leen (sincronas o async)
+def lectura_en_replica(vista):
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            with lecturas_en_replica():
+                return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with lecturas_en_replica():
+            return vista(request, *args, **kwargs)
+    return envoltura
+
+
+class EnrutadorReplica:
+    def db_for_read(self, model, **hints):
+        return alias_de_lectura()
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            # Desde aqui la peticion lee de la principal
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, alias_replica()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La replica se llena copiando la principal
+        if db == alias_replica():
+            return False
+        return None
+
+
+# Sincrono con WSGI y async con ASGI (como los middleware de Django): con ASGI no agrega un salto
+# de hilo antes de las vistas async
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado = self._estado_de(request)
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._marcar_escritura(request, estado, response)
+
+    async def __acall__(self, request):
+        estado = self._estado_de(request)
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._marcar_escritura(request, estado, response)
+
+    def _estado_de(self, request):
+        try:
+            return Estado(float(request.COOKIES[COOKIE]))
+        except (KeyError, ValueError):
+            return Estado()
+
+    def _marcar_escritura(self, request, estado, response):
+        if estado.escribio or request.method not in METODOS_SEGUROS:
+            # Pasado REPLICA_RETRASO_MAXIMO la replica ya se sincronizo o se lee de default igual
+            response.set_cookie(
+                COOKIE, f'{time.time():.3f}', max_age=settings.REPLICA_RETRASO_MAXIMO, httponly=True, samesite='Lax'
+            )
+        return response
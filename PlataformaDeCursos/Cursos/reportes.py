@@ -0,0 +1,211 @@
+#  ---- REPORTES DE ASISTENCIA Y PROGRESO ----
+# Matrices por curso para hojas de calculo: una fila por inscripcion y una columna por sesion
+# (asistencia) o por recurso (progreso). Las filas se arman mientras se envian: las inscripciones
+# y las marcas (Asistencia / Progreso) se leen con iterator() ordenadas por inscripcion y se
+# cruzan en un solo recorrido, asi la memoria depende del numero de columnas y no del tamaño del
+# curso. Se exportan en CSV o XLSX; el XLSX se escribe a mano (un zip con XML) fila por fila,
+# sin cargar la hoja completa. Cada parte que entregan como_csv y como_xlsx es un bloque de
+# FILAS_POR_BLOQUE filas; con ASGI la vista las pide de a una con flujos.contenido.
+#  - GET /curso/<id>/reporte/asistencia.xlsx   (profesor del curso o staff)
+#  - python manage.py exportar_reporte <curso_id> progreso --formato csv --salida progreso.csv
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from .models import Asistencia, Inscripcion, Progreso, Recurso, Sesion
+
+LOTE = 2000
+FILAS_POR_BLOQUE = 500
+
+REPORTES = ('asistencia', 'progreso')
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _inscripciones(curso, base):
+    return (
+        Inscripcion.objects.using(base).filter(curso=curso).order_by('id')
+        .values_list('id', 'nombre_estudiante', 'user__username', 'email_estudiante')
+        .iterator(chunk_size=LOTE)
+    )
+
+
+# Cruza las inscripciones con las marcas (inscripcion_id, columna_id, valor), ambas ordenadas por
+# inscripcion. Las celdas sin marca quedan con `vacio`.
+def _matriz(curso, base, columnas, marcas, vacio, contar):
+    posicion = {columna_id: indice for indice, columna_id in enumerate(columnas)}
+    marcas = iter(marcas)
+    marca = next(marcas, None)
+    for inscripcion_id, nombre, usuario, email in _inscripciones(curso, base):
+        celdas = [vacio] * len(columnas)
+        while marca is not None and marca[0] < inscripcion_id:
+            marca = next(marcas, None)
+        while marca is not None and marca[0] == inscripcion_id:
+            if marca[1] in posicion:
+                celdas[posicion[marca[1]]] = marca[2]
+            marca = next(marcas, None)
+        total = sum(1 for celda in celdas if celda == contar)
+        porcentaje = round(total * 100 / len(columnas), 1) if columnas else 0
+        yield [nombre, usuario or '', email, *celdas, total, porcentaje]
+
+
+# Asistencia: 1 presente, 0 ausente, vacio si no se tomo lista a ese estudiante.
+# base: alias de la BD de la que se lee (None: la que elija el enrutador)
+def asistencia(curso, base=None):
+    sesiones = list(Sesion.objects.using(base).filter(curso=curso).order_by('fecha', 'id').values_list('id', 'titulo', 'fecha'))
+    encabezado = ['Estudiante', 'Usuario', 'Email']
+    encabezado += [f'{titulo} ({fecha:%d/%m/%Y})' for _, titulo, fecha in sesiones]
+    encabezado += ['Asistidas', 'Porcentaje']
+    marcas = (
+        (inscripcion_id, sesion_id, int(presente))
+        for inscripcion_id, sesion_id, presente in Asistencia.objects.using(base).filter(sesion__curso=curso)
+        .order_by('inscripcion_id').values_list('inscripcion_id', 'sesion_id', 'presente')
+        .iterator(chunk_size=LOTE)
+    )
+    yield encabezado
+    yield from _matriz(curso, base, [sesion[0] for sesion in sesiones], marcas, '', 1)
+
+
+# Progreso: 1 completado, 0 pendiente
+def progreso(curso, base=None):
+    recursos = list(Recurso.objects.using(base).filter(curso=curso).order_by('id').values_list('id', 'titulo'))
+    encabezado = ['Estudiante', 'Usuario', 'Email', *(titulo for _, titulo in recursos), 'Completados', 'Porcentaje']
+    marcas = (
+        (inscripcion_id, recurso_id, 1)
+        for inscripcion_id, recurso_id in Progreso.objects.using(base).filter(recurso__curso=curso, completado=True)
+        .order_by('inscripcion_id').values_list('inscripcion_id', 'recurso_id')
+        .iterator(chunk_size=LOTE)
+    )
+    yield encabezado
+    yield from _matriz(curso, base, [recurso[0] for recurso in recursos], marcas, 0, 1)
+
+
+#  ---- FORMATOS ----
+
+class _Eco:
+    # csv.writer escribe aqui y writerow() devuelve la linea
+    def write(self, texto):
+        return texto
+
+
+def _celda_csv(valor):
+    # Un texto que empieza con = + - @ lo interpreta como formula la hoja de calculo
+    if isinstance(valor, str) and valor[:1] in ('=', '+', '-', '@'):
+        return "'" + valor
+    return valor
+
+
+def como_csv(filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca el UTF-8
+    bloque = ['\ufeff']
+    for fila in filas:
+        bloque.append(escritor.writerow([_celda_csv(valor) for valor in fila]))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    yield ''.join(bloque)
+
+
+class _Salida:
+    # Archivo sin seek para zipfile: guarda lo escrito hasta que el generador lo entrega
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+XLSX_FIJOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+XLSX_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_HOJA_FIN = '</sheetData></worksheet>'
+# Caracteres de control que XML no admite
+NO_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _celda_xlsx(valor):
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    if valor == '' or valor is None:
+        return '<c/>'
+    # Texto en linea: sin tabla de textos compartidos que habria que tener entera en memoria
+    texto = escape(NO_XML.sub('', str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def como_xlsx(filas, hoja='Reporte'):
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in XLSX_FIJOS.items():
+            libro.writestr(nombre, contenido)
+        libro.writestr('xl/workbook.xml', XLSX_LIBRO.format(hoja=escape(hoja[:31], {'"': '&quot;'})))
+        with libro.open('xl/worksheets/sheet1.xml', 'w') as destino:
+            destino.write(XLSX_HOJA_INICIO.encode())
+            for numero, fila in enumerate(filas, 1):
+                destino.write(('<row>%s</row>' % ''.join(map(_celda_xlsx, fila))).encode())
+                if numero % FILAS_POR_BLOQUE == 0 and salida.partes:
+                    yield salida.vaciar()
+            destino.write(XLSX_HOJA_FIN.encode())
+    yield salida.vaciar()
+
+
+# Devuelve (generador con el contenido, content type)
+def exportar(curso, reporte, formato, base=None):
+    filas = asistencia(curso, base) if reporte == 'asistencia' else progreso(curso, base)
+    if formato == 'xlsx':
+        return como_xlsx(filas, hoja=reporte.capitalize()), FORMATOS[formato]
+    return como_csv(filas), FORMATOS[formato]
+
+
+def nombre_archivo(curso, reporte, formato):
+    return f'{reporte}_curso_{curso.id}.{formato}'
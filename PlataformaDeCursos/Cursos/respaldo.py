@@ -0,0 +1,320 @@
+#  ---- RESPALDO Y RESTAURACION DE LA BD ----
+# respaldar() copia la BD con la API de respaldo en linea de SQLite (una instantanea consistente
+# sin detener el sitio) y desde esa copia escribe cada tabla como JSON Lines comprimido con gzip,
+# en una carpeta nueva dentro de RESPALDOS_ROOT. El manifiesto guarda el esquema y, por tabla, las
+# columnas, el numero de filas y el sha256 del contenido: si una tabla no cambio desde el respaldo
+# anterior su archivo se enlaza (hard link) en vez de volver a comprimirse. Las sesiones y el log
+# del admin no se respaldan (RESPALDOS_EXCLUIR).
+# restaurar() carga cada tabla en paralelo en una BD temporal propia (verificando filas y sha256),
+# las une en una BD nueva y recien entonces crea indices y triggers y reconstruye el indice de
+# busqueda. Los archivos de MEDIA_ROOT no entran: se copian aparte (ver datos/NOTA.TXT).
+#  - python manage.py respaldar_bd --conservar 7
+#  - python manage.py restaurar_bd respaldos/20261018-101500 --verificar
+import base64
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+MANIFIESTO = 'manifiesto.json'
+VERSION = 1
+LOTE = 5000
+NIVEL_GZIP = 6
+# Paginas copiadas por paso de la API de respaldo: entre pasos otras conexiones pueden escribir
+PAGINAS_POR_PASO = 4096
+
+
+class RespaldoInvalido(ValueError):
+    pass
+
+
+def _json(valor):
+    if isinstance(valor, bytes):
+        return {'$b64': base64.b64encode(valor).decode()}
+    raise TypeError(type(valor))
+
+
+def _desde_json(valor):
+    if isinstance(valor, dict):
+        return base64.b64decode(valor['$b64'])
+    return valor
+
+
+def _lineas(conexion, tabla):
+    for fila in conexion.execute(f'SELECT * FROM "{tabla}" ORDER BY rowid'):
+        yield json.dumps(fila, ensure_ascii=False, separators=(',', ':'), default=_json).encode() + b'\n'
+
+
+def instantanea(ruta):
+    if connection.vendor != 'sqlite':
+        raise RespaldoInvalido('Solo se pueden respaldar bases SQLite.')
+    if connection.in_atomic_block:
+        # Con una escritura pendiente en la misma conexion la copia no avanza nunca
+        raise RespaldoInvalido('No se puede respaldar dentro de una transaccion.')
+    connection.ensure_connection()
+    with closing(sqlite3.connect(ruta)) as destino:
+        connection.connection.backup(destino, pages=PAGINAS_POR_PASO, sleep=0.005)
+
+
+# Devuelve (esquema, tablas con datos). Las tablas internas de SQLite y las que crea FTS5 para su
+# indice no se respaldan: el indice se reconstruye al restaurar.
+def leer_esquema(conexion):
+    objetos = conexion.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    virtuales = [nombre for tipo, nombre, sql in objetos if tipo == 'table' and sql.upper().startswith('CREATE VIRTUAL')]
+    esquema, tablas = [], []
+    for tipo, nombre, sql in objetos:
+        if tipo == 'table' and any(nombre.startswith(virtual + '_') for virtual in virtuales):
+            continue
+        esquema.append({'tipo': tipo, 'nombre': nombre, 'sql': sql})
+        if tipo == 'table' and nombre not in virtuales:
+            tablas.append(nombre)
+    return esquema, tablas
+
+
+def _exportar_tabla(ruta_instantanea, tabla, carpeta, previo):
+    with closing(sqlite3.connect(f'file:{ruta_instantanea}?mode=ro', uri=True)) as conexion:
+        columnas = [columna[1] for columna in conexion.execute(f'PRAGMA table_info("{tabla}")')]
+        # Primero solo la huella: si la tabla no cambio no hace falta comprimirla
+        resumen, filas = hashlib.sha256(), 0
+        for linea in _lineas(conexion, tabla):
+            resumen.update(linea)
+            filas += 1
+        info = {'archivo': f'{tabla}.jsonl.gz', 'columnas': columnas, 'filas': filas, 'sha256': resumen.hexdigest()}
+        destino = os.path.join(carpeta, info['archivo'])
+
+        if previo and previo['sha256'] == info['sha256'] and os.path.exists(previo['ruta']):
+            try:
+                os.link(previo['ruta'], destino)
+            except OSError:
+                shutil.copyfile(previo['ruta'], destino)
+            return tabla, dict(info, reutilizado=True)
+
+        temporal = destino + '.tmp'
+        with open(temporal, 'wb') as archivo, gzip.GzipFile(
+            fileobj=archivo, mode='wb', compresslevel=NIVEL_GZIP, mtime=0
+        ) as comprimido:
+            for linea in _lineas(conexion, tabla):
+                comprimido.write(linea)
+        os.replace(temporal, destino)
+    return tabla, dict(info, reutilizado=False)
+
+
+def _ejecutar(funcion, trabajos, procesos):
+    # procesos=0 en el proceso actual, None un proceso por CPU
+    if procesos == 0:
+        return [funcion(*trabajo) for trabajo in trabajos]
+    with ProcessPoolExecutor(procesos) as pool:
+        return list(pool.map(funcion, *zip(*trabajos))) if trabajos else []
+
+
+def leer_manifiesto(carpeta):
+    try:
+        with open(os.path.join(carpeta, MANIFIESTO), encoding='utf-8') as archivo:
+            manifiesto = json.load(archivo)
+    except (OSError, ValueError) as error:
+        raise RespaldoInvalido(f'{carpeta} no es un respaldo valido: {error}')
+    if manifiesto.get('version') != VERSION:
+        raise RespaldoInvalido(f'Version de respaldo no soportada: {manifiesto.get("version")}')
+    return manifiesto
+
+
+# Carpetas de respaldos completos (con manifiesto), de la mas vieja a la mas nueva
+def respaldos(base=None):
+    base = base or settings.RESPALDOS_ROOT
+    if not os.path.isdir(base):
+        return []
+    return [
+        os.path.join(base, nombre) for nombre in sorted(os.listdir(base))
+        if os.path.isfile(os.path.join(base, nombre, MANIFIESTO))
+    ]
+
+
+def _carpeta_nueva(base):
+    nombre = timezone.now().strftime('%Y%m%d-%H%M%S')
+    for sufijo in range(100):
+        carpeta = os.path.join(base, nombre + (f'-{sufijo}' if sufijo else ''))
+        try:
+            os.makedirs(carpeta)
+            return carpeta
+        except FileExistsError:
+            continue
+    raise RespaldoInvalido('No se pudo crear la carpeta del respaldo.')
+
+
+# Devuelve (carpeta, manifiesto)
+def respaldar(base=None, excluir=None, procesos=None):
+    base = base or settings.RESPALDOS_ROOT
+    excluir = set(settings.RESPALDOS_EXCLUIR if excluir is None else excluir)
+    anteriores = respaldos(base)
+    anterior = anteriores[-1] if anteriores else None
+    previos = {}
+    if anterior:
+        for tabla, info in leer_manifiesto(anterior)['tablas'].items():
+            previos[tabla] = {'sha256': info['sha256'], 'ruta': os.path.join(anterior, info['archivo'])}
+
+    carpeta = _carpeta_nueva(base)
+    ruta_instantanea = os.path.join(carpeta, 'instantanea.sqlite3')
+    try:
+        instantanea(ruta_instantanea)
+        with closing(sqlite3.connect(ruta_instantanea)) as conexion:
+            esquema, tablas = leer_esquema(conexion)
+        trabajos = [
+            (ruta_instantanea, tabla, carpeta, previos.get(tabla)) for tabla in tablas if tabla not in excluir
+        ]
+        resultados = dict(_ejecutar(_exportar_tabla, trabajos, procesos))
+        os.remove(ruta_instantanea)
+        manifiesto = {
+            'version': VERSION,
+            'creado': timezone.now().isoformat(),
+            'anterior': os.path.basename(anterior) if anterior else None,
+            'esquema': esquema,
+            'excluidas': sorted(excluir & set(tablas)),
+            'tablas': resultados,
+        }
+        # El manifiesto se escribe al final: una carpeta sin el es un respaldo a medias
+        temporal = os.path.join(carpeta, MANIFIESTO + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(manifiesto, archivo, indent=1)
+        os.replace(temporal, os.path.join(carpeta, MANIFIESTO))
+    except BaseException:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        raise
+    return carpeta, manifiesto
+
+
+# Borra los respaldos mas viejos y deja los ultimos `conservar`. Los archivos que comparten con
+# los que quedan siguen existiendo por el hard link.
+def podar(conservar, base=None):
+    viejos = respaldos(base)[:-conservar] if conservar > 0 else []
+    for carpeta in viejos:
+        shutil.rmtree(carpeta)
+    return len(viejos)
+
+
+#  ---- RESTAURACION ----
+
+def _leer_tabla(carpeta, info):
+    resumen, filas = hashlib.sha256(), 0
+    try:
+        with gzip.open(os.path.join(carpeta, info['archivo']), 'rb') as archivo:
+            for linea in archivo:
+                resumen.update(linea)
+                filas += 1
+                yield [_desde_json(valor) for valor in json.loads(linea)]
+    except (OSError, EOFError, ValueError) as error:
+        raise RespaldoInvalido(f"{info['archivo']}: {error}")
+    if filas != info['filas'] or resumen.hexdigest() != info['sha256']:
+        raise RespaldoInvalido(f"{info['archivo']}: {filas} filas o sha256 distintos a los del manifiesto")
+
+
+def _verificar_tabla(carpeta, tabla, info):
+    try:
+        for _ in _leer_tabla(carpeta, info):
+            pass
+    except RespaldoInvalido as error:
+        return tabla, str(error)
+    return tabla, None
+
+
+# Devuelve {tabla: error} con las tablas cuyo archivo no coincide con el manifiesto
+def verificar(carpeta, procesos=None):
+    manifiesto = leer_manifiesto(carpeta)
+    trabajos = [(carpeta, tabla, info) for tabla, info in manifiesto['tablas'].items()]
+    return {tabla: error for tabla, error in _ejecutar(_verificar_tabla, trabajos, procesos) if error}
+
+
+# Carga una tabla en su propia BD temporal, asi varias se cargan a la vez
+def _cargar_tabla(carpeta, tabla, info, sql, temporal):
+    with closing(sqlite3.connect(temporal)) as conexion:
+        conexion.execute('PRAGMA journal_mode=OFF')
+        conexion.execute('PRAGMA synchronous=OFF')
+        conexion.execute(sql)
+        insertar = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+            tabla, ', '.join(f'"{columna}"' for columna in info['columnas']), ', '.join('?' * len(info['columnas']))
+        )
+        lote = []
+        for fila in _leer_tabla(carpeta, info):
+            lote.append(fila)
+            if len(lote) >= LOTE:
+                conexion.executemany(insertar, lote)
+                lote = []
+        conexion.executemany(insertar, lote)
+        conexion.commit()
+    return tabla, temporal
+
+
+# Crea en `destino` (que no debe existir) una BD con el contenido del respaldo. Devuelve
+# {tabla: filas}
+def restaurar(carpeta, destino, procesos=None):
+    manifiesto = leer_manifiesto(carpeta)
+    if os.path.exists(destino):
+        raise RespaldoInvalido(f'{destino} ya existe.')
+    tablas_sql = {objeto['nombre']: objeto['sql'] for objeto in manifiesto['esquema'] if objeto['tipo'] == 'table'}
+    temporales = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(destino)), prefix='restaurando-')
+    try:
+        trabajos = [
+            (carpeta, tabla, info, tablas_sql[tabla], os.path.join(temporales, f'{numero}.sqlite3'))
+            for numero, (tabla, info) in enumerate(manifiesto['tablas'].items())
+        ]
+        partes = _ejecutar(_cargar_tabla, trabajos, procesos)
+
+        with closing(sqlite3.connect(destino)) as conexion:
+            conexion.execute('PRAGMA synchronous=OFF')
+            # Primero las tablas y los datos; indices y triggers despues (mas rapido que mantenerlos fila a fila)
+            for objeto in manifiesto['esquema']:
+                if objeto['tipo'] == 'table':
+                    conexion.execute(objeto['sql'])
+            for tabla, temporal in partes:
+                conexion.execute('ATTACH DATABASE ? AS parte', [temporal])
+                conexion.execute(f'INSERT INTO main."{tabla}" SELECT * FROM parte."{tabla}"')
+                conexion.commit()
+                conexion.execute('DETACH DATABASE parte')
+            for objeto in manifiesto['esquema']:
+                if objeto['tipo'] != 'table':
+                    conexion.execute(objeto['sql'])
+            for objeto in manifiesto['esquema']:
+                if objeto['tipo'] == 'table' and 'fts5' in objeto['sql'].lower():
+                    conexion.execute(f'INSERT INTO "{objeto["nombre"]}"("{objeto["nombre"]}") VALUES (\'rebuild\')')
+            conexion.commit()
+
+            conteos = {
+                tabla: conexion.execute(f'SELECT COUNT(*) FROM "{tabla}"').fetchone()[0] for tabla in manifiesto['tablas']
+            }
+            distintos = [tabla for tabla, info in manifiesto['tablas'].items() if conteos[tabla] != info['filas']]
+            if distintos:
+                raise RespaldoInvalido(f'Filas distintas tras restaurar: {", ".join(distintos)}')
+            if conexion.execute('PRAGMA foreign_key_check').fetchone():
+                raise RespaldoInvalido('La BD restaurada tiene claves foraneas rotas.')
+            if conexion.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                raise RespaldoInvalido('La BD restaurada no paso quick_check.')
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+    finally:
+        shutil.rmtree(temporales, ignore_errors=True)
+    return conteos
+
+
+# Reemplaza la BD del sitio por `nueva`, deja la actual como <nombre>.antes-de-restaurar
+def instalar(nueva):
+    ruta = str(settings.DATABASES['default']['NAME'])
+    connection.close()
+    if os.path.exists(ruta):
+        os.replace(ruta, ruta + '.antes-de-restaurar')
+    for extra in ('-wal', '-shm', '-journal'):
+        if os.path.exists(ruta + extra):
+            os.remove(ruta + extra)
+    os.replace(nueva, ruta)
+    return ruta
@@ -1,15 +1,13 @@
-# Crea un Perfil cuando se crea un User.
+# Crea un Perfil cuando se crea un User. Los demas guardados del User (last_login en cada login,
+# cambios de datos) no tocan el Perfil. Las altas en lote (usuarios.crear_usuarios, importador,
+# generador) usan bulk_create, que no dispara senales, y crean los Perfil ellas mismas.
 from django.db.models.signals import post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 from .models import Perfil
 
 @receiver(post_save, sender=User)
-def crear_perfil_usuario(sender, instance, created, **kwargs):
-    if created:
+def crear_perfil_usuario(sender, instance, created, raw=False, **kwargs):
+    # raw: loaddata, el Perfil viene en el mismo fixture
+    if created and not raw:
         Perfil.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def guardar_perfil_usuario(sender, instance, **kwargs):
-    instance.perfil.save()
-
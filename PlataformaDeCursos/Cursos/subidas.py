@@ -0,0 +1,179 @@
+#  ---- SUBIDA POR PARTES DE MATERIAL EXTRA ----
+# Los archivos grandes se suben en fragmentos de SUBIDA_TAMANO_FRAGMENTO bytes, en cualquier
+# orden y desde varias conexiones. Cada fragmento trae su sha256 y se escribe directo en su
+# posicion dentro de un archivo parcial en SUBIDAS_ROOT, leyendo la peticion por bloques (nunca
+# se carga el archivo entero en memoria). Si se corta la conexion, el cliente consulta los
+# fragmentos faltantes y continua. Al completar, el archivo parcial se mueve al almacen de
+# MEDIA_ROOT (ver almacen.py) y recien entonces se crean el MaterialExtra y su Recurso.
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import progreso
+from .models import FragmentoSubida, MaterialExtra, Recurso, SubidaArchivo
+
+BLOQUE = 64 * 1024
+
+
+class SubidaInvalida(ValueError):
+    pass
+
+
+# Archivo ya escrito en disco: el almacenamiento de Django lo mueve en vez de copiarlo
+class ArchivoParcial(File):
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def ruta_parcial(subida):
+    return os.path.join(settings.SUBIDAS_ROOT, f'{subida.token}.parte')
+
+
+# Bytes ocupados en el curso: materiales guardados mas subidas en curso
+def espacio_usado(curso):
+    materiales = MaterialExtra.objects.filter(curso=curso).aggregate(total=Sum('tamano'))['total'] or 0
+    abiertas = SubidaArchivo.objects.filter(curso=curso, estado=SubidaArchivo.ABIERTA).aggregate(
+        total=Sum('tamano')
+    )['total'] or 0
+    return materiales + abiertas
+
+
+def verificar_espacio(curso, tamano):
+    if tamano > settings.MATERIAL_TAMANO_MAXIMO:
+        raise SubidaInvalida(f'El archivo supera el tamaño maximo ({settings.MATERIAL_TAMANO_MAXIMO} bytes).')
+    if espacio_usado(curso) + tamano > settings.MATERIAL_CUOTA_POR_CURSO:
+        raise SubidaInvalida('El curso no tiene espacio suficiente para este archivo.')
+
+
+def crear_subida(curso, profesor, titulo, nombre_archivo, tamano, descripcion='', sha256=''):
+    if tamano <= 0:
+        raise SubidaInvalida('El archivo esta vacio.')
+    with transaction.atomic():
+        verificar_espacio(curso, tamano)
+        subida = SubidaArchivo.objects.create(
+            curso=curso, profesor=profesor, titulo=titulo, descripcion=descripcion,
+            nombre_archivo=os.path.basename(nombre_archivo), tamano=tamano,
+            tamano_fragmento=settings.SUBIDA_TAMANO_FRAGMENTO, sha256=sha256.lower(),
+        )
+    os.makedirs(settings.SUBIDAS_ROOT, exist_ok=True)
+    # Archivo del tamaño final (disperso), cada fragmento se escribe en su posicion
+    with open(ruta_parcial(subida), 'wb') as parcial:
+        parcial.truncate(tamano)
+    return subida
+
+
+def tamano_esperado(subida, numero):
+    return min(subida.tamano_fragmento, subida.tamano - numero * subida.tamano_fragmento)
+
+
+# flujo: objeto con read() (la peticion). Devuelve el sha256 del fragmento.
+def guardar_fragmento(subida, numero, flujo, longitud, sha256):
+    if subida.estado != SubidaArchivo.ABIERTA:
+        raise SubidaInvalida('La subida no esta abierta.')
+    if not 0 <= numero < subida.total_fragmentos:
+        raise SubidaInvalida('Numero de fragmento fuera de rango.')
+    if longitud != tamano_esperado(subida, numero):
+        raise SubidaInvalida(f'El fragmento {numero} debe tener {tamano_esperado(subida, numero)} bytes.')
+
+    resumen = hashlib.sha256()
+    restante = longitud
+    with open(ruta_parcial(subida), 'r+b') as parcial:
+        parcial.seek(numero * subida.tamano_fragmento)
+        while restante:
+            bloque = flujo.read(min(BLOQUE, restante))
+            if not bloque:
+                raise SubidaInvalida('El fragmento llego incompleto.')
+            resumen.update(bloque)
+            parcial.write(bloque)
+            restante -= len(bloque)
+    # Si no coincide, los bytes escritos se sobrescriben cuando el cliente reenvie el fragmento
+    if resumen.hexdigest() != sha256.lower():
+        raise SubidaInvalida(f'El sha256 del fragmento {numero} no coincide.')
+
+    FragmentoSubida.objects.update_or_create(subida=subida, numero=numero, defaults={'sha256': resumen.hexdigest()})
+    SubidaArchivo.objects.filter(id=subida.id).update(actualizada=timezone.now())
+    return resumen.hexdigest()
+
+
+def fragmentos_faltantes(subida):
+    recibidos = set(subida.fragmentos.values_list('numero', flat=True))
+    return [numero for numero in range(subida.total_fragmentos) if numero not in recibidos]
+
+
+def sha256_archivo(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        while bloque := archivo.read(1024 * 1024):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+# Ensambla la subida y crea el MaterialExtra y el Recurso. Devuelve el material.
+def completar_subida(subida):
+    faltantes = fragmentos_faltantes(subida)
+    if faltantes:
+        raise SubidaInvalida(f'Faltan {len(faltantes)} fragmentos.')
+    ruta = ruta_parcial(subida)
+    if subida.sha256 and sha256_archivo(ruta) != subida.sha256:
+        raise SubidaInvalida('El sha256 del archivo completo no coincide.')
+
+    material = MaterialExtra(
+        curso=subida.curso, profesor=subida.profesor, titulo=subida.titulo,
+        descripcion=subida.descripcion, tamano=subida.tamano,
+    )
+    try:
+        with transaction.atomic():
+            # Solo una peticion puede completar la subida
+            if not SubidaArchivo.objects.filter(id=subida.id, estado=SubidaArchivo.ABIERTA).update(
+                estado=SubidaArchivo.COMPLETADA
+            ):
+                raise SubidaInvalida('La subida no esta abierta.')
+            with open(ruta, 'rb') as parcial:
+                material.archivo.save(subida.nombre_archivo, ArchivoParcial(parcial), save=False)
+            # Si el contenido ya estaba en el almacen el parcial no se movio
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            material.save()
+            Recurso.objects.create(
+                titulo=material.titulo,
+                descripcion=material.descripcion,
+                tipo_archivo="Archivo",
+                enlace=material.archivo.url,
+                curso=subida.curso,
+            )
+            progreso.registrar_recurso_nuevo(subida.curso)
+            SubidaArchivo.objects.filter(id=subida.id).update(material=material)
+            subida.fragmentos.all().delete()
+    except SubidaInvalida:
+        raise
+    except Exception:
+        # El archivo parcial ya se movio al almacen: se libera y la subida hay que empezarla de nuevo
+        if material.archivo:
+            material.archivo.delete(save=False)
+        cancelar_subida(subida)
+        raise
+    subida.estado, subida.material = SubidaArchivo.COMPLETADA, material
+    return material
+
+
+def cancelar_subida(subida):
+    SubidaArchivo.objects.filter(id=subida.id).update(estado=SubidaArchivo.CANCELADA)
+    subida.fragmentos.all().delete()
+    if os.path.exists(ruta_parcial(subida)):
+        os.remove(ruta_parcial(subida))
+    subida.estado = SubidaArchivo.CANCELADA
+
+
+# Cancela las subidas abiertas sin actividad en las ultimas `horas` (libera espacio y disco)
+def limpiar_abandonadas(horas=24):
+    limite = timezone.now() - timedelta(hours=horas)
+    abandonadas = list(SubidaArchivo.objects.filter(estado=SubidaArchivo.ABIERTA, actualizada__lt=limite))
+    for subida in abandonadas:
+        cancelar_subida(subida)
+    return len(abandonadas)
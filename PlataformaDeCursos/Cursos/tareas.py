@@ -0,0 +1,299 @@
+#  ---- TAREAS EN SEGUNDO PLANO ----
+# Cola guardada en la tabla Tarea, sin broker externo (funciona con SQLite). Las vistas encolan
+# con encolar() y responden de inmediato; el comando trabajar_tareas ejecuta las tareas con un
+# grupo de hilos. Se pueden correr varios comandos a la vez: cada tarea se toma con un UPDATE
+# condicional, asi un solo trabajador la ejecuta.
+# Si una tarea falla se reintenta con espera exponencial hasta max_intentos. Las tareas deben
+# poder repetirse sin efectos duplicados (las de abajo usan upserts / guardan el estado final).
+# Mientras ejecuta, cada proceso renueva el latido de sus tareas cada SEGUNDOS_LATIDO; una tarea
+# en proceso sin latido por MINUTOS_ABANDONO es de un trabajador caido y liberar_abandonadas la
+# cuenta como un intento fallido: vuelve a la cola o, si ya no le quedan intentos, queda fallida.
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import catalogo, importador, miniaturas, recomendaciones, subidas
+from .asistencia import guardar_asistencias
+from .certificados import emitir_certificados, generar_archivos
+from .escrituras import escritura
+from .models import Certificado, Curso, Inscripcion, Sesion, Tarea
+from .progreso import recalcular_resumenes
+
+logger = logging.getLogger(__name__)
+
+RETRASO_BASE = 10  # segundos antes del primer reintento, se duplica en cada intento
+RETRASO_MAXIMO = 3600
+# Cada cuanto renueva el trabajador el latido de sus tareas (y busca abandonadas de otros)
+SEGUNDOS_LATIDO = 30
+# Una tarea en proceso sin latido por mas tiempo se considera abandonada (el trabajador se cayo)
+MINUTOS_ABANDONO = 5
+
+# Funciones registradas con @tarea: {tipo: (funcion, max_intentos)}
+TAREAS = {}
+
+
+class TareaDesconocida(ValueError):
+    pass
+
+
+def tarea(tipo, max_intentos=3):
+    def registrar(funcion):
+        TAREAS[tipo] = (funcion, max_intentos)
+        return funcion
+    return registrar
+
+
+def retraso(intentos):
+    return min(RETRASO_BASE * 2 ** (intentos - 1), RETRASO_MAXIMO)
+
+
+# Crea la tarea, o devuelve la existente si ya se encolo una con la misma clave
+def encolar(tipo, parametros=None, clave=None, usuario=None):
+    if tipo not in TAREAS:
+        raise TareaDesconocida(tipo)
+    if clave:
+        existente = Tarea.objects.filter(clave=clave).first()
+        if existente:
+            return existente
+    try:
+        with transaction.atomic():
+            return Tarea.objects.create(
+                tipo=tipo,
+                parametros=parametros or {},
+                clave=clave,
+                usuario=usuario,
+                max_intentos=TAREAS[tipo][1],
+                disponible_desde=timezone.now(),
+            )
+    except IntegrityError:
+        # Otra peticion con la misma clave gano la carrera
+        return Tarea.objects.get(clave=clave)
+
+
+# Marca como tomada la siguiente tarea disponible y la devuelve (None si no hay)
+@escritura
+def tomar_siguiente(trabajador):
+    while True:
+        ahora = timezone.now()
+        tarea_id = (
+            Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_desde__lte=ahora)
+            .order_by('disponible_desde', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if tarea_id is None:
+            return None
+        tomada = Tarea.objects.filter(id=tarea_id, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_PROCESO, trabajador=trabajador, iniciada=ahora, latido=ahora, intentos=F('intentos') + 1
+        )
+        # Si otro trabajador la tomo primero se busca la siguiente
+        if tomada:
+            return Tarea.objects.get(id=tarea_id)
+
+
+def ejecutar(tarea):
+    try:
+        if tarea.tipo not in TAREAS:
+            raise TareaDesconocida(tarea.tipo)
+        funcion, _ = TAREAS[tarea.tipo]
+        resultado = funcion(**tarea.parametros)
+    except Exception as error:
+        tarea.error = traceback.format_exc()
+        if tarea.intentos < tarea.max_intentos and not isinstance(error, TareaDesconocida):
+            tarea.estado = Tarea.PENDIENTE
+            tarea.disponible_desde = timezone.now() + timedelta(seconds=retraso(tarea.intentos))
+        else:
+            tarea.estado = Tarea.FALLIDA
+            tarea.terminada = timezone.now()
+        logger.warning('Tarea %s fallo (intento %s de %s): %s', tarea.id, tarea.intentos, tarea.max_intentos, error)
+    else:
+        tarea.estado = Tarea.COMPLETADA
+        tarea.resultado = resultado
+        tarea.error = ''
+        tarea.terminada = timezone.now()
+    _guardar_estado(tarea)
+    return tarea
+
+
+# La tarea sigue siendo de quien la tomo (no se libero y la tomo otro mientras tanto)
+def _tomada_por(tarea):
+    return Tarea.objects.filter(
+        id=tarea.id, estado=Tarea.EN_PROCESO, trabajador=tarea.trabajador, intentos=tarea.intentos
+    )
+
+
+@escritura
+def _guardar_estado(tarea):
+    guardada = _tomada_por(tarea).update(
+        estado=tarea.estado, resultado=tarea.resultado, error=tarea.error,
+        disponible_desde=tarea.disponible_desde, terminada=tarea.terminada,
+    )
+    if not guardada:
+        logger.warning('Tarea %s se libero por abandonada mientras %s la ejecutaba', tarea.id, tarea.trabajador)
+
+
+# Renueva el latido de las tareas en proceso de los hilos del trabajador `prefijo`
+@escritura
+def renovar_latido(prefijo):
+    return Tarea.objects.filter(estado=Tarea.EN_PROCESO, trabajador__startswith=f'{prefijo}:').update(
+        latido=timezone.now()
+    )
+
+
+# Vuelve a poner en cola (o da por fallidas) las tareas de trabajadores que se detuvieron a mitad
+# de camino. tomar_siguiente ya conto el intento, aqui solo se decide si quedan mas
+@escritura
+def liberar_abandonadas(minutos=MINUTOS_ABANDONO):
+    ahora = timezone.now()
+    limite = ahora - timedelta(minutes=minutos)
+    # Las tomadas antes de que existiera el latido solo tienen la fecha en que se iniciaron
+    abandonadas = Tarea.objects.filter(estado=Tarea.EN_PROCESO).filter(
+        Q(latido__lt=limite) | Q(latido__isnull=True, iniciada__lt=limite)
+    )
+    liberadas = 0
+    for tarea in abandonadas:
+        error = f'El trabajador {tarea.trabajador} dejo de responder (intento {tarea.intentos} de {tarea.max_intentos})'
+        if tarea.intentos < tarea.max_intentos:
+            cambios = {'estado': Tarea.PENDIENTE, 'disponible_desde': ahora + timedelta(seconds=retraso(tarea.intentos))}
+        else:
+            cambios = {'estado': Tarea.FALLIDA, 'terminada': ahora}
+        if _tomada_por(tarea).update(error=error, **cambios):
+            logger.warning('Tarea %s abandonada: %s', tarea.id, error)
+            liberadas += 1
+    return liberadas
+
+
+# Ejecuta tareas hasta que no quede ninguna disponible, devuelve cuantas ejecuto
+def procesar_pendientes(trabajador='local'):
+    ejecutadas = 0
+    while (tarea := tomar_siguiente(trabajador)) is not None:
+        ejecutar(tarea)
+        ejecutadas += 1
+    return ejecutadas
+
+
+def _bucle(trabajador, espera, una_vez, detener):
+    try:
+        while not detener.is_set():
+            tarea = tomar_siguiente(trabajador)
+            if tarea is None:
+                if una_vez:
+                    break
+                detener.wait(espera)
+                continue
+            ejecutar(tarea)
+    finally:
+        # Cada hilo tiene su propia conexion a la BD
+        connection.close()
+
+
+# Hasta que terminen los hilos del trabajador: renueva el latido de sus tareas y libera las de
+# otros trabajadores que se cayeron
+def _latir(prefijo, fin):
+    try:
+        while not fin.wait(SEGUNDOS_LATIDO):
+            try:
+                renovar_latido(prefijo)
+                liberar_abandonadas()
+            except Exception:
+                # Un latido perdido no detiene las tareas; el siguiente lo renueva
+                logger.exception('No se pudo renovar el latido de %s', prefijo)
+    finally:
+        connection.close()
+
+
+# Lanza `hilos` trabajadores y espera a que terminen (con una_vez, al vaciar la cola;
+# si no, hasta que se active `detener` o llegue Ctrl+C)
+def trabajar(hilos=2, espera=1.0, una_vez=False, detener=None):
+    detener = detener or threading.Event()
+    liberar_abandonadas()
+    prefijo = f'{socket.gethostname()}:{os.getpid()}'
+    grupo = [
+        threading.Thread(target=_bucle, args=(f'{prefijo}:{i}', espera, una_vez, detener), daemon=True)
+        for i in range(hilos)
+    ]
+    fin = threading.Event()
+    latido = threading.Thread(target=_latir, args=(prefijo, fin), daemon=True)
+    for hilo in grupo + [latido]:
+        hilo.start()
+    try:
+        for hilo in grupo:
+            # join con tiempo de espera para que Ctrl+C llegue al hilo principal
+            while hilo.is_alive():
+                hilo.join(0.5)
+    except KeyboardInterrupt:
+        # Las tareas en curso terminan antes de salir
+        detener.set()
+        for hilo in grupo:
+            hilo.join()
+    finally:
+        fin.set()
+        latido.join()
+
+
+#  ---- TAREAS REGISTRADAS ----
+
+@tarea('guardar_asistencias')
+def tarea_guardar_asistencias(sesion_id, presentes):
+    creadas, actualizadas = guardar_asistencias(Sesion.objects.get(id=sesion_id), set(presentes))
+    return {'creadas': creadas, 'actualizadas': actualizadas}
+
+
+@tarea('emitir_certificados')
+def tarea_emitir_certificados(curso_id=None):
+    cursos = Curso.objects.filter(id=curso_id) if curso_id else None
+    resultado = emitir_certificados(cursos=cursos)
+    certificados = Certificado.objects.all()
+    if curso_id:
+        certificados = certificados.filter(inscripcion__curso_id=curso_id)
+    # Los PDF se generan en el mismo hilo (procesos=0), el trabajador ya corre fuera de la peticion
+    archivos = generar_archivos(certificados, procesos=0)
+    return {
+        'procesadas': resultado['procesadas'], 'emitidos': resultado['emitidos'],
+        'revocados': resultado['revocados'], 'generados': archivos['generados'],
+    }
+
+
+@tarea('recalcular_progreso')
+def tarea_recalcular_progreso(curso_id=None):
+    inscripciones = Inscripcion.objects.all()
+    if curso_id:
+        inscripciones = inscripciones.filter(curso_id=curso_id)
+    recalcular_resumenes(inscripciones)
+    return {'inscripciones': inscripciones.count()}
+
+
+# Recomendaciones de cursos, para correr cada noche (ver recomendaciones.py)
+@tarea('calcular_recomendaciones')
+def tarea_calcular_recomendaciones():
+    return recomendaciones.recalcular()
+
+
+@tarea('limpiar_subidas')
+def tarea_limpiar_subidas(horas=24):
+    return {'canceladas': subidas.limpiar_abandonadas(horas)}
+
+
+@tarea('generar_miniaturas')
+def tarea_generar_miniaturas(nombre):
+    generadas = miniaturas.generar(nombre)
+    # Las tarjetas del catalogo en cache todavia apuntan a la imagen original
+    catalogo.invalidar_cursos(
+        Curso.objects.filter(profesor__user__perfil__imagen=nombre).values_list('id', flat=True)
+    )
+    return {'generadas': generadas}
+
+
+# Importacion de un archivo ya guardado en el servidor (ver importador.py)
+@tarea('importar_datos', max_intentos=1)
+def tarea_importar_datos(tipo, ruta, lote=importador.LOTE):
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        resultado = importador.importar(tipo, archivo, importador.formato_de(ruta), lote)
+    return {**resultado, 'detalle_errores': resultado['detalle_errores'][:20]}
@@ -0,0 +1,32 @@
+# {% avatar perfil 60 alt="Foto" class="tooltip-img" %}: <img> con la miniatura del tamaño pedido,
+# la de doble tamaño en srcset y width/height fijos (ver Cursos/miniaturas.py)
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from Cursos import miniaturas
+
+register = template.Library()
+
+IMAGEN_DEFECTO = 'perfiles/perfil_defecto.png'
+
+
+@register.simple_tag
+def avatar(perfil, tamano, **atributos):
+    nombre = perfil.imagen.name if perfil else ''
+    srcset = ''
+    if not miniaturas.es_personalizada(nombre):
+        src = static(IMAGEN_DEFECTO)
+    elif miniaturas.existe(miniaturas.nombre_variante(nombre, tamano)):
+        src = default_storage.url(miniaturas.nombre_variante(nombre, tamano))
+        doble = miniaturas.nombre_variante(nombre, tamano * 2)
+        if miniaturas.existe(doble):
+            srcset = f'{src} 1x, {default_storage.url(doble)} 2x'
+    else:
+        # Todavia no se generaron: la original, escalada por el navegador
+        src = default_storage.url(nombre)
+    if srcset:
+        atributos['srcset'] = srcset
+    return format_html('<img src="{}" width="{}" height="{}"{}>', src, tamano, tamano, flatatt(atributos))
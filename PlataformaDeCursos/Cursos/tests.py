@@ -1,3 +1,1778 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import warnings
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.template import Context, Template, engines
+from django.db import OperationalError, connection, connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import almacen, catalogo, descargas, escrituras, importador, instrumentacion, miniaturas, progreso, recomendaciones, replicas, reportes, respaldo, tareas
+from .asistencia import guardar_asistencias, inscripciones_con_asistencia
+from .certificados import emitir_certificados, generar_archivos
+from .generador import generar_datos
+from .models import ArchivoContenido, Asistencia, Certificado, Curso, Inscripcion, MaterialExtra, Perfil, Profesor, Progreso, Recomendacion, Recurso, ResumenProgreso, Sesion, SubidaArchivo, Tarea
+from .pdf import renderizar_certificado
+from .progreso import progreso_del_estudiante, progreso_por_profesor, recalcular_resumenes, verificar_resumenes
+from .usuarios import crear_usuarios, preparar_usuarios
+
+
+# Crea un profesor con cursos, recursos y estudiantes para las pruebas
+def crear_datos(cursos=1, estudiantes=1, recursos=2, username='profe'):
+    user = User.objects.create(username=username)
+    profesor = Profesor.objects.create(
+        user=user, nombre='Profesor', email=f'{username}@correo.com', especialidad='Ingles'
+    )
+    for c in range(cursos):
+        curso = Curso.objects.create(
+            titulo=f'Curso {c}', descripcion='Descripcion', profesor=profesor,
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1),
+        )
+        lista_recursos = [
+            Recurso.objects.create(
+                titulo=f'Recurso {r}', descripcion='-', tipo_archivo='Archivo',
+                enlace='http://ejemplo.com', curso=curso,
+            )
+            for r in range(recursos)
+        ]
+        for e in range(estudiantes):
+            estudiante = User.objects.create(username=f'{username}_est_{c}_{e}')
+            inscripcion = Inscripcion.objects.create(
+                user=estudiante, curso=curso,
+                nombre_estudiante=f'Estudiante {e}', email_estudiante='est@correo.com',
+            )
+            # La mitad de los estudiantes completa el primer recurso
+            if e % 2 == 0 and lista_recursos:
+                Progreso.objects.create(inscripcion=inscripcion, recurso=lista_recursos[0], completado=True)
+    return profesor
+
+
+def contar_consultas(funcion):
+    with CaptureQueriesContext(connection) as contexto:
+        funcion()
+    return len(contexto.captured_queries)
+
+
+class ProgresoPorCursoTests(TestCase):
+    def test_calcula_porcentajes(self):
+        profesor = crear_datos(cursos=1, estudiantes=2, recursos=4)
+        resultado = progreso_por_profesor(profesor)
+
+        estudiantes = resultado[0]['estudiantes']
+        self.assertEqual(len(estudiantes), 2)
+        self.assertEqual(estudiantes[0]['total_recursos'], 4)
+        self.assertEqual(estudiantes[0]['completados'], 1)
+        self.assertEqual(estudiantes[0]['progreso'], 25.0)
+        self.assertEqual(estudiantes[1]['completados'], 0)
+        self.assertEqual(estudiantes[1]['progreso'], 0)
+
+    def test_curso_sin_recursos(self):
+        profesor = crear_datos(cursos=1, estudiantes=1, recursos=0)
+        estudiante = progreso_por_profesor(profesor)[0]['estudiantes'][0]
+        self.assertEqual(estudiante['progreso'], 0)
+
+
+class DashboardConsultasTests(TestCase):
+    # El numero de consultas del panel no debe crecer con cursos ni estudiantes
+    def consultas_dashboard(self, username):
+        self.client.force_login(User.objects.get(username=username))
+        return contar_consultas(lambda: self.client.get(reverse('dashboard')))
+
+    def test_consultas_constantes(self):
+        crear_datos(cursos=1, estudiantes=1, username='pequeno')
+        crear_datos(cursos=4, estudiantes=15, username='grande')
+
+        pocas = self.consultas_dashboard('pequeno')
+        muchas = self.consultas_dashboard('grande')
+        self.assertEqual(pocas, muchas)
+
+
+class ProgresoEstudianteTests(TestCase):
+    def setUp(self):
+        self.estudiante = User.objects.create(username='alumno')
+
+    def inscribir(self, cursos, recursos=3):
+        for curso in Curso.objects.filter(profesor=crear_datos(cursos=cursos, estudiantes=0, recursos=recursos,
+                                                              username=f'profe_{Curso.objects.count()}')):
+            inscripcion = Inscripcion.objects.create(
+                user=self.estudiante, curso=curso, nombre_estudiante='Alumno', email_estudiante='a@correo.com'
+            )
+            primero = Recurso.objects.filter(curso=curso).order_by('id').first()
+            Progreso.objects.create(inscripcion=inscripcion, recurso=primero, completado=True)
+
+    def consultas(self, nombre):
+        self.client.force_login(self.estudiante)
+        return contar_consultas(lambda: self.client.get(reverse(nombre)))
+
+    def test_arma_cursos_y_completados(self):
+        self.inscribir(cursos=2)
+        datos = progreso_del_estudiante(self.estudiante)
+        self.assertEqual(len(datos), 2)
+        self.assertEqual(datos[0]['total'], 3)
+        self.assertEqual(datos[0]['completados'], 1)
+        self.assertEqual(datos[0]['porcentaje'], 33.33)
+        self.assertEqual(datos[0]['completados_ids'], {datos[0]['recursos'][0].id})
+
+    def test_totales_salen_del_resumen(self):
+        self.inscribir(cursos=1)
+        progreso_del_estudiante(self.estudiante)
+        ResumenProgreso.objects.filter(inscripcion__user=self.estudiante).update(recursos_completados=2, recursos_totales=4)
+        datos = progreso_del_estudiante(self.estudiante)[0]
+        self.assertEqual((datos['completados'], datos['total'], datos['porcentaje']), (2, 4, 50.0))
+
+    def test_consultas_constantes(self):
+        self.inscribir(cursos=1)
+        pocas = {nombre: self.consultas(nombre) for nombre in ('progreso_estudiante', 'perfil_usuario')}
+        self.inscribir(cursos=6, recursos=5)
+        muchas = {nombre: self.consultas(nombre) for nombre in ('progreso_estudiante', 'perfil_usuario')}
+        self.assertEqual(pocas, muchas)
+
+    def test_perfil_muestra_estado_de_materiales(self):
+        self.inscribir(cursos=1)
+        self.client.force_login(self.estudiante)
+        cursos_info = self.client.get(reverse('perfil_usuario')).context['cursos_info']
+        estados = [material['estado'] for material in cursos_info[0]['materiales']]
+        self.assertEqual(estados, ['completado', 'incompleto', 'incompleto'])
+
+
+class ResumenProgresoTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=3, recursos=2)
+        self.curso = Curso.objects.get(profesor=self.profesor)
+        recalcular_resumenes()
+
+    def test_recalcular_coincide(self):
+        self.assertEqual(verificar_resumenes(), [])
+        resumen = ResumenProgreso.objects.get(inscripcion__nombre_estudiante='Estudiante 0')
+        self.assertEqual(resumen.recursos_completados, 1)
+        self.assertEqual(resumen.recursos_totales, 2)
+        self.assertEqual(resumen.porcentaje_recursos, 50.0)
+
+    def test_actualizaciones_incrementales(self):
+        inscripcion = Inscripcion.objects.filter(curso=self.curso).order_by('id')[1]
+        recurso = Recurso.objects.filter(curso=self.curso).first()
+
+        self.client.force_login(inscripcion.user)
+        self.client.get(reverse('marcar_completado', args=[recurso.id]))
+        self.client.get(reverse('marcar_completado', args=[recurso.id]))
+
+        self.client.force_login(self.profesor.user)
+        self.client.post(reverse('crear_sesion'), {'curso': self.curso.id, 'titulo': 'S1', 'fecha': '2025-02-01'})
+        sesion = Sesion.objects.get(curso=self.curso)
+        self.client.post(reverse('tomar_asistencia', args=[sesion.id]), {f'presente_{inscripcion.id}': 'on'})
+        self.client.post(reverse('tomar_asistencia', args=[sesion.id]), {})
+        self.client.post(reverse('tomar_asistencia', args=[sesion.id]), {f'presente_{inscripcion.id}': 'on'})
+
+        self.assertEqual(verificar_resumenes(), [])
+        resumen = ResumenProgreso.objects.get(inscripcion=inscripcion)
+        self.assertEqual((resumen.recursos_completados, resumen.sesiones_asistidas, resumen.sesiones_totales), (1, 1, 1))
+
+    def test_material_extra(self):
+        self.client.force_login(self.profesor.user)
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            archivo = SimpleUploadedFile('guia.pdf', b'contenido')
+            self.client.post(reverse('subir_material_extra', args=[self.curso.id]),
+                             {'titulo': 'Guia', 'descripcion': '', 'archivo': archivo})
+            self.assertEqual(verificar_resumenes(), [])
+
+            material = MaterialExtra.objects.get(curso=self.curso)
+            self.client.get(reverse('eliminar_material_extra', args=[material.id]))
+        self.assertEqual(verificar_resumenes(), [])
+        self.assertEqual(ResumenProgreso.objects.filter(recursos_totales=2).count(), 3)
+
+
+class TomarAsistenciaTests(TestCase):
+    def crear_sesion(self, estudiantes, username):
+        profesor = crear_datos(cursos=1, estudiantes=estudiantes, recursos=0, username=username)
+        curso = Curso.objects.get(profesor=profesor)
+        return profesor, Sesion.objects.create(curso=curso, titulo='S1', fecha=date(2025, 2, 1))
+
+    def consultas_post(self, estudiantes, username):
+        profesor, sesion = self.crear_sesion(estudiantes, username)
+        ids = Inscripcion.objects.filter(curso=sesion.curso).values_list('id', flat=True)
+        self.client.force_login(profesor.user)
+        url = reverse('tomar_asistencia', args=[sesion.id])
+        return contar_consultas(lambda: self.client.post(url, {f'presente_{i}': 'on' for i in ids}))
+
+    def test_consultas_constantes(self):
+        self.assertEqual(self.consultas_post(2, 'pequeno'), self.consultas_post(40, 'grande'))
+
+    def test_guardar_y_mostrar(self):
+        profesor, sesion = self.crear_sesion(3, 'profe')
+        primera, segunda, tercera = Inscripcion.objects.filter(curso=sesion.curso).order_by('id')
+        self.assertEqual(guardar_asistencias(sesion, {primera.id, segunda.id}), (3, 0))
+        self.assertEqual(guardar_asistencias(sesion, {segunda.id, tercera.id}), (0, 2))
+
+        presentes = {ins.id: ins.presente for ins in inscripciones_con_asistencia(sesion)}
+        self.assertEqual(presentes, {primera.id: False, segunda.id: True, tercera.id: True})
+        self.assertEqual(Asistencia.objects.filter(sesion=sesion).count(), 3)
+
+
+class EmitirCertificadosTests(TestCase):
+    def setUp(self):
+        profesor = crear_datos(cursos=2, estudiantes=3, recursos=0)
+        for curso in Curso.objects.filter(profesor=profesor):
+            sesiones = [Sesion.objects.create(curso=curso, titulo=f'S{i}', fecha=date(2025, 2, i + 1)) for i in range(5)]
+            asistentes = list(Inscripcion.objects.filter(curso=curso).order_by('id'))[:2]
+            # El primero asiste a todo (100%), el segundo a 4 de 5 (80%), el tercero a ninguna
+            for n, sesion in enumerate(sesiones):
+                guardar_asistencias(sesion, {asistentes[0].id} | ({asistentes[1].id} if n < 4 else set()))
+
+    def test_emision_idempotente(self):
+        resultado = emitir_certificados()
+        self.assertEqual((resultado['procesadas'], resultado['emitidos']), (6, 4))
+        self.assertEqual(emitir_certificados()['emitidos'], 4)
+        self.assertEqual(Certificado.objects.count(), 4)
+        self.assertEqual(sorted(Certificado.objects.values_list('porcentaje_asistencia', flat=True)), [80, 80, 100, 100])
+
+    def test_revoca_los_que_dejan_de_cumplir(self):
+        emitir_certificados()
+        # Una sesion mas: el de 4 de 5 queda en 4 de 6 (66%) y pierde el certificado
+        curso = Curso.objects.order_by('id').first()
+        sesion = Sesion.objects.create(curso=curso, titulo='S6', fecha=date(2025, 2, 6))
+        primero = Inscripcion.objects.filter(curso=curso).order_by('id').first()
+        guardar_asistencias(sesion, {primero.id})
+
+        resultado = emitir_certificados()
+        self.assertEqual((resultado['emitidos'], resultado['revocados']), (3, 1))
+        self.assertFalse(Certificado.objects.filter(inscripcion__curso=curso, porcentaje_asistencia__lt=80).exists())
+        self.assertEqual(Certificado.objects.filter(inscripcion__curso=curso).get().inscripcion_id, primero.id)
+
+        segundo = Inscripcion.objects.filter(curso=curso).order_by('id')[1]
+        self.client.force_login(segundo.user)
+        self.assertFalse(self.client.get(reverse('certificado', args=[segundo.id])).context['cumple'])
+
+    def test_emision_reanudable(self):
+        lotes = []
+        primero = emitir_certificados(tamano_lote=2, al_terminar_lote=lambda r: lotes.append(r['ultimo_id']))
+        self.assertEqual(len(lotes), 3)
+
+        Certificado.objects.all().delete()
+        resultado = emitir_certificados(tamano_lote=2, desde_id=lotes[0])
+        self.assertEqual(resultado['procesadas'], 4)
+        self.assertEqual(resultado['ultimo_id'], primero['ultimo_id'])
+
+    def test_vista_lee_porcentaje_guardado(self):
+        emitir_certificados()
+        certificado = Certificado.objects.order_by('id').first()
+        certificado.porcentaje_asistencia = 95.5
+        certificado.save()
+
+        self.client.force_login(certificado.inscripcion.user)
+        respuesta = self.client.get(reverse('certificado', args=[certificado.inscripcion_id]))
+        self.assertEqual(respuesta.context['porcentaje'], 95.5)
+        self.assertTrue(respuesta.context['cumple'])
+
+
+class GenerarPdfCertificadosTests(TestCase):
+    def setUp(self):
+        profesor = crear_datos(cursos=1, estudiantes=3, recursos=0)
+        curso = Curso.objects.get(profesor=profesor)
+        sesion = Sesion.objects.create(curso=curso, titulo='S1', fecha=date(2025, 2, 1))
+        guardar_asistencias(sesion, set(Inscripcion.objects.values_list('id', flat=True)))
+        emitir_certificados()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+
+    def test_pdf_valido(self):
+        documento = renderizar_certificado(
+            {'estudiante': 'José (Pepe)', 'curso': 'Inglés', 'porcentaje': 87.5, 'fecha': '2025-06-01'}
+        )
+        self.assertTrue(documento.startswith(b'%PDF-1.4'))
+        self.assertTrue(documento.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'Jos\xe9 \\(Pepe\\)', documento)
+
+    def test_omite_sin_cambios(self):
+        with self.settings(MEDIA_ROOT=self.media.name):
+            primero = generar_archivos(procesos=0, tamano_lote=2)
+            self.assertEqual((primero['generados'], primero['omitidos']), (3, 0))
+            self.assertEqual(generar_archivos(procesos=0)['omitidos'], 3)
+
+            certificado = Certificado.objects.order_by('id').first()
+            anterior = certificado.archivo.path
+            Certificado.objects.filter(id=certificado.id).update(porcentaje_asistencia=90)
+            segundo = generar_archivos(procesos=0)
+            self.assertEqual((segundo['generados'], segundo['omitidos']), (1, 2))
+
+            certificado.refresh_from_db()
+            self.assertFalse(os.path.exists(anterior))
+            with open(certificado.archivo.path, 'rb') as archivo:
+                self.assertIn(b'90.00%', archivo.read())
+
+
+class CatalogoCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profesor = crear_datos(cursos=3, estudiantes=1, recursos=0)
+        Perfil.objects.filter(user=self.profesor.user).update(biografia='Bio inicial')
+
+    def test_cache_caliente_sin_consultas(self):
+        self.client.get(reverse('lista_cursos'))
+        self.assertEqual(contar_consultas(lambda: self.client.get(reverse('lista_cursos'))), 0)
+
+    def test_invalida_solo_lo_afectado(self):
+        otro = crear_datos(cursos=1, estudiantes=0, username='otro')
+        self.client.get(reverse('lista_cursos'))
+        curso_otro = Curso.objects.get(profesor=otro)
+        self.assertIsNotNone(cache.get(catalogo.clave_tarjeta(curso_otro.id)))
+
+        perfil = self.profesor.user.perfil
+        perfil.biografia = 'Bio nueva'
+        perfil.save()
+        for curso in Curso.objects.filter(profesor=self.profesor):
+            self.assertIsNone(cache.get(catalogo.clave_tarjeta(curso.id)))
+        self.assertIsNotNone(cache.get(catalogo.clave_tarjeta(curso_otro.id)))
+        self.assertContains(self.client.get(reverse('lista_cursos')), 'Bio nueva', count=3)
+
+    def test_inscripcion_por_usuario(self):
+        inscripcion = Inscripcion.objects.order_by('id').first()
+        self.client.force_login(inscripcion.user)
+        respuesta = self.client.get(reverse('lista_cursos'))
+        inscritos = [t['id'] for t in respuesta.context['tarjetas'] if t['inscrito']]
+        self.assertEqual(inscritos, [inscripcion.curso_id])
+
+
+class ApiCursosTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=7, estudiantes=0, recursos=0)
+        otro = crear_datos(cursos=2, estudiantes=0, recursos=0, username='otro')
+        Profesor.objects.filter(id=otro.id).update(especialidad='Frances')
+        for n, curso in enumerate(Curso.objects.order_by('id')):
+            curso.fecha_inicio = date(2025, 1, 1 + n % 3)
+            curso.save()
+
+    def paginas(self, **parametros):
+        ids, cursor = [], None
+        while True:
+            if cursor:
+                parametros['cursor'] = cursor
+            datos = self.client.get(reverse('api_cursos'), parametros).json()
+            ids += [c['id'] for c in datos['resultados']]
+            cursor = datos['siguiente']
+            if not cursor:
+                return ids
+
+    def test_recorre_todo_en_orden(self):
+        esperado = list(Curso.objects.order_by('fecha_inicio', 'id').values_list('id', flat=True))
+        self.assertEqual(self.paginas(tamano=2), esperado)
+
+    def test_filtros(self):
+        self.assertEqual(len(self.paginas(especialidad='Frances', tamano=1)), 2)
+        self.assertEqual(len(self.paginas(desde='2025-01-02', hasta='2025-01-02')), 3)
+
+    def test_busqueda_texto_sincronizada(self):
+        curso = Curso.objects.order_by('id').first()
+        curso.descripcion = 'Gramática básica del inglés'
+        curso.save()
+        self.assertEqual(self.paginas(q='gramatica ingl'), [curso.id])
+
+        curso.delete()
+        self.assertEqual(self.paginas(q='gramatica'), [])
+
+    def test_parametros_invalidos(self):
+        respuesta = self.client.get(reverse('api_cursos'), {'cursor': 'x'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+# Verifica con EXPLAIN QUERY PLAN que las consultas de las vistas principales usan indices.
+# Por defecto siembra ~50.000 filas; para la prueba completa con 1M de filas:
+#   EXPLAIN_FILAS=1000000 python manage.py test Cursos.tests.PlanesConsultaTests
+class PlanesConsultaTests(TestCase):
+    RECURSOS = 15
+    SESIONES = 10
+    # Tablas que crecen con los datos; las pequeñas (profesores, perfiles) se pueden recorrer
+    TABLAS_GRANDES = ('Cursos_curso', 'Cursos_inscripcion', 'Cursos_progreso', 'Cursos_asistencia',
+                      'Cursos_recurso', 'Cursos_sesion', 'Cursos_resumenprogreso', 'Cursos_certificado')
+
+    @classmethod
+    def setUpTestData(cls):
+        filas = int(os.environ.get('EXPLAIN_FILAS', 50000))
+        inscripciones = max(10, filas // (cls.RECURSOS + cls.SESIONES))
+        cursos = max(40, inscripciones // 200)
+
+        profesores = [crear_datos(cursos=0, estudiantes=0, username=f'planes_profe_{p}') for p in range(20)]
+        cls.profesor = profesores[0]
+        Curso.objects.bulk_create(
+            Curso(titulo=f'Curso {c}', descripcion='-', profesor=profesores[c % len(profesores)],
+                  fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1))
+            for c in range(cursos)
+        )
+        ids_cursos = list(Curso.objects.values_list('id', flat=True))
+        Recurso.objects.bulk_create(
+            Recurso(titulo=f'R{r}', descripcion='-', tipo_archivo='Archivo', enlace='http://a.com', curso_id=c)
+            for c in ids_cursos for r in range(cls.RECURSOS)
+        )
+        Sesion.objects.bulk_create(
+            Sesion(titulo=f'S{s}', fecha=date(2025, 2, 1), curso_id=c) for c in ids_cursos for s in range(cls.SESIONES)
+        )
+        User.objects.bulk_create(User(username=f'planes_est_{i}') for i in range(inscripciones // 2))
+        usuarios = list(User.objects.filter(username__startswith='planes_est_').values_list('id', flat=True))
+        # Cada estudiante se inscribe en dos cursos
+        Inscripcion.objects.bulk_create(
+            Inscripcion(user_id=u, curso_id=ids_cursos[(n + k) % cursos], nombre_estudiante='E', email_estudiante='e@e.com')
+            for n, u in enumerate(usuarios) for k in (0, 1)
+        )
+        recursos = {}
+        for recurso_id, curso_id in Recurso.objects.values_list('id', 'curso_id'):
+            recursos.setdefault(curso_id, []).append(recurso_id)
+        sesiones = {}
+        for sesion_id, curso_id in Sesion.objects.values_list('id', 'curso_id'):
+            sesiones.setdefault(curso_id, []).append(sesion_id)
+        lista = list(Inscripcion.objects.values_list('id', 'curso_id'))
+        Progreso.objects.bulk_create((
+            Progreso(inscripcion_id=i, recurso_id=r, completado=(i + r) % 2 == 0)
+            for i, c in lista for r in recursos[c]
+        ), batch_size=5000)
+        Asistencia.objects.bulk_create((
+            Asistencia(inscripcion_id=i, sesion_id=s, presente=(i + s) % 3 > 0)
+            for i, c in lista for s in sesiones[c]
+        ), batch_size=5000)
+        recalcular_resumenes()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        cache.clear()
+
+    # Devuelve las consultas con WHERE cuyo plan recorre una tabla completa sin indice
+    def consultas_sin_indice(self, funcion):
+        with CaptureQueriesContext(connection) as contexto:
+            funcion()
+        problemas = []
+        with connection.cursor() as cursor:
+            for consulta in contexto.captured_queries:
+                sql = consulta['sql']
+                if not sql.startswith('SELECT') or ' WHERE ' not in sql:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                for fila in cursor.fetchall():
+                    detalle = fila[-1]
+                    tabla = detalle.split()[1] if detalle.startswith('SCAN ') else None
+                    if tabla in self.TABLAS_GRANDES and 'USING' not in detalle:
+                        problemas.append(f'{detalle} <- {sql}')
+        return problemas
+
+    def revisar(self, usuario, nombre, *args, metodo='get', datos=None):
+        self.client.force_login(usuario)
+        url = reverse(nombre, args=args)
+        peticion = getattr(self.client, metodo)
+        self.assertEqual(self.consultas_sin_indice(lambda: peticion(url, datos or {})), [])
+
+    def test_vistas_del_estudiante(self):
+        inscripcion = Inscripcion.objects.order_by('id').first()
+        recurso = Recurso.objects.filter(curso=inscripcion.curso).first()
+        for nombre, args in (
+            ('lista_cursos', ()), ('progreso_estudiante', ()), ('perfil_usuario', ()),
+            ('detalle_curso', (inscripcion.curso_id,)), ('ver_recurso', (recurso.id,)),
+            ('marcar_completado', (recurso.id,)), ('certificado', (inscripcion.id,)),
+        ):
+            with self.subTest(vista=nombre):
+                self.revisar(inscripcion.user, nombre, *args)
+
+    def test_vistas_del_profesor(self):
+        sesion = Sesion.objects.order_by('id').first()
+        presentes = {f'presente_{i}': 'on' for i in Inscripcion.objects.filter(curso=sesion.curso).values_list('id', flat=True)[::2]}
+        self.revisar(self.profesor.user, 'dashboard')
+        self.revisar(self.profesor.user, 'tomar_asistencia', sesion.id)
+        self.revisar(self.profesor.user, 'tomar_asistencia', sesion.id, metodo='post', datos=presentes)
+
+
+class GeneradorDatosTests(TestCase):
+    ESCALA = {'profesores': 2, 'cursos': 4, 'sesiones': 3, 'recursos': 2, 'estudiantes': 20, 'inscripciones': 2}
+
+    def datos(self, prefijo):
+        return list(
+            Inscripcion.objects.filter(user__username__startswith=prefijo)
+            .order_by('user__username', 'curso__titulo')
+            .values_list('user__username', 'curso__titulo', 'resumen__recursos_completados', 'resumen__sesiones_asistidas')
+        )
+
+    def test_cantidades_y_contadores(self):
+        creados = generar_datos(**self.ESCALA)
+        self.assertEqual(creados['cursos'], 4)
+        self.assertEqual(creados['inscripciones'], 40)
+        self.assertEqual(creados['asistencias'], 40 * 3)
+        self.assertEqual(Sesion.objects.count(), 4 * 3)
+        self.assertEqual(verificar_resumenes(), [])
+
+    def test_misma_semilla_mismos_datos(self):
+        generar_datos(semilla=5, prefijo='a', **self.ESCALA)
+        generar_datos(semilla=5, prefijo='b', **self.ESCALA)
+        generar_datos(semilla=6, prefijo='c', **self.ESCALA)
+        sin_prefijo = lambda filas: [(u[2:], c.rsplit(' ', 1)[0], *resto) for u, c, *resto in filas]
+        self.assertEqual(sin_prefijo(self.datos('a_')), sin_prefijo(self.datos('b_')))
+        self.assertNotEqual(sin_prefijo(self.datos('a_')), sin_prefijo(self.datos('c_')))
+
+
+@override_settings(INSTRUMENTACION_ACTIVA=True, INSTRUMENTACION_ESTRICTA=True)
+class InstrumentacionTests(TestCase):
+    def setUp(self):
+        instrumentacion.reiniciar()
+        self.profesor = crear_datos(cursos=1, estudiantes=6, recursos=2)
+        self.curso = Curso.objects.get(profesor=self.profesor)
+
+    def test_huella_agrupa_listas_in(self):
+        self.assertEqual(
+            instrumentacion.huella('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            instrumentacion.huella('SELECT 1 WHERE id IN (%s,%s)'),
+        )
+
+    def test_detecta_consultas_repetidas(self):
+        medicion = instrumentacion.Medicion()
+        with connection.execute_wrapper(medicion):
+            for inscripcion in Inscripcion.objects.filter(curso=self.curso):
+                inscripcion.user.username
+        self.assertEqual(medicion.consultas, 7)
+        self.assertEqual(medicion.repetidas()[0]['veces'], 6)
+
+    def test_no_reemplaza_el_render_de_django(self):
+        from django.template.backends.django import Template as PlantillaDjango
+        render = PlantillaDjango.render
+        instrumentacion.InstrumentacionMiddleware(lambda request: None)
+        self.assertIs(PlantillaDjango.render, render)
+        # Fuera de una peticion medida la plantilla se renderiza sin medir
+        self.assertEqual(engines['django'].from_string('{{ a }}').render({'a': 1}), '1')
+
+    def test_registra_peticion_en_log_y_resumen(self):
+        self.client.force_login(self.profesor.user)
+        with self.assertLogs('Cursos.instrumentacion', 'INFO') as logs:
+            self.client.get(reverse('detalle_curso', args=[self.curso.id]))
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(registro['url'], 'detalle_curso')
+        self.assertGreater(registro['bytes'], 0)
+        self.assertGreater(registro['ms_plantillas'], 0)
+        # Los usuarios inscritos se traen con la inscripcion, sin una consulta por estudiante
+        self.assertEqual(registro['repetidas'], [])
+
+        admin = User.objects.create(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        resumen = self.client.get(reverse('instrumentacion')).json()['vistas']
+        self.assertEqual(resumen['detalle_curso']['peticiones'], 1)
+
+    def test_resumen_solo_para_staff(self):
+        self.client.force_login(self.profesor.user)
+        self.assertEqual(self.client.get(reverse('instrumentacion')).status_code, 302)
+
+    @override_settings(INSTRUMENTACION_PRESUPUESTO={'lista_cursos': 0})
+    def test_presupuesto_excedido(self):
+        self.client.force_login(self.profesor.user)
+        with self.assertLogs('Cursos.instrumentacion', 'INFO'):
+            with self.assertRaises(instrumentacion.PresupuestoExcedido):
+                self.client.get(reverse('lista_cursos'))
+
+    # Las vistas principales respetan el presupuesto de settings.INSTRUMENTACION_PRESUPUESTO
+    def test_vistas_dentro_del_presupuesto(self):
+        inscripcion = Inscripcion.objects.filter(curso=self.curso).first()
+        recurso = Recurso.objects.filter(curso=self.curso).first()
+        sesion = Sesion.objects.create(curso=self.curso, titulo='S1', fecha=date(2025, 2, 1))
+        # Al inscribirse se crea el resumen; crear_datos inserta las inscripciones directamente
+        recalcular_resumenes()
+        with self.assertLogs('Cursos.instrumentacion', 'INFO'):
+            self.client.force_login(inscripcion.user)
+            for nombre, args in (('lista_cursos', ()), ('detalle_curso', (self.curso.id,)),
+                                 ('progreso_estudiante', ()), ('perfil_usuario', ()),
+                                 ('ver_recurso', (recurso.id,)), ('certificado', (inscripcion.id,))):
+                self.client.get(reverse(nombre, args=args))
+            self.client.force_login(self.profesor.user)
+            self.client.get(reverse('dashboard'))
+            self.client.post(reverse('tomar_asistencia', args=[sesion.id]), {f'presente_{inscripcion.id}': 'on'})
+
+
+class TareasTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=3, recursos=0)
+        self.curso = Curso.objects.get(profesor=self.profesor)
+        self.sesion = Sesion.objects.create(curso=self.curso, titulo='S1', fecha=date(2025, 2, 1))
+
+    def registrar_tarea_que_falla(self):
+        tareas.tarea('prueba_falla', max_intentos=2)(lambda: 1 / 0)
+        self.addCleanup(tareas.TAREAS.pop, 'prueba_falla')
+
+    def test_clave_de_idempotencia(self):
+        primera = tareas.encolar('recalcular_progreso', clave='unica')
+        segunda = tareas.encolar('recalcular_progreso', clave='unica')
+        self.assertEqual(primera.id, segunda.id)
+        self.assertNotEqual(tareas.encolar('recalcular_progreso').id, primera.id)
+
+    def test_tipo_desconocido(self):
+        with self.assertRaises(tareas.TareaDesconocida):
+            tareas.encolar('no_existe')
+
+    def test_una_tarea_se_toma_una_sola_vez(self):
+        tarea = tareas.encolar('recalcular_progreso')
+        self.assertEqual(tareas.tomar_siguiente('a').id, tarea.id)
+        self.assertIsNone(tareas.tomar_siguiente('b'))
+
+    def test_reintentos_con_espera(self):
+        self.registrar_tarea_que_falla()
+        tarea = tareas.encolar('prueba_falla')
+        with self.assertLogs('Cursos.tareas', 'WARNING'):
+            self.assertEqual(tareas.procesar_pendientes(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
+        self.assertGreater(tarea.disponible_desde, timezone.now())
+        self.assertIn('ZeroDivisionError', tarea.error)
+        # Mientras no pase la espera no se vuelve a ejecutar
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+
+        Tarea.objects.filter(id=tarea.id).update(disponible_desde=timezone.now())
+        with self.assertLogs('Cursos.tareas', 'WARNING'):
+            tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.FALLIDA, 2))
+
+    def test_liberar_abandonadas(self):
+        tarea = tareas.encolar('recalcular_progreso')
+        tomada = tareas.tomar_siguiente('host:1:0')
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        Tarea.objects.filter(id=tarea.id).update(iniciada=hace_una_hora, latido=hace_una_hora)
+        # Con el latido al dia no se libera, aunque lleve mucho en proceso
+        self.assertEqual(tareas.renovar_latido('host:1'), 1)
+        self.assertEqual(tareas.liberar_abandonadas(), 0)
+
+        Tarea.objects.filter(id=tarea.id).update(latido=hace_una_hora)
+        with self.assertLogs('Cursos.tareas', 'WARNING'):
+            self.assertEqual(tareas.liberar_abandonadas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
+        self.assertGreater(tarea.disponible_desde, timezone.now())
+        self.assertIn('host:1:0', tarea.error)
+
+        # El trabajador que se creia caido termina tarde: su resultado no pisa el reintento
+        Tarea.objects.filter(id=tarea.id).update(disponible_desde=timezone.now())
+        otra = tareas.tomar_siguiente('host:2:0')
+        with self.assertLogs('Cursos.tareas', 'WARNING'):
+            tareas.ejecutar(tomada)
+        otra.refresh_from_db()
+        self.assertEqual((otra.estado, otra.trabajador, otra.intentos), (Tarea.EN_PROCESO, 'host:2:0', 2))
+        self.assertEqual(tareas.ejecutar(otra).estado, Tarea.COMPLETADA)
+
+    def test_abandonada_sin_intentos_queda_fallida(self):
+        self.registrar_tarea_que_falla()
+        tarea = tareas.encolar('prueba_falla')
+        for _ in range(2):
+            Tarea.objects.filter(id=tarea.id).update(disponible_desde=timezone.now())
+            tareas.tomar_siguiente('caido')
+            Tarea.objects.filter(id=tarea.id).update(latido=timezone.now() - timedelta(hours=1))
+            with self.assertLogs('Cursos.tareas', 'WARNING'):
+                tareas.liberar_abandonadas()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.FALLIDA, 2))
+        self.assertIsNotNone(tarea.terminada)
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+
+    @override_settings(ASISTENCIA_EN_SEGUNDO_PLANO=1)
+    def test_asistencia_en_segundo_plano(self):
+        ids = list(Inscripcion.objects.filter(curso=self.curso).order_by('id').values_list('id', flat=True))
+        self.client.force_login(self.profesor.user)
+        url = reverse('tomar_asistencia', args=[self.sesion.id])
+        clave = self.client.get(url).context['clave']
+        # Enviar dos veces el mismo formulario encola una sola tarea
+        for _ in range(2):
+            self.client.post(url, {'clave': clave, f'presente_{ids[0]}': 'on'})
+        self.assertEqual(Tarea.objects.count(), 1)
+        self.assertEqual(Asistencia.objects.count(), 0)
+
+        tareas.procesar_pendientes()
+        self.assertEqual(Tarea.objects.get().resultado, {'creadas': 3, 'actualizadas': 0})
+        self.assertEqual(list(Asistencia.objects.filter(presente=True).values_list('inscripcion_id', flat=True)), ids[:1])
+
+    def test_emitir_certificados_y_consultar_estado(self):
+        url = reverse('emitir_certificados_curso', args=[self.curso.id])
+        estudiante = Inscripcion.objects.filter(curso=self.curso).first().user
+        self.client.force_login(estudiante)
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.force_login(self.profesor.user)
+        respuesta = self.client.post(url, headers={'Idempotency-Key': 'k1'})
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertEqual(self.client.post(url, headers={'Idempotency-Key': 'k1'}).json()['id'], respuesta.json()['id'])
+
+        with tempfile.TemporaryDirectory() as carpeta, self.settings(MEDIA_ROOT=carpeta):
+            tareas.procesar_pendientes()
+        estado = self.client.get(respuesta.json()['url']).json()
+        self.assertEqual(estado['estado'], Tarea.COMPLETADA)
+        self.assertEqual(estado['resultado']['procesadas'], 3)
+        # Otro usuario no ve la tarea
+        self.client.force_login(estudiante)
+        self.assertEqual(self.client.get(respuesta.json()['url']).status_code, 404)
+
+
+# Una BD existente con el esquema original (solo 0001) y duplicados, antes de migrate
+class FusionarDuplicadosTests(TransactionTestCase):
+    ORIGINAL = [('Cursos', '0001_initial')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.ultimas = self.executor.loader.graph.leaf_nodes()
+        self.executor.migrate(self.ORIGINAL)
+        self.addCleanup(self.migrar, self.ultimas)
+
+    def migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+
+    def test_antes_de_migrate(self):
+        apps = self.executor.loader.project_state(self.ORIGINAL).apps
+        user = apps.get_model('auth', 'User').objects.create(username='ana')
+        profesor = apps.get_model('Cursos', 'Profesor').objects.create(
+            user_id=user.id, nombre='P', email='p@correo.com', especialidad='x'
+        )
+        curso = apps.get_model('Cursos', 'Curso').objects.create(
+            profesor=profesor, titulo='C', descripcion='d', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 2, 1)
+        )
+        sesion = apps.get_model('Cursos', 'Sesion').objects.create(curso=curso, titulo='S', fecha=date(2025, 1, 2))
+        Inscripcion = apps.get_model('Cursos', 'Inscripcion')
+        inscripciones = [
+            Inscripcion.objects.create(
+                curso=curso, user_id=user.id, nombre_estudiante='Ana', email_estudiante='ana@correo.com'
+            ) for _ in range(2)
+        ]
+        for inscripcion, presente in zip(inscripciones, (False, True)):
+            apps.get_model('Cursos', 'Asistencia').objects.create(inscripcion=inscripcion, sesion=sesion, presente=presente)
+
+        salida = io.StringIO()
+        call_command('fusionar_duplicados', stdout=salida)
+        self.assertIn('inscripciones: 1 grupos', salida.getvalue())
+
+        self.migrar(self.ultimas)
+        self.assertEqual(Inscripcion.objects.count(), 1)
+        self.assertTrue(Asistencia.objects.get().presente)
+
+
+# Los hilos del trabajador usan sus propias conexiones: necesitan datos ya confirmados en la BD
+class TrabajadorTareasTests(TransactionTestCase):
+    def test_varios_hilos_vacian_la_cola(self):
+        for _ in range(6):
+            tareas.encolar('recalcular_progreso')
+        tareas.trabajar(hilos=3, una_vez=True)
+        self.assertEqual(Tarea.objects.filter(estado=Tarea.COMPLETADA).count(), 6)
+
+
+# Las vistas async (urls_asgi) deben devolver lo mismo que las sincronas
+class VistasAsyncTests(TestCase):
+    URLS_ASGI = 'PlataformaDeCursos.urls_asgi'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = crear_datos(cursos=2, estudiantes=3, recursos=2)
+        cls.inscripcion = Inscripcion.objects.select_related('user').order_by('id').first()
+        cls.recurso = Recurso.objects.filter(curso=cls.inscripcion.curso).order_by('id').first()
+        recalcular_resumenes()
+
+    def sin_csrf(self, contenido):
+        return re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', '', contenido.decode())
+
+    def casos(self):
+        estudiante, profesor = self.inscripcion.user, self.profesor.user
+        return [
+            (None, 'lista_cursos', ()),
+            (estudiante, 'lista_cursos', ()),
+            (estudiante, 'detalle_curso', (self.inscripcion.curso_id,)),
+            (estudiante, 'progreso_estudiante', ()),
+            (estudiante, 'ver_recurso', (self.recurso.id,)),
+            (profesor, 'dashboard', ()),
+            (estudiante, 'dashboard', ()),
+            (None, 'dashboard', ()),
+        ]
+
+    async def test_mismo_resultado_que_las_vistas_sincronas(self):
+        for usuario, nombre, args in self.casos():
+            with self.subTest(vista=nombre, usuario=usuario and usuario.username):
+                url = reverse(nombre, args=args)
+                if usuario:
+                    await self.client.aforce_login(usuario)
+                    await self.async_client.aforce_login(usuario)
+                esperada = await sync_to_async(self.client.get)(url)
+                with self.settings(ROOT_URLCONF=self.URLS_ASGI):
+                    self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+                    respuesta = await self.async_client.get(url)
+                self.assertEqual(respuesta.status_code, esperada.status_code)
+                self.assertEqual(respuesta.get('Location'), esperada.get('Location'))
+                self.assertEqual(self.sin_csrf(respuesta.content), self.sin_csrf(esperada.content))
+                await self.client.alogout()
+                await self.async_client.alogout()
+
+    async def test_ver_recurso_de_otro_curso(self):
+        otro = await Recurso.objects.exclude(curso_id=self.inscripcion.curso_id).afirst()
+        await self.async_client.aforce_login(self.inscripcion.user)
+        with self.settings(ROOT_URLCONF=self.URLS_ASGI):
+            respuesta = await self.async_client.get(reverse('ver_recurso', args=[otro.id]))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+@override_settings(SUBIDA_TAMANO_FRAGMENTO=4, MATERIAL_TAMANO_MAXIMO=100, MATERIAL_CUOTA_POR_CURSO=30)
+class SubidasPorPartesTests(TestCase):
+    CONTENIDO = b'0123456789'
+
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=1, recursos=0)
+        self.curso = Curso.objects.get(profesor=self.profesor)
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=os.path.join(carpeta.name, 'media'), SUBIDAS_ROOT=os.path.join(carpeta.name, 'subidas'))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.client.force_login(self.profesor.user)
+
+    def crear(self, contenido=CONTENIDO, **datos):
+        datos = {'titulo': 'Video', 'nombre': 'clase.mp4', 'tamano': len(contenido),
+                 'sha256': hashlib.sha256(contenido).hexdigest(), **datos}
+        return self.client.post(reverse('crear_subida_material', args=[self.curso.id]), datos)
+
+    def enviar(self, token, numero, datos, sha256=None):
+        return self.client.put(
+            reverse('subir_fragmento', args=[token, numero]), datos, content_type='application/octet-stream',
+            headers={'X-Checksum-Sha256': sha256 or hashlib.sha256(datos).hexdigest()},
+        )
+
+    def test_subida_en_desorden_y_reanudada(self):
+        respuesta = self.crear()
+        self.assertEqual(respuesta.status_code, 201)
+        token = respuesta.json()['token']
+        self.assertEqual(respuesta.json()['total_fragmentos'], 3)
+
+        self.assertEqual(self.enviar(token, 2, b'89').status_code, 200)
+        self.assertEqual(self.enviar(token, 0, b'0123').status_code, 200)
+        # Completar antes de tiempo no crea nada; el estado dice que falta
+        self.assertEqual(self.client.post(reverse('completar_subida', args=[token])).status_code, 400)
+        self.assertEqual(self.client.get(reverse('estado_subida', args=[token])).json()['faltantes'], [1])
+        self.assertFalse(Recurso.objects.exists())
+
+        self.assertEqual(self.enviar(token, 1, b'4567').status_code, 200)
+        respuesta = self.client.post(reverse('completar_subida', args=[token]))
+        self.assertEqual(respuesta.status_code, 201)
+        material = MaterialExtra.objects.get(id=respuesta.json()['material'])
+        self.assertEqual(material.tamano, 10)
+        self.assertTrue(material.archivo.name.startswith('contenido/'))
+        with material.archivo.open('rb') as archivo:
+            self.assertEqual(archivo.read(), self.CONTENIDO)
+        self.assertEqual(Recurso.objects.get(curso=self.curso).enlace, material.archivo.url)
+        self.assertEqual(os.listdir(settings.SUBIDAS_ROOT), [])
+        # Una segunda llamada no duplica el material
+        self.assertEqual(self.client.post(reverse('completar_subida', args=[token])).status_code, 400)
+        self.assertEqual(MaterialExtra.objects.count(), 1)
+
+    def test_fragmento_con_checksum_o_largo_incorrecto(self):
+        token = self.crear().json()['token']
+        self.assertEqual(self.enviar(token, 0, b'0123', sha256='0' * 64).status_code, 400)
+        self.assertEqual(self.enviar(token, 0, b'012').status_code, 400)
+        self.assertEqual(self.enviar(token, 3, b'0').status_code, 400)
+        self.assertEqual(self.client.get(reverse('estado_subida', args=[token])).json()['faltantes'], [0, 1, 2])
+
+    def test_archivo_completo_con_checksum_incorrecto(self):
+        token = self.crear(sha256='0' * 64).json()['token']
+        for numero, datos in enumerate([b'0123', b'4567', b'89']):
+            self.enviar(token, numero, datos)
+        self.assertEqual(self.client.post(reverse('completar_subida', args=[token])).status_code, 400)
+        self.assertFalse(MaterialExtra.objects.exists())
+
+    def test_limites_de_tamano_y_cuota(self):
+        self.assertEqual(self.crear(contenido=b'x' * 101).status_code, 400)
+        # Las subidas abiertas cuentan para la cuota del curso
+        self.assertEqual(self.crear(contenido=b'x' * 20).status_code, 201)
+        self.assertEqual(self.crear(contenido=b'x' * 11).status_code, 400)
+        token = SubidaArchivo.objects.get().token
+        self.assertEqual(self.client.delete(reverse('estado_subida', args=[token])).json()['estado'], SubidaArchivo.CANCELADA)
+        self.assertEqual(self.crear(contenido=b'x' * 11).status_code, 201)
+
+    def test_solo_el_profesor_del_curso(self):
+        token = self.crear().json()['token']
+        otro = crear_datos(cursos=1, estudiantes=0, username='otro')
+        self.client.force_login(otro.user)
+        self.assertEqual(self.crear().status_code, 403)
+        self.assertEqual(self.client.get(reverse('estado_subida', args=[token])).status_code, 404)
+        self.assertEqual(self.enviar(token, 0, b'0123').status_code, 404)
+
+    def test_limpiar_abandonadas(self):
+        token = self.crear().json()['token']
+        SubidaArchivo.objects.update(actualizada=timezone.now() - timedelta(days=2))
+        # Como lo hace cron: encolar dos veces en la misma hora deja una sola tarea
+        call_command('limpiar_subidas', '--encolar', stdout=io.StringIO())
+        call_command('limpiar_subidas', '--encolar', stdout=io.StringIO())
+        tareas.procesar_pendientes()
+        self.assertEqual(Tarea.objects.get().resultado, {'canceladas': 1})
+        self.assertEqual(SubidaArchivo.objects.get(token=token).estado, SubidaArchivo.CANCELADA)
+        self.assertEqual(os.listdir(settings.SUBIDAS_ROOT), [])
+
+
+class AlmacenPorContenidoTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=2, estudiantes=1, recursos=0)
+        self.cursos = list(Curso.objects.filter(profesor=self.profesor).order_by('id'))
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def material(self, curso, contenido=b'%PDF silabo', nombre='silabo.pdf'):
+        return MaterialExtra.objects.create(
+            curso=curso, profesor=self.profesor, titulo='Silabo',
+            archivo=SimpleUploadedFile(nombre, contenido),
+        )
+
+    def archivos_en_disco(self):
+        return [nombre for _, _, nombres in os.walk(settings.MEDIA_ROOT) for nombre in nombres]
+
+    def test_mismo_contenido_se_guarda_una_vez(self):
+        primero = self.material(self.cursos[0])
+        segundo = self.material(self.cursos[1], nombre='otro_nombre.pdf')
+        self.assertEqual(primero.archivo.name, segundo.archivo.name)
+        self.assertTrue(primero.archivo.name.startswith('contenido/'))
+        self.assertEqual(len(self.archivos_en_disco()), 1)
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 2)
+
+        # Borrar una fila (aunque antes se borre su archivo, como en eliminar_material_extra) resta una referencia
+        primero.archivo.delete()
+        primero.delete()
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 1)
+        with segundo.archivo.open('rb') as archivo:
+            self.assertEqual(archivo.read(), b'%PDF silabo')
+        # Al borrar el curso se va el ultimo material y el archivo
+        self.cursos[1].delete()
+        self.assertFalse(ArchivoContenido.objects.exists())
+        self.assertEqual(self.archivos_en_disco(), [])
+
+    def test_reemplazar_imagen_de_perfil(self):
+        perfil = Perfil.objects.get(user=self.profesor.user)
+        defecto = perfil.imagen.name
+        perfil.imagen = SimpleUploadedFile('a.jpg', b'imagen a')
+        perfil.save()
+        # Sin cambios en la imagen no se consulta el nombre anterior
+        with CaptureQueriesContext(connection) as contexto:
+            perfil.save()
+        self.assertFalse([q for q in contexto.captured_queries if 'FROM "Cursos_perfil"' in q['sql']])
+        perfil.imagen = SimpleUploadedFile('b.jpg', b'imagen b')
+        perfil.save()
+        self.assertEqual(list(ArchivoContenido.objects.values_list('nombre', flat=True)), [perfil.imagen.name])
+        self.assertEqual(len(self.archivos_en_disco()), 1)
+        perfil.delete()
+        self.assertFalse(ArchivoContenido.objects.exists())
+        # La imagen por defecto la comparten todos y no se borra
+        FileSystemStorage().save(defecto, ContentFile(b'defecto'))
+        User.objects.create(username='sin_foto').perfil.delete()
+        self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, defecto)))
+
+    def test_borrar_certificado_borra_su_pdf(self):
+        inscripcion = Inscripcion.objects.filter(curso=self.cursos[0]).first()
+        certificado = Certificado.objects.create(inscripcion=inscripcion, porcentaje_asistencia=90)
+        generar_archivos(procesos=0)
+        certificado.refresh_from_db()
+        ruta = certificado.archivo.path
+        self.assertTrue(os.path.exists(ruta))
+        certificado.delete()
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_deduplicar_archivos_existentes(self):
+        viejo = FileSystemStorage()
+        materiales = []
+        for curso in self.cursos:
+            nombre = viejo.save('materiales/silabo.pdf', ContentFile(b'%PDF silabo'))
+            material = MaterialExtra.objects.create(curso=curso, profesor=self.profesor, titulo='Silabo', archivo=nombre)
+            Recurso.objects.create(titulo='Silabo', descripcion='-', tipo_archivo='Archivo', enlace=viejo.url(nombre), curso=curso)
+            materiales.append(material)
+        self.assertNotEqual(materiales[0].archivo.name, materiales[1].archivo.name)
+
+        resultado = almacen.deduplicar()
+        self.assertEqual((resultado['archivos'], resultado['duplicados'], resultado['bytes_liberados']), (2, 1, 11))
+        nombres = set(MaterialExtra.objects.values_list('archivo', flat=True))
+        self.assertEqual(len(nombres), 1)
+        self.assertEqual(set(Recurso.objects.values_list('enlace', flat=True)), {viejo.url(nombres.pop())})
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 2)
+        self.assertEqual(len(self.archivos_en_disco()), 1)
+
+    def test_recolectar_corrige_contadores_y_borra_huerfanos(self):
+        material = self.material(self.cursos[0])
+        ArchivoContenido.objects.update(referencias=5)
+        sin_uso = self.material(self.cursos[1], contenido=b'otro')
+        MaterialExtra.objects.filter(id=sin_uso.id).update(archivo='')
+        huerfano = os.path.join(settings.MEDIA_ROOT, 'contenido', 'perdido.tmp')
+        with open(huerfano, 'wb') as archivo:
+            archivo.write(b'x')
+        os.utime(huerfano, (0, 0))
+
+        self.assertEqual(almacen.recolectar(simular=True)['borrados'], 1)
+        self.assertEqual(ArchivoContenido.objects.count(), 2)
+        resultado = almacen.recolectar()
+        self.assertEqual((resultado['corregidos'], resultado['borrados'], resultado['huerfanos']), (1, 1, 1))
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 1)
+        self.assertEqual(self.archivos_en_disco(), [os.path.basename(material.archivo.name)])
+
+
+class ArchivosProtegidosTests(TestCase):
+    CONTENIDO = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.profesor = crear_datos(cursos=2, estudiantes=1, recursos=0)
+        self.cursos = list(Curso.objects.filter(profesor=self.profesor).order_by('id'))
+        self.estudiante = Inscripcion.objects.get(curso=self.cursos[0]).user
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.material = MaterialExtra.objects.create(
+            curso=self.cursos[0], profesor=self.profesor, titulo='Clase 1',
+            archivo=SimpleUploadedFile('clase.mp4', self.CONTENIDO),
+        )
+        self.url = self.material.archivo.url
+        self.client.force_login(self.estudiante)
+
+    def contenido(self, respuesta):
+        return b''.join(respuesta.streaming_content)
+
+    def test_solo_inscritos_y_profesor(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.contenido(respuesta), self.CONTENIDO)
+        self.assertEqual(respuesta['Content-Type'], 'video/mp4')
+        self.assertIn('Clase 1.mp4', respuesta['Content-Disposition'])
+
+        self.client.force_login(Inscripcion.objects.get(curso=self.cursos[1]).user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.profesor.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_no_se_sale_por_las_carpetas_publicas(self):
+        self.client.logout()
+        nombre = self.material.archivo.name
+        for url in (
+            f'{settings.MEDIA_URL}miniaturas/../{nombre}',
+            f'{settings.MEDIA_URL}miniaturas/%2e%2e/{nombre}',
+            f'{settings.MEDIA_URL}miniaturas/./../{nombre}',
+        ):
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(descargas.normalizar('miniaturas/../' + nombre), nombre)
+        self.assertIsNone(descargas.normalizar('../settings.py'))
+        self.assertIsNone(descargas.normalizar('/etc/passwd'))
+        self.assertEqual(descargas.permiso(self.estudiante, 'miniaturas/../' + nombre), (False, None))
+
+    def test_rangos(self):
+        respuesta = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(self.contenido(respuesta), self.CONTENIDO[10:20])
+        respuesta = self.client.get(self.url, headers={'Range': 'bytes=-4'})
+        self.assertEqual(self.contenido(respuesta), self.CONTENIDO[-4:])
+        respuesta = self.client.get(self.url, headers={'Range': 'bytes=1000-'})
+        self.assertEqual((respuesta['Content-Length'], self.contenido(respuesta)), ('24', self.CONTENIDO[1000:]))
+        respuesta = self.client.get(self.url, headers={'Range': 'bytes=2000-'})
+        self.assertEqual((respuesta.status_code, respuesta['Content-Range']), (416, 'bytes */1024'))
+        # Varios rangos o un If-Range viejo: archivo completo
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=0-1,5-6'}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=0-1', 'If-Range': '"viejo"'}).status_code, 200)
+
+    def test_get_condicional(self):
+        respuesta = self.client.get(self.url)
+        etag = respuesta['ETag']
+        self.assertIn(ArchivoContenido.objects.get().sha256, etag)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        modificado = respuesta['Last-Modified']
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': modificado}).status_code, 304)
+        respuesta = self.client.get(self.url, headers={'Range': 'bytes=0-1', 'If-Range': etag})
+        self.assertEqual(respuesta.status_code, 206)
+
+    @override_settings(ARCHIVOS_ENVIO='X-Accel-Redirect')
+    def test_envio_por_el_servidor_web(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.content, b'')
+        self.assertEqual(respuesta['X-Accel-Redirect'], '/media-interno/' + self.material.archivo.name)
+        with self.settings(ARCHIVOS_ENVIO='X-Sendfile'):
+            self.assertEqual(self.client.get(self.url)['X-Sendfile'], self.material.archivo.path)
+
+    def test_certificado_solo_del_estudiante_y_su_profesor(self):
+        Certificado.objects.create(inscripcion=Inscripcion.objects.get(user=self.estudiante), porcentaje_asistencia=90)
+        generar_archivos(procesos=0)
+        url = Certificado.objects.get().archivo.url
+        self.assertEqual(self.client.get(url)['Content-Type'], 'application/pdf')
+        self.client.force_login(Inscripcion.objects.get(curso=self.cursos[1]).user)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(settings.MEDIA_URL + 'no/existe.pdf').status_code, 404)
+
+
+# Middleware que Django envuelve con sync_to_async / async_to_sync al armar la cadena de ASGI
+# (lo anota en el log con DEBUG)
+def middlewares_adaptados():
+    with override_settings(DEBUG=True), mock.patch('django.core.handlers.base.logger') as registro:
+        ASGIHandler()
+    return [llamada.args[1] for llamada in registro.debug.call_args_list if 'adapted for' in llamada.args[0]]
+
+
+# Peticiones por el ASGIHandler de Django, como con uvicorn. Corre la vista en otro hilo: los
+# datos tienen que estar confirmados en la BD
+@override_settings(ROOT_URLCONF='PlataformaDeCursos.urls_asgi')
+class EnvioAsgiTests(TransactionTestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=1, recursos=0)
+        self.curso = Curso.objects.get(profesor=self.profesor)
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    # Devuelve (estado, cabeceras, cuerpo, avisos de Django)
+    def get(self, user, ruta, cabeceras=()):
+        self.client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': ruta, 'raw_path': ruta.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode()), *cabeceras],
+            'client': ('127.0.0.1', 1), 'server': ('testserver', 80),
+        }
+        mensajes, pedido = [], [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def recibir():
+            if pedido:
+                return pedido.pop()
+            # El cliente no se desconecta: Django cancela la espera al terminar la respuesta
+            await asyncio.Event().wait()
+
+        async def enviar(mensaje):
+            mensajes.append(mensaje)
+
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter('always')
+            async_to_sync(ASGIHandler())(scope, recibir, enviar)
+        inicio = mensajes[0]
+        cuerpo = b''.join(mensaje.get('body', b'') for mensaje in mensajes[1:])
+        cabeceras = {nombre.decode().lower(): valor.decode() for nombre, valor in inicio['headers']}
+        return inicio['status'], cabeceras, cuerpo, [str(aviso.message) for aviso in avisos]
+
+    def test_archivo_en_bloques_async(self):
+        contenido = os.urandom(3 * descargas.BLOQUE + 10)
+        material = MaterialExtra.objects.create(
+            curso=self.curso, profesor=self.profesor, titulo='Clase',
+            archivo=SimpleUploadedFile('clase.mp4', contenido),
+        )
+        estudiante = Inscripcion.objects.get(curso=self.curso).user
+        estado, cabeceras, cuerpo, avisos = self.get(estudiante, material.archivo.url)
+        self.assertEqual((estado, cuerpo, cabeceras['content-length']), (200, contenido, str(len(contenido))))
+        # Sin el aviso de Django de que consumio un iterador sincrono entero antes de enviarlo
+        self.assertFalse([aviso for aviso in avisos if 'synchronous iterators' in aviso])
+
+        estado, cabeceras, cuerpo, avisos = self.get(estudiante, material.archivo.url, [(b'range', b'bytes=10-70000')])
+        self.assertEqual((estado, cuerpo), (206, contenido[10:70001]))
+        self.assertFalse([aviso for aviso in avisos if 'synchronous iterators' in aviso])
+
+
+    @mock.patch.object(reportes, 'FILAS_POR_BLOQUE', 2)
+    def test_reporte_en_bloques_async(self):
+        for i in range(5):
+            user = User.objects.create(username=f'e{i}')
+            Inscripcion.objects.create(curso=self.curso, user=user, nombre_estudiante=f'E{i}', email_estudiante=f'e{i}@correo.com')
+        for formato in ('csv', 'xlsx'):
+            with self.subTest(formato=formato):
+                ruta = reverse('exportar_reporte', args=[self.curso.id, 'asistencia', formato])
+                estado, cabeceras, cuerpo, avisos = self.get(self.profesor.user, ruta)
+                self.assertEqual(estado, 200)
+                self.assertIn(f'asistencia_curso_{self.curso.id}.{formato}', cabeceras['content-disposition'])
+                self.assertFalse([aviso for aviso in avisos if 'synchronous iterators' in aviso])
+                if formato == 'csv':
+                    self.assertEqual(len(cuerpo.decode('utf-8-sig').splitlines()), 1 + 6)
+                else:
+                    with zipfile.ZipFile(io.BytesIO(cuerpo)) as libro:
+                        self.assertEqual(libro.read('xl/worksheets/sheet1.xml').count(b'<row>'), 1 + 6)
+
+
+class MiniaturasTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=0, recursos=0)
+        self.perfil = Perfil.objects.get(user=self.profesor.user)
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def foto(self, ancho=400, alto=300):
+        datos = io.BytesIO()
+        Image.new('RGB', (ancho, alto), 'red').save(datos, 'JPEG')
+        return SimpleUploadedFile('foto.jpg', datos.getvalue(), content_type='image/jpeg')
+
+    def avatar(self, tamano=60):
+        return Template('{% load miniaturas %}{% avatar perfil ' + str(tamano) + ' class="tooltip-img" %}').render(
+            Context({'perfil': self.perfil})
+        )
+
+    def test_editar_perfil_encola_y_genera_las_miniaturas(self):
+        self.client.force_login(self.profesor.user)
+        self.client.post(reverse('editar_perfil'), {
+            'username': self.profesor.user.username, 'email': 'profe@correo.com', 'imagen': self.foto(),
+        })
+        self.perfil.refresh_from_db()
+        tarea = Tarea.objects.get(tipo='generar_miniaturas')
+        # Mientras no se generan se usa la original
+        self.assertIn(f'src="{self.perfil.imagen.url}"', self.avatar())
+
+        tareas.procesar_pendientes()
+        self.assertEqual(Tarea.objects.get(id=tarea.id).resultado, {'generadas': len(miniaturas.lados())})
+        for lado in miniaturas.lados():
+            with Image.open(default_storage.path(miniaturas.nombre_variante(self.perfil.imagen.name, lado))) as imagen:
+                self.assertEqual((imagen.format, imagen.size), ('WEBP', (lado, lado)))
+        html = self.avatar()
+        chica = default_storage.url(miniaturas.nombre_variante(self.perfil.imagen.name, 60))
+        doble = default_storage.url(miniaturas.nombre_variante(self.perfil.imagen.name, 120))
+        self.assertEqual(html, f'<img src="{chica}" width="60" height="60" class="tooltip-img" srcset="{chica} 1x, {doble} 2x">')
+        # Son publicas, como la imagen original
+        self.client.logout()
+        self.assertEqual(self.client.get(chica).status_code, 200)
+        self.assertEqual(self.client.get(self.perfil.imagen.url).status_code, 200)
+
+    def test_imagen_por_defecto_y_sin_perfil(self):
+        self.assertIn('perfiles/perfil_defecto.png', self.avatar())
+        self.perfil = ''
+        self.assertIn('perfiles/perfil_defecto.png', self.avatar())
+
+    def test_generar_todas(self):
+        self.perfil.imagen = self.foto(50, 80)
+        self.perfil.save()
+        self.assertEqual(miniaturas.generar_todas(procesos=0), {'imagenes': 1, 'generadas': 4, 'errores': 0})
+        self.assertEqual(miniaturas.generar_todas(procesos=0)['generadas'], 0)
+
+
+class ImportadorTests(TestCase):
+    PROFESORES = "email,nombre,especialidad\nAna@correo.com,Ana,Ingles\nbeto@correo.com,Beto,Frances\n"
+    CURSOS = (
+        "titulo,descripcion,fecha_inicio,fecha_fin,profesor\n"
+        "Ingles 1,Basico,2025-01-01,2025-06-01,ana@correo.com\n"
+        "Frances 1,Basico,2025-01-01,2025-06-01,beto@correo.com\n"
+        "Aleman 1,Basico,2025-01-01,2025-06-01,nadie@correo.com\n"
+        "Ruso 1,Basico,2025-13-01,2025-06-01,ana@correo.com\n"
+    )
+
+    def importar(self, tipo, texto, formato='csv', lote=2):
+        return importador.importar(tipo, io.StringIO(texto), formato, lote=lote)
+
+    def cargar_cursos(self):
+        self.importar('profesores', self.PROFESORES)
+        return self.importar('cursos', self.CURSOS)
+
+    def test_importa_en_lotes_y_reporta_errores(self):
+        self.assertEqual(self.importar('profesores', self.PROFESORES)['creados'], 2)
+        self.assertEqual(Perfil.objects.count(), 2)
+        self.assertEqual(Profesor.objects.get(email='ana@correo.com').user.username, 'ana@correo.com')
+
+        resultado = self.cargar_cursos()
+        self.assertEqual((resultado['filas'], resultado['creados'], resultado['errores']), (4, 2, 2))
+        self.assertEqual(sorted(resultado['detalle_errores']), [
+            (4, 'el profesor nadie@correo.com no existe'), (5, 'fecha_inicio no es una fecha AAAA-MM-DD'),
+        ])
+        # Repetir el archivo no duplica nada
+        self.assertEqual(self.importar('profesores', self.PROFESORES)['existentes'], 2)
+        self.assertEqual(self.cargar_cursos()['existentes'], 2)
+        self.assertEqual(Curso.objects.count(), 2)
+
+    def test_inscripciones_crean_estudiantes_y_resumenes(self):
+        self.cargar_cursos()
+        self.importar('recursos', "curso,titulo,enlace\nIngles 1,Video,http://a.com\nIngles 1,Guia,http://b.com\n")
+        inscripciones = "\n".join(json.dumps(fila) for fila in [
+            {'email': 'e1@correo.com', 'nombre': 'Eva', 'curso': 'Ingles 1'},
+            {'email': 'e2@correo.com', 'curso': 'Ingles 1'},
+            {'email': 'e1@correo.com', 'curso': 'Frances 1'},
+            {'email': 'e3@correo.com', 'curso': 'No existe'},
+            {'curso': 'Ingles 1'},
+        ]) + "\n{roto\n"
+        resultado = self.importar('inscripciones', inscripciones, 'jsonl')
+        self.assertEqual((resultado['creados'], resultado['errores']), (3, 3))
+        self.assertEqual(User.objects.filter(email__startswith='e').count(), 2)
+        self.assertEqual(Perfil.objects.count(), 4)
+        self.assertEqual(Inscripcion.objects.get(user__email='e1@correo.com', curso__titulo='Ingles 1').nombre_estudiante, 'Eva')
+        self.assertEqual(ResumenProgreso.objects.get(inscripcion__user__email='e2@correo.com').recursos_totales, 2)
+
+        # Sesiones y recursos nuevos actualizan los resumenes existentes
+        self.importar('sesiones', "curso,titulo,fecha\nIngles 1,S1,2025-02-01\nIngles 1,S2,2025-02-08\nFrances 1,S1,2025-02-01\n")
+        self.importar('recursos', "curso,titulo,enlace\nIngles 1,Video,http://a.com\nIngles 1,Audio,http://c.com\n")
+        self.assertEqual(verificar_resumenes(), [])
+        self.assertEqual(ResumenProgreso.objects.get(inscripcion__user__email='e2@correo.com').sesiones_totales, 2)
+
+    def test_invalida_el_catalogo(self):
+        self.importar('profesores', self.PROFESORES)
+        self.assertEqual(catalogo.ids_catalogo(), [])
+        self.cargar_cursos()
+        self.assertEqual(len(catalogo.ids_catalogo()), 2)
+
+    def test_comando(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as archivo:
+            archivo.write(self.PROFESORES)
+        self.addCleanup(os.remove, archivo.name)
+        salida = io.StringIO()
+        call_command('importar_datos', 'profesores', archivo.name, stdout=salida, stderr=io.StringIO())
+        self.assertIn('creados: 2', salida.getvalue())
+
+
+class ReportesTests(TestCase):
+    def setUp(self):
+        self.profesor = crear_datos(cursos=1, estudiantes=3, recursos=2)
+        self.curso = Curso.objects.get()
+        inscripciones = list(Inscripcion.objects.order_by('id'))
+        sesiones = [
+            Sesion.objects.create(curso=self.curso, titulo='Clase 2', fecha=date(2025, 2, 8)),
+            Sesion.objects.create(curso=self.curso, titulo='Clase 1', fecha=date(2025, 2, 1)),
+        ]
+        Asistencia.objects.create(inscripcion=inscripciones[0], sesion=sesiones[0], presente=True)
+        Asistencia.objects.create(inscripcion=inscripciones[0], sesion=sesiones[1], presente=True)
+        Asistencia.objects.create(inscripcion=inscripciones[2], sesion=sesiones[1], presente=False)
+        # Datos de otro curso no se mezclan
+        crear_datos(cursos=1, estudiantes=2, username='otro')
+
+    def leer_xlsx(self, contenido):
+        with zipfile.ZipFile(io.BytesIO(contenido)) as libro:
+            self.assertIn('xl/workbook.xml', libro.namelist())
+            hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+        ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        filas = []
+        for fila in hoja.iter(ns + 'row'):
+            filas.append([
+                ''.join(celda.itertext()) if celda.get('t') == 'inlineStr' else float(celda.findtext(ns + 'v') or 'nan')
+                for celda in fila
+            ])
+        return filas
+
+    def test_matriz_de_asistencia(self):
+        filas = list(reportes.asistencia(self.curso))
+        self.assertEqual(filas[0], ['Estudiante', 'Usuario', 'Email', 'Clase 1 (01/02/2025)', 'Clase 2 (08/02/2025)', 'Asistidas', 'Porcentaje'])
+        self.assertEqual(filas[1], ['Estudiante 0', 'profe_est_0_0', 'est@correo.com', 1, 1, 2, 100.0])
+        self.assertEqual(filas[2][3:], ['', '', 0, 0.0])
+        self.assertEqual(filas[3][3:], [0, '', 0, 0.0])
+        self.assertEqual(len(filas), 4)
+
+    def test_matriz_de_progreso(self):
+        filas = list(reportes.progreso(self.curso))
+        self.assertEqual(filas[0], ['Estudiante', 'Usuario', 'Email', 'Recurso 0', 'Recurso 1', 'Completados', 'Porcentaje'])
+        self.assertEqual([fila[3:] for fila in filas[1:]], [[1, 0, 1, 50.0], [0, 0, 0, 0.0], [1, 0, 1, 50.0]])
+
+    def test_consultas_constantes(self):
+        def exportar():
+            for _ in reportes.como_csv(reportes.progreso(self.curso)):
+                pass
+        antes = contar_consultas(exportar)
+        for e in range(20):
+            inscripcion = Inscripcion.objects.create(curso=self.curso, nombre_estudiante=f'Nuevo {e}', email_estudiante='n@correo.com')
+            Progreso.objects.create(inscripcion=inscripcion, recurso=Recurso.objects.filter(curso=self.curso).first(), completado=True)
+        self.assertEqual(contar_consultas(exportar), antes)
+
+    def test_csv_y_xlsx(self):
+        Inscripcion.objects.create(curso=self.curso, nombre_estudiante='=HYPERLINK("x") & <b>', email_estudiante='x@correo.com')
+        texto = ''.join(reportes.como_csv(reportes.asistencia(self.curso)))
+        self.assertTrue(texto.startswith('\ufeff'))
+        filas = list(csv.reader(io.StringIO(texto[1:])))
+        self.assertEqual(filas[1][3:], ['1', '1', '2', '100.0'])
+        self.assertEqual(filas[-1][0], "'=HYPERLINK(\"x\") & <b>")
+
+        filas = self.leer_xlsx(b''.join(reportes.como_xlsx(reportes.asistencia(self.curso))))
+        self.assertEqual(filas[0][3], 'Clase 1 (01/02/2025)')
+        self.assertEqual(filas[1][3:], [1.0, 1.0, 2.0, 100.0])
+        self.assertEqual(filas[-1][0], '=HYPERLINK("x") & <b>')
+        self.assertEqual(len(filas), 5)
+
+    def test_vista_solo_para_el_profesor(self):
+        url = reverse('exportar_reporte', args=[self.curso.id, 'progreso', 'xlsx'])
+        self.client.force_login(User.objects.get(username='otro'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.profesor.user)
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        self.assertIn('progreso_curso_%d.xlsx' % self.curso.id, respuesta['Content-Disposition'])
+        self.assertEqual(self.leer_xlsx(b''.join(respuesta.streaming_content))[1][3:], [1.0, 0.0, 1.0, 50.0])
+        self.assertEqual(self.client.get(reverse('exportar_reporte', args=[self.curso.id, 'notas', 'csv'])).status_code, 404)
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('exportar_reporte', self.curso.id, 'asistencia', stdout=salida)
+        self.assertIn('Estudiante 0,profe_est_0_0,est@correo.com,1,1,2,100.0', salida.getvalue())
+        with tempfile.TemporaryDirectory() as carpeta:
+            destino = os.path.join(carpeta, 'progreso.xlsx')
+            call_command('exportar_reporte', self.curso.id, 'progreso', salida=destino, stderr=io.StringIO())
+            with open(destino, 'rb') as archivo:
+                self.assertEqual(len(self.leer_xlsx(archivo.read())), 4)
+
+
+# TransactionTestCase: la API de respaldo no copia una BD con una transaccion de escritura abierta
+class RespaldoTests(TransactionTestCase):
+    def setUp(self):
+        crear_datos(cursos=2, estudiantes=3)
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.base = os.path.join(carpeta.name, 'respaldos')
+        self.destino = os.path.join(carpeta.name, 'restaurada.sqlite3')
+
+    def test_respaldo_incremental(self):
+        carpeta, manifiesto = respaldo.respaldar(self.base, procesos=0)
+        self.assertEqual(manifiesto['tablas']['Cursos_curso']['filas'], 2)
+        self.assertEqual(manifiesto['tablas']['Cursos_inscripcion']['filas'], 6)
+        self.assertNotIn('django_session', manifiesto['tablas'])
+        self.assertNotIn('Cursos_curso_fts_data', manifiesto['tablas'])
+        self.assertFalse(os.path.exists(os.path.join(carpeta, 'instantanea.sqlite3')))
+
+        Curso.objects.filter(titulo='Curso 0').update(titulo='Curso nuevo')
+        segunda, manifiesto = respaldo.respaldar(self.base, procesos=0)
+        cambiadas = [tabla for tabla, info in manifiesto['tablas'].items() if not info['reutilizado']]
+        self.assertEqual(cambiadas, ['Cursos_curso'])
+        # Las tablas sin cambios comparten el archivo con el respaldo anterior
+        self.assertEqual(
+            os.stat(os.path.join(carpeta, 'Cursos_inscripcion.jsonl.gz')).st_ino,
+            os.stat(os.path.join(segunda, 'Cursos_inscripcion.jsonl.gz')).st_ino,
+        )
+        self.assertEqual(respaldo.respaldos(self.base), [carpeta, segunda])
+        self.assertEqual(respaldo.podar(1, self.base), 1)
+        self.assertEqual(respaldo.verificar(segunda, procesos=0), {})
+
+    def test_restaura_y_verifica(self):
+        carpeta, manifiesto = respaldo.respaldar(self.base, procesos=0)
+        conteos = respaldo.restaurar(carpeta, self.destino, procesos=0)
+        self.assertEqual(conteos['Cursos_progreso'], Progreso.objects.count())
+        with sqlite3.connect(self.destino) as conexion:
+            self.assertEqual(conexion.execute('SELECT COUNT(*) FROM Cursos_inscripcion').fetchone()[0], 6)
+            self.assertEqual(conexion.execute('SELECT COUNT(*) FROM django_session').fetchone()[0], 0)
+            # Indice de busqueda reconstruido y triggers de nuevo activos
+            buscar = "SELECT COUNT(*) FROM Cursos_curso_fts WHERE Cursos_curso_fts MATCH 'curso'"
+            self.assertEqual(conexion.execute(buscar).fetchone()[0], 2)
+            conexion.execute("UPDATE Cursos_curso SET titulo = 'Aleman' WHERE titulo = 'Curso 1'")
+            self.assertEqual(conexion.execute(buscar.replace("'curso'", "'aleman'")).fetchone()[0], 1)
+        conexion.close()
+
+    def test_detecta_archivos_alterados(self):
+        carpeta, _ = respaldo.respaldar(self.base, procesos=0)
+        with gzip.open(os.path.join(carpeta, 'Cursos_curso.jsonl.gz'), 'ab') as archivo:
+            archivo.write(b'[99,"Otro","-","2025-01-01","2025-06-01",1]\n')
+        self.assertEqual(list(respaldo.verificar(carpeta, procesos=0)), ['Cursos_curso'])
+        with self.assertRaises(respaldo.RespaldoInvalido):
+            respaldo.restaurar(carpeta, self.destino, procesos=0)
+        self.assertFalse(os.path.exists(self.destino))
+
+
+class EscriturasTests(TransactionTestCase):
+    def test_pragmas_al_conectar(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -65536)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_reintenta_si_la_bd_esta_bloqueada(self):
+        llamadas = []
+
+        @escrituras.escritura
+        def crear():
+            llamadas.append(connection.in_atomic_block)
+            User.objects.create(username=f'u{len(llamadas)}')
+            if len(llamadas) < 3:
+                raise OperationalError('database is locked')
+            return len(llamadas)
+
+        self.assertEqual(crear(), 3)
+        self.assertEqual(llamadas, [True, True, True])
+        # Los intentos fallidos se deshicieron
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['u3'])
+
+        with self.settings(ESCRITURAS_INTENTOS=2):
+            llamadas.clear()
+            with self.assertRaises(OperationalError):
+                crear()
+        self.assertEqual(len(llamadas), 2)
+
+    def test_otros_errores_y_transaccion_externa(self):
+        llamadas = []
+
+        @escrituras.escritura
+        def fallar():
+            llamadas.append(1)
+            raise OperationalError('no such table: x')
+
+        with self.assertRaises(OperationalError):
+            fallar()
+        self.assertEqual(len(llamadas), 1)
+        # Dentro de otra transaccion no se reintenta: la de afuera ya quedo invalida
+        with self.assertRaises(OperationalError), transaction.atomic():
+            fallar()
+        self.assertEqual(len(llamadas), 2)
+
+    def test_completar_recurso(self):
+        crear_datos(estudiantes=2, recursos=2)
+        inscripcion = Inscripcion.objects.order_by('id').last()
+        recurso = Recurso.objects.order_by('id').last()
+        progreso.completar_recurso(inscripcion, recurso)
+        progreso.completar_recurso(inscripcion, recurso)
+        self.assertTrue(Progreso.objects.get(inscripcion=inscripcion, recurso=recurso).completado)
+        self.assertEqual(ResumenProgreso.objects.get(inscripcion=inscripcion).recursos_completados, 1)
+        self.assertEqual(verificar_resumenes(Inscripcion.objects.filter(id=inscripcion.id)), [])
+
+
+# En los tests la replica es un espejo de default (TEST MIRROR); la fecha de la ultima
+# sincronizacion se simula
+class ReplicaTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def sincronizada(self, momento):
+        parche = mock.patch.object(replicas, 'ultima_sincronizacion', return_value=momento)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_enrutamiento(self):
+        self.sincronizada(time.time())
+        self.assertEqual(Curso.objects.all().db, 'default')
+        with replicas.lecturas_en_replica() as estado:
+            self.assertEqual(Curso.objects.all().db, 'replica')
+            with transaction.atomic():
+                self.assertEqual(Curso.objects.all().db, 'default')
+            self.assertEqual(router.db_for_write(Curso), 'default')
+            # Despues de escribir se lee de la principal
+            self.assertTrue(estado.escribio)
+            self.assertEqual(Curso.objects.all().db, 'default')
+        self.assertFalse(router.allow_migrate('replica', 'Cursos'))
+
+    def test_replica_atrasada(self):
+        self.sincronizada(time.time() - settings.REPLICA_RETRASO_MAXIMO - 1)
+        with replicas.lecturas_en_replica():
+            self.assertEqual(Curso.objects.all().db, 'default')
+
+    def test_lee_sus_propias_escrituras(self):
+        crear_datos(estudiantes=1)
+        inscripcion = Inscripcion.objects.get()
+        self.client.force_login(inscripcion.user)
+        respuesta = self.client.post(reverse('marcar_completado', args=[Recurso.objects.first().id]))
+        escrito_en = float(respuesta.cookies[replicas.COOKIE].value)
+
+        def consultas_en_replica():
+            with CaptureQueriesContext(connections['replica']) as consultas:
+                self.assertEqual(self.client.get(reverse('progreso_estudiante')).status_code, 200)
+            return len(consultas)
+
+        # La replica se sincronizo antes de la escritura: se lee de default
+        self.sincronizada(escrito_en - 1)
+        self.assertEqual(consultas_en_replica(), 0)
+        mock.patch.stopall()
+        self.sincronizada(escrito_en + 1)
+        self.assertGreater(consultas_en_replica(), 0)
+
+    def test_middleware_async_sin_adaptar(self):
+        self.assertNotIn('middleware Cursos.replicas.ReplicaMiddleware', middlewares_adaptados())
+        self.sincronizada(time.time())
+
+        async def vista(request):
+            # La vista async ve el estado de la peticion y escribe
+            self.assertEqual(replicas.alias_de_lectura(), None)
+            replicas._estado.get().escribio = True
+            return HttpResponse()
+
+        middleware = replicas.ReplicaMiddleware(vista)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        respuesta = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn(replicas.COOKIE, respuesta.cookies)
+        self.assertIsNone(replicas._estado.get())
+
+    def test_sincroniza_con_la_api_de_respaldo(self):
+        crear_datos(cursos=2)
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = replicas.sincronizar(os.path.join(carpeta, 'replica.sqlite3'))
+            self.assertAlmostEqual(replicas.ultima_sincronizacion(ruta), time.time(), delta=5)
+            crear_datos(cursos=1, username='otro')
+            replicas.sincronizar(ruta)
+            conexion = sqlite3.connect(ruta)
+            self.assertEqual(conexion.execute('SELECT COUNT(*) FROM Cursos_curso').fetchone()[0], 3)
+            conexion.close()
+
+
+# Como en produccion con una cache compartida (Redis, Memcached)
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', USUARIOS_EN_CACHE=True)
+class SesionCacheadaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def redireccion(self):
+        return self.client.get(reverse('login_redirect'))['Location']
+
+    def test_peticion_caliente_sin_consultas_de_autenticacion(self):
+        profesor = crear_datos()
+        inscripcion = Inscripcion.objects.select_related('user').get()
+        for user, destino in ((profesor.user, 'dashboard'), (inscripcion.user, 'lista_cursos')):
+            self.client.force_login(user)
+            # La primera peticion llena la cache con el usuario y su rol
+            self.redireccion()
+            with self.assertNumQueries(0):
+                self.assertEqual(self.redireccion(), reverse(destino))
+
+        # Solo quedan las consultas de la vista: curso, inscripciones, si esta inscrito y similares
+        url = reverse('detalle_curso', args=[inscripcion.curso_id])
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_cambios_de_rol_invalidan_la_cache(self):
+        user = User.objects.create(username='ana')
+        self.client.force_login(user)
+        self.assertEqual(self.redireccion(), reverse('lista_cursos'))
+
+        Profesor.objects.create(user=user, nombre='Ana', email='ana@correo.com', especialidad='Ingles')
+        self.assertEqual(self.redireccion(), reverse('dashboard'))
+        perfil = Perfil.objects.get(user=user)
+        perfil.biografia = 'Hola'
+        perfil.save()
+        self.assertEqual(self.client.get(reverse('perfil_usuario')).context['perfil'].biografia, 'Hola')
+
+        user.is_active = False
+        user.save()
+        self.assertTrue(self.redireccion().startswith(settings.LOGIN_URL))
+
+    def test_sesiones_anteriores_siguen_abiertas(self):
+        user = User.objects.create(username='ana')
+        # Sesion iniciada cuando el unico backend era ModelBackend
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.redireccion(), reverse('lista_cursos'))
+
+    def test_middleware_async_sin_adaptar(self):
+        # Con ASGI ningun middleware de la cadena pasa por sync_to_async / async_to_sync.
+        # InstrumentacionMiddleware se adapta pero se descarta (MiddlewareNotUsed) si no esta activa
+        self.assertEqual([nombre for nombre in middlewares_adaptados() if 'instrumentacion' not in nombre], [])
+
+    def test_sesion_con_copia_en_la_bd(self):
+        user = User.objects.create(username='ana')
+        self.client.force_login(user)
+        # Sin la cache (reinicio del servidor) la sesion se lee de la BD
+        cache.clear()
+        self.assertEqual(self.redireccion(), reverse('lista_cursos'))
+
+
+class SesionSinCacheCompartidaTests(TestCase):
+    def redireccion(self):
+        return self.client.get(reverse('login_redirect'))['Location']
+
+    def test_con_cache_por_proceso_se_lee_la_bd(self):
+        self.assertFalse(settings.CACHE_COMPARTIDA)
+        self.assertEqual(settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+        user = User.objects.create(username='ana')
+        self.client.force_login(user)
+        self.assertEqual(self.redireccion(), reverse('lista_cursos'))
+        self.assertIsNone(cache.get(f'usuario:{user.pk}'))
+
+        # Otro worker lo desactiva sin senales (su cache no es la nuestra): se nota igual
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        self.assertTrue(self.redireccion().startswith(settings.LOGIN_URL))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AltaUsuariosTests(TestCase):
+    def test_registro_crea_el_perfil(self):
+        self.client.post(reverse('registro_usuario'), {
+            'username': 'ana', 'email': 'ana@correo.com', 'password1': 'Clave-segura-123', 'password2': 'Clave-segura-123',
+        })
+        self.assertTrue(Perfil.objects.filter(user__username='ana').exists())
+
+    def test_guardar_usuario_no_toca_el_perfil(self):
+        user = User.objects.create_user('ana', password='clave')
+        sin_perfil = User.objects.bulk_create([User(username='sin_perfil')])[0]
+        with CaptureQueriesContext(connection) as consultas:
+            user.save()
+            sin_perfil.save()
+            self.assertTrue(self.client.login(username='ana', password='clave'))
+        self.assertFalse([c['sql'] for c in consultas if 'Cursos_perfil' in c['sql']])
+        self.assertEqual(Perfil.objects.count(), 1)
+
+    def test_alta_en_lote(self):
+        usuarios = preparar_usuarios(
+            [{'username': f'e{i}', 'email': f'e{i}@correo.com', 'password': 'clave'} for i in range(5)]
+            + [{'username': 'sin_clave'}]
+        )
+        # Un INSERT de usuarios y uno de perfiles, sin senales
+        with self.assertNumQueries(2):
+            crear_usuarios(usuarios)
+        self.assertEqual(Perfil.objects.filter(user__in=usuarios).count(), 6)
+        self.assertTrue(User.objects.get(username='e3').check_password('clave'))
+        self.assertFalse(User.objects.get(username='sin_clave').has_usable_password())
+
+
+class RecomendacionesTests(TestCase):
+    def setUp(self):
+        profesor = crear_datos(cursos=0, estudiantes=0)
+        textos = {
+            'ingles': ('Ingles basico', 'Gramatica inglesa y vocabulario'),
+            'ingles2': ('Ingles intermedio', 'Gramatica inglesa avanzada y conversacion'),
+            'cocina': ('Cocina italiana', 'Pastas, salsas y pizzas'),
+            'reposteria': ('Reposteria', 'Postres y pasteles'),
+        }
+        self.cursos = {
+            clave: Curso.objects.create(
+                titulo=titulo, descripcion=descripcion, profesor=profesor,
+                fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1),
+            )
+            for clave, (titulo, descripcion) in textos.items()
+        }
+        self.estudiantes = {}
+        for nombre, cursos in {
+            'e1': ['ingles', 'ingles2'], 'e2': ['ingles', 'ingles2'], 'e3': ['cocina', 'reposteria'],
+            'nuevo': ['ingles'], 'sin_cursos': [],
+        }.items():
+            user = self.estudiantes[nombre] = User.objects.create(username=nombre)
+            for clave in cursos:
+                Inscripcion.objects.create(
+                    user=user, curso=self.cursos[clave], nombre_estudiante=nombre, email_estudiante=f'{nombre}@correo.com',
+                )
+        Perfil.objects.filter(user=self.estudiantes['sin_cursos']).update(intereses='Cocina italiana, pastas')
+        self.resultado = recomendaciones.recalcular(top=3)
+
+    def recomendados(self, **origen):
+        return list(Recomendacion.objects.filter(**origen).order_by('posicion').values_list('recomendado_id', flat=True))
+
+    def test_parecidos_por_curso_y_por_estudiante(self):
+        cursos = self.cursos
+        self.assertEqual(self.recomendados(curso_origen=cursos['ingles'])[0], cursos['ingles2'].id)
+        self.assertEqual(self.recomendados(curso_origen=cursos['cocina'])[0], cursos['reposteria'].id)
+        # Lo que ya cursa no se le recomienda
+        nuevo = self.recomendados(user=self.estudiantes['nuevo'])
+        self.assertEqual(nuevo[0], cursos['ingles2'].id)
+        self.assertNotIn(cursos['ingles'].id, nuevo)
+        # Sin inscripciones, por sus intereses
+        self.assertEqual(self.recomendados(user=self.estudiantes['sin_cursos'])[0], cursos['cocina'].id)
+        self.assertEqual(self.resultado['cursos'], 4)
+        # Volver a calcular reemplaza las filas
+        self.assertEqual(recomendaciones.recalcular(top=3)['filas'], Recomendacion.objects.count())
+
+    def test_vistas_leen_las_recomendaciones(self):
+        self.client.force_login(self.estudiantes['nuevo'])
+        respuesta = self.client.get(reverse('lista_cursos'))
+        self.assertEqual(respuesta.context['recomendadas'][0]['id'], self.cursos['ingles2'].id)
+        respuesta = self.client.get(reverse('detalle_curso', args=[self.cursos['ingles'].id]))
+        self.assertEqual(respuesta.context['similares'][0], self.cursos['ingles2'])
+        self.assertContains(respuesta, 'Cursos similares')
+
+    def test_tarea(self):
+        tarea = tareas.encolar('calcular_recomendaciones')
+        tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        self.assertEqual(tarea.resultado['cursos'], 4)
@@ -6,6 +6,8 @@ urlpatterns = [
     # path('', views.vistaInicial, name='inicio'),
     # vista inicial, tabla de cursos
     path('', views.lista_cursos, name='lista_cursos'),
+    # catalogo en JSON paginado y con busqueda
+    path('api/cursos/', views.api_cursos, name='api_cursos'),
     # vista de detalle de cada curso
     path("curso/<int:curso_id>/", views.detalle_curso, name="detalle_curso"),
     # vista para la inscripción a un curso
@@ -41,7 +43,19 @@ urlpatterns = [
     # certificado
     path('certificado/<int:user>', views.certificado, name='certificado'),
     # lista sesiones
-    path('lista_sesiones/', views.lista_sesion, name='lista_sesiones')
+    path('lista_sesiones/', views.lista_sesion, name='lista_sesiones'),
+    # subida de material por partes
+    path('curso/<int:curso_id>/subidas/', views.crear_subida_material, name='crear_subida_material'),
+    path('subidas/<uuid:token>/', views.estado_subida, name='estado_subida'),
+    path('subidas/<uuid:token>/<int:numero>/', views.subir_fragmento, name='subir_fragmento'),
+    path('subidas/<uuid:token>/completar/', views.completar_subida, name='completar_subida'),
+    # reportes de asistencia y progreso (CSV / XLSX)
+    path('curso/<int:curso_id>/reporte/<str:reporte>.<str:formato>', views.exportar_reporte, name='exportar_reporte'),
+    # tareas en segundo plano
+    path('curso/<int:curso_id>/emitir_certificados/', views.emitir_certificados_curso, name='emitir_certificados_curso'),
+    path('tareas/<int:tarea_id>/', views.estado_tarea, name='estado_tarea'),
+    # resumen de la instrumentacion (solo staff)
+    path('instrumentacion/', views.resumen_instrumentacion, name='instrumentacion'),
 ]
 
 
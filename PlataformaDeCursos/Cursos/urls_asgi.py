@@ -0,0 +1,18 @@
+from django.urls import URLPattern
+
+from . import urls, vistas_async
+
+# Vistas que tienen version async (ver vistas_async.py), por nombre de URL
+VISTAS_ASYNC = {
+    'lista_cursos': vistas_async.lista_cursos,
+    'detalle_curso': vistas_async.detalle_curso,
+    'progreso_estudiante': vistas_async.progreso_estudiante,
+    'ver_recurso': vistas_async.ver_recurso,
+    'dashboard': vistas_async.dashboard,
+}
+
+# Mismas rutas que urls.py, cambiando solo la vista
+urlpatterns = [
+    URLPattern(patron.pattern, VISTAS_ASYNC[patron.name], name=patron.name)
+    for patron in urls.urlpatterns if patron.name in VISTAS_ASYNC
+]
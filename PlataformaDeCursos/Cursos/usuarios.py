@@ -0,0 +1,42 @@
+#  ---- ALTA DE USUARIOS EN LOTE ----
+# Un User creado de a uno (registro, User.objects.create) recibe su Perfil con la senal de
+# signals.py: un INSERT mas y las senales de Perfil por cada usuario. Para importaciones y
+# altas masivas (un grupo entero que se registra a la vez) crear_usuarios guarda los User y sus
+# Perfil con bulk_create, que no dispara senales: dos INSERT por lote en una transaccion.
+# Las contraseñas se cifran antes, fuera de la transaccion y en varios hilos (hashlib suelta el
+# GIL mientras calcula): el hasher es lo que mas tarda en un alta.
+#  - python manage.py benchmark_usuarios   --> registros y logins por segundo, antes y despues
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from .escrituras import escritura
+from .models import Perfil
+
+LOTE = 500
+HILOS = 4
+
+
+# datos: dicts con username y opcionalmente email, first_name, last_name y password (sin
+# password la contraseña queda inutilizable). Devuelve los User sin guardar
+def preparar_usuarios(datos, hilos=HILOS):
+    datos = list(datos)
+    with ThreadPoolExecutor(hilos) as grupo:
+        contrasenas = list(grupo.map(make_password, [dato.get('password') for dato in datos]))
+    return [
+        User(
+            username=dato['username'], email=dato.get('email', ''), first_name=dato.get('first_name', ''),
+            last_name=dato.get('last_name', ''), password=contrasena,
+        )
+        for dato, contrasena in zip(datos, contrasenas)
+    ]
+
+
+# Guarda los usuarios (con la contraseña ya cifrada) y un Perfil para cada uno. Los nombres de
+# usuario tienen que estar libres: si alguno ya existe falla todo el lote (IntegrityError)
+@escritura
+def crear_usuarios(usuarios, lote=LOTE):
+    User.objects.bulk_create(usuarios, batch_size=lote)
+    Perfil.objects.bulk_create([Perfil(user_id=usuario.id) for usuario in usuarios], batch_size=lote)
+    return usuarios
@@ -1,42 +1,99 @@
+import uuid
 from datetime import date
+from django.conf import settings
 from django.contrib.auth import login, update_session_auth_hash
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.forms import PasswordChangeForm, UserChangeForm
-from django.http import HttpResponseForbidden
+from django.db import transaction
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import content_disposition_header
 from .forms import EditarPerfilForm,InscripcionForm,MaterialExtraForm,PerfilForm,RegistroUsuarioForm, SesionForm
-from .models import Curso, Inscripcion, MaterialExtra, Perfil, Profesor, Progreso, Recurso, Asistencia, Sesion
+from .models import Certificado, Curso, Inscripcion, MaterialExtra, Perfil, Progreso, Recurso, Sesion, SubidaArchivo, Tarea
+from . import busqueda, catalogo, descargas, flujos, instrumentacion, miniaturas, progreso, recomendaciones, reportes, subidas, tareas
+from .asistencia import guardar_asistencias, inscripciones_con_asistencia, presentes_del_formulario
+from .certificados import MINIMO_ASISTENCIA
+from .progreso import progreso_por_profesor
+from .replicas import alias_de_lectura, lectura_en_replica
 
 # Create your views here.
 # Verifica si el usuario tiene asociado un profesor para inicio de Sesion y redirecciones
 @login_required
 def login_redirect(request):
-    if hasattr(request.user, 'profesor'):
+    if request.rol.es_profesor:
         return redirect('dashboard')
     else:
         return redirect('lista_cursos')
 
 # Lista de los cursos en la pagina principal
 def lista_cursos(request):
-    cursos = Curso.objects.all()
-    cursos_inscritos_ids = []
+    cursos_inscritos_ids = set()
     
     # Verficia si el usuario ya se encuentra inscrito a la materia
     if request.user.is_authenticated:
-        cursos_inscritos_ids = Inscripcion.objects.filter(user=request.user).values_list('curso_id', flat=True)
-
+        cursos_inscritos_ids = set(Inscripcion.objects.filter(user=request.user).values_list('curso_id', flat=True))
+
+    # El HTML de cada curso sale de la cache, la inscripcion del usuario se agrega aqui
+    tarjetas = [
+        {'id': curso_id, 'html': html, 'inscrito': curso_id in cursos_inscritos_ids}
+        for curso_id, html in catalogo.tarjetas()
+    ]
+    # Recomendaciones precalculadas para el estudiante (recomendaciones.py), una consulta
+    recomendadas = []
+    if request.rol.es_estudiante:
+        recomendadas = recomendaciones.tarjetas_recomendadas(
+            recomendaciones.ids_para_usuario(request.user.id), tarjetas, cursos_inscritos_ids
+        )
     return render(request, 'cursos/cursos.html', {
-        'cursos': cursos,
-        'cursos_inscritos_ids': cursos_inscritos_ids
+        'tarjetas': tarjetas,
+        'recomendadas': recomendadas,
+    })
+
+# Catalogo en JSON, paginado por cursor y con busqueda
+# parametros: q, especialidad, desde, hasta (AAAA-MM-DD), cursor, tamano
+@lectura_en_replica
+def api_cursos(request):
+    try:
+        desde = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else None
+        hasta = date.fromisoformat(request.GET['hasta']) if request.GET.get('hasta') else None
+        tamano = int(request.GET.get('tamano', busqueda.TAMANO_PAGINA))
+        cursos, siguiente = busqueda.buscar_cursos(
+            texto=request.GET.get('q', ''),
+            especialidad=request.GET.get('especialidad'),
+            desde=desde,
+            hasta=hasta,
+            cursor=request.GET.get('cursor'),
+            tamano=tamano,
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Parametros invalidos'}, status=400)
+
+    return JsonResponse({
+        'resultados': [{
+            'id': curso.id,
+            'titulo': curso.titulo,
+            'descripcion': curso.descripcion,
+            'fecha_inicio': curso.fecha_inicio,
+            'fecha_fin': curso.fecha_fin,
+            'profesor': curso.profesor.nombre,
+            'especialidad': curso.profesor.especialidad,
+            'url': reverse('detalle_curso', args=[curso.id]),
+        } for curso in cursos],
+        'siguiente': siguiente,
     })
 
 # muesta a detalles las fehas de inicio y fin como tambien los usuarios inscritos en cada curso
 
 @login_required
+@lectura_en_replica
 def detalle_curso(request, curso_id):
-    curso = get_object_or_404(Curso, id=curso_id)
-    inscripciones = Inscripcion.objects.filter(curso=curso)
-    es_profesor = hasattr(request.user, 'profesor')
+    curso = get_object_or_404(Curso.objects.select_related('profesor'), id=curso_id)
+    # La plantilla muestra el usuario de cada inscripcion: se trae en la misma consulta
+    inscripciones = Inscripcion.objects.filter(curso=curso).select_related('user')
+    es_profesor = request.rol.es_profesor
     
     # verifica si  el usuario inscrito en este curso
     esta_inscrito = Inscripcion.objects.filter(user=request.user, curso=curso).exists() if request.user.is_authenticated else False
@@ -45,7 +102,8 @@ def detalle_curso(request, curso_id):
         'curso': curso,
         'inscripciones': inscripciones,
         'es_profesor': es_profesor,
-        'esta_inscrito': esta_inscrito
+        'esta_inscrito': esta_inscrito,
+        'similares': [recomendacion.recomendado for recomendacion in recomendaciones.similares(curso.id)],
     })
 
 
@@ -58,7 +116,7 @@ def inscribirse_curso(request, curso_id):
     user = request.user
     
     # Evita que un profesor se inscriba
-    if hasattr(request.user, 'profesor'):
+    if request.rol.es_profesor:
         messages.error(request, "Los profesores no pueden inscribirse.")
         return redirect('lista_cursos')
     
@@ -74,7 +132,9 @@ def inscribirse_curso(request, curso_id):
                 }
             )
             messages.success(request, '¡Te has inscrito correctamente al curso!')
-            if not created:
+            if created:
+                progreso.obtener_resumen(inscripcion)
+            else:
                 # Si ya existe manda este mensaje de error
                 form.add_error(None, 'Ya estás inscrito en este curso.')
             return redirect('detalle_curso', curso_id=curso.id)
@@ -100,17 +160,25 @@ def subir_material_extra(request, curso_id):
         if form.is_valid():
             material = form.save(commit=False)
             material.curso = curso
-            material.profesor = Profesor.objects.get(user=request.user)
-            material.save()
-
-            # 🔥 Crear Recurso automáticamente
-            Recurso.objects.create(
-                titulo=material.titulo,
-                descripcion=material.descripcion,
-                tipo_archivo="Archivo",
-                enlace=material.archivo.url,
-                curso=curso
-            )
+            material.profesor = request.rol.profesor
+            material.tamano = material.archivo.size
+            with transaction.atomic():
+                try:
+                    subidas.verificar_espacio(curso, material.tamano)
+                except subidas.SubidaInvalida as error:
+                    messages.error(request, str(error))
+                    return redirect('subir_material_extra', curso_id=curso.id)
+                material.save()
+
+                # 🔥 Crear Recurso automáticamente
+                Recurso.objects.create(
+                    titulo=material.titulo,
+                    descripcion=material.descripcion,
+                    tipo_archivo="Archivo",
+                    enlace=material.archivo.url,
+                    curso=curso
+                )
+                progreso.registrar_recurso_nuevo(curso)
 
             return redirect('subir_material_extra', curso_id=curso.id)
     else:
@@ -124,6 +192,84 @@ def subir_material_extra(request, curso_id):
         'material_extra': material_extra,
     })
     
+#  ---- SUBIDA POR PARTES (API JSON, ver subidas.py) ----
+
+def datos_subida(subida):
+    return {
+        'token': str(subida.token),
+        'estado': subida.estado,
+        'tamano': subida.tamano,
+        'tamano_fragmento': subida.tamano_fragmento,
+        'total_fragmentos': subida.total_fragmentos,
+        'faltantes': subidas.fragmentos_faltantes(subida) if subida.estado == SubidaArchivo.ABIERTA else [],
+        'url': reverse('estado_subida', args=[subida.token]),
+    }
+
+
+# Inicia una subida: POST con titulo, descripcion, nombre, tamano y sha256 (opcional) del archivo
+@login_required
+def crear_subida_material(request, curso_id):
+    curso = get_object_or_404(Curso, id=curso_id)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Use POST'}, status=405)
+    if not request.rol.dicta(curso):
+        return HttpResponseForbidden("Solo el profesor del curso puede subir material.")
+    try:
+        subida = subidas.crear_subida(
+            curso, request.rol.profesor,
+            titulo=request.POST['titulo'],
+            descripcion=request.POST.get('descripcion', ''),
+            nombre_archivo=request.POST['nombre'],
+            tamano=int(request.POST['tamano']),
+            sha256=request.POST.get('sha256', ''),
+        )
+    except (KeyError, ValueError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(datos_subida(subida), status=201)
+
+
+def _subida_del_profesor(request, token):
+    return get_object_or_404(SubidaArchivo, token=token, profesor__user=request.user)
+
+
+# GET: estado y fragmentos faltantes (para continuar una subida cortada). DELETE: cancelar
+@login_required
+def estado_subida(request, token):
+    subida = _subida_del_profesor(request, token)
+    if request.method == 'DELETE':
+        subidas.cancelar_subida(subida)
+    return JsonResponse(datos_subida(subida))
+
+
+# PUT con el contenido del fragmento y la cabecera X-Checksum-Sha256
+@login_required
+def subir_fragmento(request, token, numero):
+    subida = _subida_del_profesor(request, token)
+    if request.method != 'PUT':
+        return JsonResponse({'error': 'Use PUT'}, status=405)
+    try:
+        sha256 = subidas.guardar_fragmento(
+            subida, numero, request,
+            longitud=int(request.META.get('CONTENT_LENGTH') or 0),
+            sha256=request.headers.get('X-Checksum-Sha256', ''),
+        )
+    except subidas.SubidaInvalida as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({'numero': numero, 'sha256': sha256})
+
+
+@login_required
+def completar_subida(request, token):
+    subida = _subida_del_profesor(request, token)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Use POST'}, status=405)
+    try:
+        material = subidas.completar_subida(subida)
+    except subidas.SubidaInvalida as error:
+        return JsonResponse({'error': str(error), **datos_subida(subida)}, status=400)
+    return JsonResponse({**datos_subida(subida), 'material': material.id, 'archivo': material.archivo.url}, status=201)
+
+
 # Eliminar material extra
 @login_required
 def eliminar_material_extra(request, material_id):
@@ -134,10 +280,13 @@ def eliminar_material_extra(request, material_id):
 
     curso_id = material.curso.id
     
-    Recurso.objects.filter(titulo=material.titulo, curso=material.curso).delete()
+    with transaction.atomic():
+        recursos = Recurso.objects.filter(titulo=material.titulo, curso=material.curso)
+        progreso.registrar_recursos_eliminados(material.curso, recursos)
+        recursos.delete()
 
-    material.archivo.delete()  # Borra el archivo en materiales
-    material.delete()  # Borra en la base de datos
+        material.archivo.delete()  # Borra el archivo en materiales
+        material.delete()  # Borra en la base de datos
 
     messages.error(request, "Material eliminado correctamente.")
     return redirect('subir_material_extra', curso_id=curso_id)
@@ -149,7 +298,8 @@ def registro_usuario(request):
         form = RegistroUsuarioForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            # Con ModelBackend de respaldo en AUTHENTICATION_BACKENDS hay que decir cual se usa
+            login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             return redirect('lista_cursos')
     else:
         form = RegistroUsuarioForm()
@@ -160,32 +310,18 @@ def registro_usuario(request):
 # progreso del estudiante.
 # permite al estudiante completar recursos de materias inscritas y verlos en tiempo real
 @login_required
+@lectura_en_replica
 def progreso_estudiante(request):
-    usuario = request.user
-    inscripciones = Inscripcion.objects.filter(user=usuario)
-    
-    progresos = Progreso.objects.filter(inscripcion__in=inscripciones).select_related('recurso', 'inscripcion', 'inscripcion__curso')
-
-    progreso_por_curso = {}
-    for inscripcion in inscripciones:
-        recursos = Recurso.objects.filter(curso=inscripcion.curso)
-        completados = progresos.filter(inscripcion=inscripcion, completado=True).count()
-        total = recursos.count()
-        porcentaje = (completados / total * 100) if total > 0 else 0
-        progreso_por_curso[inscripcion.curso.id] = {
-            'curso': inscripcion.curso,
-            'porcentaje': round(porcentaje, 2),
-            'total': total,
-            'completados': completados,
-            'recursos': recursos,
-            'completados_ids': list(progresos.filter(inscripcion=inscripcion, completado=True).values_list('recurso_id', flat=True))
-        }
+    progreso_por_curso = {
+        datos['curso'].id: datos for datos in progreso.progreso_del_estudiante(request.user)
+    }
     return render(request, 'cursos/progreso_estudiante.html', {
         'progreso_por_curso': progreso_por_curso
     })
 
 # Ver un recurso ya creado
 @login_required
+@lectura_en_replica
 def ver_recurso(request, recurso_id):
     recurso = get_object_or_404(Recurso, id=recurso_id)
     inscripcion = Inscripcion.objects.filter(user=request.user, curso=recurso.curso).first()
@@ -200,6 +336,19 @@ def ver_recurso(request, recurso_id):
         'completado': completado
     })
 
+# Archivos subidos (MEDIA_URL): solo si el usuario tiene acceso, ver descargas.py
+def archivo(request, nombre):
+    # Se revisa y se envia el mismo nombre ya normalizado
+    nombre = descargas.normalizar(nombre)
+    if nombre is None:
+        raise Http404
+    permitido, nombre_descarga = descargas.permiso(request.user, nombre)
+    if not permitido:
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        raise Http404
+    return descargas.servir(request, nombre, nombre_descarga)
+
 # Marcar como completado el recurso visto por el estudiante.
 @login_required
 def marcar_completado(request, recurso_id):
@@ -208,10 +357,7 @@ def marcar_completado(request, recurso_id):
     if not inscripcion:
         return HttpResponseForbidden("No estás inscrito en este curso.")
 
-    progreso, _ = Progreso.objects.get_or_create(inscripcion=inscripcion, recurso=recurso)
-    progreso.completado = True
-    progreso.fecha_completado = date.today()
-    progreso.save()
+    progreso.completar_recurso(inscripcion, recurso)
 
     return redirect('ver_recurso', recurso_id=recurso.id)
 
@@ -239,33 +385,12 @@ def darse_de_baja_curso(request, curso_id):
 
 #maestro vea a sus estudiantes con el progreso
 @login_required
+@lectura_en_replica
 def dashboard(request):
-    if hasattr(request.user, 'profesor'):
-        profesor = request.user.profesor
-        cursos = Curso.objects.filter(profesor=profesor)
-        cursos_con_inscripciones = []
-
-        for curso in cursos:
-            inscripciones = Inscripcion.objects.filter(curso=curso)
-
-            # Para cada inscripción, obtener progreso de ese estudiante en ese curso
-            estudiantes_con_progreso = []
-            for inscripcion in inscripciones:
-                total_recursos = Recurso.objects.filter(curso=curso).count()
-                completados = Progreso.objects.filter(inscripcion=inscripcion, completado=True).count()
-                porcentaje = (completados / total_recursos * 100) if total_recursos > 0 else 0
-
-                estudiantes_con_progreso.append({
-                    'inscripcion': inscripcion,
-                    'progreso': round(porcentaje, 2),
-                    'total_recursos': total_recursos,
-                    'completados': completados,
-                })
-
-            cursos_con_inscripciones.append({
-                'curso': curso,
-                'estudiantes': estudiantes_con_progreso,
-            })
+    if request.rol.es_profesor:
+        profesor = request.rol.profesor
+        # Progreso de todos los estudiantes de todos sus cursos en consultas agrupadas
+        cursos_con_inscripciones = progreso_por_profesor(profesor)
 
         return render(request, 'cursos/dashboard_profesor.html', {
             'cursos_con_inscripciones': cursos_con_inscripciones
@@ -274,17 +399,14 @@ def dashboard(request):
         return redirect('lista_cursos')
 
 # Funciones y vistas para el perfil de usuario (profesor y estudiante)
-# Esto es para ver si el usuario es un profesor y valida
-    
-def es_profesor(user):
-    return hasattr(user, 'profesor')
+# request.rol dice si el usuario es un profesor (Cursos/autenticacion.py)
 
 def perfil_usuario(request):
     user = request.user
-    if es_profesor(user): 
-        profesor = user.profesor
+    if request.rol.es_profesor: 
+        profesor = request.rol.profesor
         cursos = Curso.objects.filter(profesor=profesor)
-        perfil = Perfil.objects.filter(user=user).first()
+        perfil = request.rol.perfil
         
         return render(request, 'cursos/perfil_profesor.html', {
             'es_profesor':True,
@@ -294,34 +416,22 @@ def perfil_usuario(request):
         })
     else:
         
-        inscripciones = Inscripcion.objects.filter(user=user)
         cursos_info = []
-        progresos = Progreso.objects.filter(inscripcion__in=inscripciones).select_related('recurso', 'inscripcion', 'inscripcion__curso')
-        
-        for insc in inscripciones:
-            recursos = Recurso.objects.filter(curso=insc.curso)
-            progreso_dict = {
-                p.recurso.id: p.completado
-                for p in Progreso.objects.filter(inscripcion=insc)
-            }
+        for datos in progreso.progreso_del_estudiante(user):
             materiales = []
-            for recurso in recursos:
-                estado = 'completado' if progreso_dict.get(recurso.id) else 'incompleto'
+            for recurso in datos['recursos']:
+                estado = 'completado' if recurso.id in datos['completados_ids'] else 'incompleto'
                 materiales.append({
                     'titulo': recurso.titulo,
                     'estado': estado,
                     'id':recurso.id
                 })
-            completados = progresos.filter(inscripcion=insc, completado=True).count()
-            total = recursos.count()
-
-            porcentaje = round((completados / total * 100), 2) if total > 0 else 0
             cursos_info.append({
-                'titulo_curso': insc.curso.titulo,
+                'titulo_curso': datos['curso'].titulo,
                 'materiales': materiales,
-                'porcentaje':porcentaje,
+                'porcentaje': datos['porcentaje'],
             })
-        perfil = Perfil.objects.filter(user=user).first()
+        perfil = request.rol.perfil
 
         return render(request, 'cursos/perfil_estudiante.html', {
             'es_profesor':False,
@@ -341,6 +451,9 @@ def editar_perfil(request):
         if user_form.is_valid() and perfil_form.is_valid():
             user_form.save()
             perfil_form.save()
+            # Las miniaturas de la nueva imagen se generan en segundo plano
+            if 'imagen' in perfil_form.changed_data and miniaturas.es_personalizada(perfil.imagen.name):
+                tareas.encolar('generar_miniaturas', {'nombre': perfil.imagen.name}, clave=f'miniaturas:{perfil.imagen.name}')
             messages.success(request, '¡Perfil del usuario actualizado correctamente!')
             return redirect('perfil_usuario')
     else:
@@ -376,8 +489,10 @@ def crear_sesion(request):
     if request.method == 'POST':
         
         form = SesionForm(request.POST)
-        if form.is_valid:
-            form.save()
+        if form.is_valid():
+            with transaction.atomic():
+                sesion = form.save()
+                progreso.registrar_sesion_nueva(sesion.curso)
             return redirect('lista_sesiones')
     else:
         form = SesionForm()
@@ -386,31 +501,106 @@ def crear_sesion(request):
 @login_required
 def tomar_asistencia(request, id_sesion):
     sesion = get_object_or_404(Sesion, id=id_sesion)
-    inscripciones = Inscripcion.objects.filter(curso=sesion.curso)
     
     if request.method == 'POST':
-        for ins in inscripciones:
-            presente = request.POST.get(f"presente_{ins.id}") == 'on'
-            
-            asistencia, created = Asistencia.objects.get_or_create(
-                inscripcion = ins,
-                sesion=sesion
-            )
-            asistencia.presente = presente
-            asistencia.save()
+        presentes = presentes_del_formulario(request.POST)
+        # En cursos grandes la asistencia se guarda en segundo plano (ver tareas.py)
+        if Inscripcion.objects.filter(curso_id=sesion.curso_id).count() >= settings.ASISTENCIA_EN_SEGUNDO_PLANO:
+            # La clave del formulario evita guardar dos veces si se envia de nuevo
+            clave = f"asistencia:{sesion.id}:{request.POST['clave']}" if request.POST.get('clave') else None
+            tareas.encolar('guardar_asistencias', {'sesion_id': sesion.id, 'presentes': sorted(presentes)},
+                           clave=clave, usuario=request.user)
+            messages.success(request, 'La asistencia se está guardando, puede tardar unos segundos.')
+        else:
+            # Guarda todas las asistencias de la sesion en lote
+            guardar_asistencias(sesion, presentes)
         return redirect('lista_cursos')
     return render(request, 'cursos/tomar_asistencia.html', {
         'sesion':sesion,
-        'inscripciones': inscripciones    
+        'inscripciones': inscripciones_con_asistencia(sesion),
+        'clave': uuid.uuid4().hex,
     })
 # MOSTRAR CERTIFICADO
 @login_required
 def certificado(request, user):
     ins = get_object_or_404(Inscripcion, id=user)
-    porcentaje = ins.porcentaje_asistencia()
-    cumple = ins.tiene_certificado(80)
+    # Porcentaje guardado al emitir el certificado, o el del resumen si aun no se emitio
+    certificado = Certificado.objects.filter(inscripcion=ins).first()
+    if certificado:
+        porcentaje = certificado.porcentaje_asistencia
+    else:
+        porcentaje = progreso.obtener_resumen(ins).porcentaje_asistencia
+    cumple = porcentaje >= MINIMO_ASISTENCIA
     return render(request, 'cursos/certificado.html',{
         'inscripcion': ins,
         'porcentaje': porcentaje,
         'cumple': cumple
-    })
\ No newline at end of file
+    })
+
+
+# Resumen en memoria de la instrumentacion por vista (ver Cursos/instrumentacion.py)
+@staff_member_required
+def resumen_instrumentacion(request):
+    if request.method == 'POST':
+        instrumentacion.reiniciar()
+    return JsonResponse({
+        'activa': settings.INSTRUMENTACION_ACTIVA,
+        'vistas': instrumentacion.resumen(),
+    })
+
+
+# Encola la emision de certificados (y sus PDF) de un curso del profesor
+@login_required
+def emitir_certificados_curso(request, curso_id):
+    curso = get_object_or_404(Curso, id=curso_id)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Use POST'}, status=405)
+    if not request.rol.dicta(curso):
+        return HttpResponseForbidden("Solo el profesor del curso puede emitir sus certificados.")
+    # Con la cabecera Idempotency-Key repetir la peticion devuelve la misma tarea
+    clave = request.headers.get('Idempotency-Key')
+    tarea = tareas.encolar(
+        'emitir_certificados', {'curso_id': curso.id},
+        clave=f'certificados:{curso.id}:{clave}' if clave else None, usuario=request.user,
+    )
+    return JsonResponse(datos_tarea(tarea), status=202)
+
+
+# Matriz de asistencia o de progreso del curso en CSV o XLSX, se envia mientras se genera (con WSGI
+# y con ASGI)
+@login_required
+@lectura_en_replica
+def exportar_reporte(request, curso_id, reporte, formato):
+    curso = get_object_or_404(Curso, id=curso_id)
+    if reporte not in reportes.REPORTES or formato not in reportes.FORMATOS:
+        raise Http404
+    if not (request.rol.dicta(curso) or request.user.is_staff):
+        return HttpResponseForbidden("Solo el profesor del curso puede exportar sus reportes.")
+    # Las filas se leen al enviar la respuesta, ya fuera de la vista: la base se elige aqui
+    contenido, tipo = reportes.exportar(curso, reporte, formato, alias_de_lectura())
+    # Con ASGI cada bloque de filas se pide aparte, sin armar el archivo entero (ver flujos.py)
+    respuesta = StreamingHttpResponse(flujos.contenido(request, contenido), content_type=tipo)
+    respuesta['Content-Disposition'] = content_disposition_header(True, reportes.nombre_archivo(curso, reporte, formato))
+    respuesta['Cache-Control'] = 'private, no-store'
+    return respuesta
+
+
+def datos_tarea(tarea):
+    return {
+        'id': tarea.id,
+        'tipo': tarea.tipo,
+        'estado': tarea.estado,
+        'intentos': tarea.intentos,
+        'resultado': tarea.resultado,
+        'error': tarea.error.strip().splitlines()[-1] if tarea.error else '',
+        'creada': tarea.creada,
+        'terminada': tarea.terminada,
+        'url': reverse('estado_tarea', args=[tarea.id]),
+    }
+
+
+# Estado de una tarea en segundo plano, para consultar periodicamente
+@login_required
+def estado_tarea(request, tarea_id):
+    tareas_visibles = Tarea.objects.all() if request.user.is_staff else Tarea.objects.filter(usuario=request.user)
+    return JsonResponse(datos_tarea(get_object_or_404(tareas_visibles, id=tarea_id)))
@@ -0,0 +1,99 @@
+#  ---- VISTAS ASINCRONAS (despliegue ASGI) ----
+# Versiones async de las vistas de solo lectura mas usadas. Se activan con la configuracion de
+# URLs PlataformaDeCursos.urls_asgi, que asgi.py usa por defecto; con WSGI siguen las de views.py.
+# Las consultas usan la API async del ORM. El usuario se obtiene con request.auser() y las
+# plantillas se renderizan en un hilo (sync_to_async): los context processors de auth y messages
+# leen la sesion de forma sincrona.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseForbidden
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import catalogo, progreso, recomendaciones
+from .autenticacion import Rol
+from .models import Curso, Inscripcion, Progreso, Recurso
+from .replicas import lectura_en_replica
+
+arender = sync_to_async(render)
+
+
+async def lista_cursos(request):
+    usuario = await request.auser()
+    cursos_inscritos_ids = set()
+    if usuario.is_authenticated:
+        cursos_inscritos_ids = {
+            curso_id async for curso_id in Inscripcion.objects.filter(user=usuario).values_list('curso_id', flat=True)
+        }
+
+    tarjetas = [
+        {'id': curso_id, 'html': html, 'inscrito': curso_id in cursos_inscritos_ids}
+        for curso_id, html in await sync_to_async(catalogo.tarjetas)()
+    ]
+    recomendadas = []
+    if usuario.is_authenticated and Rol(usuario).es_estudiante:
+        recomendadas = recomendaciones.tarjetas_recomendadas(
+            [curso_id async for curso_id in recomendaciones.ids_para_usuario(usuario.id)], tarjetas, cursos_inscritos_ids
+        )
+    return await arender(request, 'cursos/cursos.html', {
+        'tarjetas': tarjetas,
+        'recomendadas': recomendadas,
+    })
+
+
+@login_required
+@lectura_en_replica
+async def detalle_curso(request, curso_id):
+    usuario = await request.auser()
+    curso = await aget_object_or_404(Curso.objects.select_related('profesor'), id=curso_id)
+    inscripciones = [ins async for ins in Inscripcion.objects.filter(curso=curso).select_related('user')]
+    # El usuario viene del backend con su Profesor: sin consulta
+    es_profesor = Rol(usuario).es_profesor
+    esta_inscrito = await Inscripcion.objects.filter(user=usuario, curso=curso).aexists()
+
+    return await arender(request, 'cursos/detalle_Cursos.html', {
+        'curso': curso,
+        'inscripciones': inscripciones,
+        'es_profesor': es_profesor,
+        'esta_inscrito': esta_inscrito,
+        'similares': [recomendacion.recomendado async for recomendacion in recomendaciones.similares(curso.id)],
+    })
+
+
+@login_required
+@lectura_en_replica
+async def progreso_estudiante(request):
+    usuario = await request.auser()
+    progreso_por_curso = {
+        datos['curso'].id: datos for datos in await progreso.aprogreso_del_estudiante(usuario)
+    }
+    return await arender(request, 'cursos/progreso_estudiante.html', {
+        'progreso_por_curso': progreso_por_curso
+    })
+
+
+@login_required
+@lectura_en_replica
+async def ver_recurso(request, recurso_id):
+    usuario = await request.auser()
+    recurso = await aget_object_or_404(Recurso, id=recurso_id)
+    inscripcion = await Inscripcion.objects.filter(user=usuario, curso_id=recurso.curso_id).afirst()
+    if not inscripcion:
+        return HttpResponseForbidden("No estás inscrito en este curso.")
+
+    avance = await Progreso.objects.filter(inscripcion=inscripcion, recurso=recurso).afirst()
+    return await arender(request, 'cursos/ver_recurso.html', {
+        'recurso': recurso,
+        'completado': avance.completado if avance else False
+    })
+
+
+@login_required
+@lectura_en_replica
+async def dashboard(request):
+    usuario = await request.auser()
+    profesor = Rol(usuario).profesor
+    if profesor is None:
+        return redirect('lista_cursos')
+    return await arender(request, 'cursos/dashboard_profesor.html', {
+        'cursos_con_inscripciones': await progreso.aprogreso_por_profesor(profesor)
+    })
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PlataformaDeCursos.settings')
+# Con ASGI las vistas de solo lectura de Cursos se sirven con sus versiones async
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'PlataformaDeCursos.urls_asgi')
 
 application = get_asgi_application()
@@ -42,19 +42,28 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Solo se usa con INSTRUMENTACION_ACTIVA = True
+    'Cursos.instrumentacion.InstrumentacionMiddleware',
+    # Elige entre la BD principal y la replica para las lecturas (Cursos/replicas.py)
+    'Cursos.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.rol: profesor/estudiante con su Profesor y Perfil (Cursos/autenticacion.py)
+    'Cursos.autenticacion.RolMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'PlataformaDeCursos.urls'
+# asgi.py usa PlataformaDeCursos.urls_asgi (vistas async de solo lectura)
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'PlataformaDeCursos.urls')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que ademas mide el tiempo de render con INSTRUMENTACION_ACTIVA
+        'BACKEND': 'Cursos.instrumentacion.PlantillasMedidas',
+        'NAME': 'django',
         'DIRS': [BASE_DIR ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,12 +82,87 @@ WSGI_APPLICATION = 'PlataformaDeCursos.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Se aplican al abrir cada conexion
+SQLITE_PRAGMAS = [
+    # Los lectores no bloquean al escritor ni el escritor a los lectores
+    'journal_mode=WAL',
+    # Con WAL no se corrompe la BD; un corte de luz puede perder solo las ultimas transacciones
+    'synchronous=NORMAL',
+    # 64 MB de cache de paginas por conexion (negativo: en KiB)
+    'cache_size=-65536',
+    # Lecturas con mmap de hasta 256 MB del archivo
+    'mmap_size=268435456',
+    'temp_store=MEMORY',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el bloqueo de escritura al empezar: con varios hilos escribiendo
+            # (trabajar_tareas) SQLite espera el bloqueo en vez de fallar con "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': ';'.join(f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+        },
+        # Conexiones persistentes: no se abre una (ni se aplican los pragmas) en cada peticion.
+        # Se revisan antes de reutilizarlas por si quedaron inservibles
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Copia de solo lectura para el catalogo, los paneles y los reportes (Cursos/replicas.py). Se
+    # mantiene con `python manage.py sincronizar_replica --cada 5`; si no existe se lee de default
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': 'PRAGMA query_only=ON;PRAGMA cache_size=-65536;PRAGMA mmap_size=268435456',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['Cursos.replicas.EnrutadorReplica']
+REPLICA_ALIAS = 'replica'
+# Si la ultima sincronizacion de la replica es mas vieja (segundos) se lee de default. Despues de
+# escribir, cada usuario lee de default hasta que la replica se sincronice
+REPLICA_RETRASO_MAXIMO = 30
+# Escrituras decoradas con @escritura (Cursos/escrituras.py): de a una por proceso y con
+# reintentos si la BD esta bloqueada por otro proceso
+ESCRITURAS_SERIALIZADAS = True
+ESCRITURAS_INTENTOS = 5
+
+# Cache (catalogo de cursos). Para compartirla entre procesos se puede usar
+# 'django.core.cache.backends.filebased.FileBasedCache' con LOCATION = BASE_DIR / 'cache'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'plataforma-cursos',
+        # Una entrada por curso del catalogo (el valor por defecto es 300)
+        'OPTIONS': {'MAX_ENTRIES': 20000},
     }
 }
+# Segundos que se guarda cada tarjeta del catalogo (lista_cursos)
+CATALOGO_CACHE_TTL = 300
+
+# Sesiones y usuarios (con su Profesor y Perfil) van a la cache solo si todos los procesos ven
+# la misma: con una cache por proceso, cerrar sesion o desactivar un usuario en un worker no se
+# notaria en los demas. Con LocMemCache las sesiones quedan en la BD y el usuario se lee cada vez.
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHE_COMPARTIDA = CACHES['default']['BACKEND'] not in CACHES_POR_PROCESO
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + ('cached_db' if CACHE_COMPARTIDA else 'db')
+# Los logins nuevos guardan BackendCacheado en la sesion; ModelBackend sigue en la lista para las
+# sesiones iniciadas antes, que tienen guardada su ruta (sin el, Django las cerraria)
+AUTHENTICATION_BACKENDS = ['Cursos.autenticacion.BackendCacheado', 'django.contrib.auth.backends.ModelBackend']
+USUARIOS_EN_CACHE = CACHE_COMPARTIDA
+# Segundos que se guarda cada usuario (las senales lo borran antes si cambia)
+USUARIOS_CACHE_TTL = 300
 
 
 # Password validation
@@ -128,4 +212,61 @@ LOGIN_REDIRECT_URL = '/redireccion/'
 
 # Archivos multimedia (subidas)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Los archivos subidos se guardan una sola vez por contenido (Cursos/almacen.py)
+STORAGES = {
+    'default': {'BACKEND': 'Cursos.almacen.AlmacenPorContenido'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# La toma de asistencia envia un checkbox por estudiante, cursos grandes superan el limite por defecto (1000)
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+# Envio de los archivos de MEDIA_URL (Cursos/descargas.py): None los envia Django, 'X-Sendfile'
+# (Apache mod_xsendfile, lighttpd) o 'X-Accel-Redirect' (nginx) dejan el envio al servidor web
+ARCHIVOS_ENVIO = None
+# Con X-Accel-Redirect: location `internal` de nginx con `alias` a MEDIA_ROOT
+ARCHIVOS_ACCEL_PREFIJO = '/media-interno/'
+# Limites del material extra (bytes): por archivo y en total por curso
+MATERIAL_TAMANO_MAXIMO = 2 * 1024 ** 3
+MATERIAL_CUOTA_POR_CURSO = 10 * 1024 ** 3
+# Subida por partes (Cursos/subidas.py): tamaño de cada fragmento y carpeta de los archivos parciales
+# (en el mismo disco que MEDIA_ROOT para que al completar se muevan sin copiarse)
+SUBIDA_TAMANO_FRAGMENTO = 8 * 1024 ** 2
+SUBIDAS_ROOT = os.path.join(BASE_DIR, 'subidas')
+# Respaldos de la BD (Cursos/respaldo.py): carpeta y tablas que no se respaldan
+RESPALDOS_ROOT = os.path.join(BASE_DIR, 'respaldos')
+RESPALDOS_EXCLUIR = ['django_session', 'django_admin_log']
+# Desde esta cantidad de inscritos la asistencia se guarda en segundo plano
+# (requiere un trabajador corriendo: python manage.py trabajar_tareas)
+ASISTENCIA_EN_SEGUNDO_PLANO = 1000
+
+# Instrumentacion por peticion (consultas, tiempo en BD y plantillas, N+1). Resumen en /instrumentacion/
+INSTRUMENTACION_ACTIVA = False
+# Peticiones que se guardan por vista para el resumen
+INSTRUMENTACION_VENTANA = 200
+# Maximo de consultas por vista (nombre de URL); se avisa en el log al pasarse
+INSTRUMENTACION_PRESUPUESTO = {
+    # Con la cache del catalogo vacia se agregan las consultas de las tarjetas
+    'lista_cursos': 8,
+    'detalle_curso': 8,
+    'progreso_estudiante': 8,
+    'perfil_usuario': 8,
+    'ver_recurso': 8,
+    'certificado': 8,
+    'dashboard': 8,
+    'archivo': 8,
+    # La toma de asistencia guarda en lotes de 500, crece con el tamaño del curso
+    'tomar_asistencia': 30,
+}
+# Con True pasarse del presupuesto lanza una excepcion (para las pruebas)
+INSTRUMENTACION_ESTRICTA = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'Cursos.instrumentacion': {'handlers': ['consola'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -15,16 +15,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from Cursos import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('Cursos.urls')),  # urls de la app cursos la unica app
     path('accounts/', include('django.contrib.auth.urls')), #urls de el login/logout para la pagina
+    # Para archivos de multimedia, con control de acceso tambien sin DEBUG (ver Cursos/descargas.py)
+    re_path(r'^%s(?P<nombre>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), views.archivo, name='archivo'),
 ]
-# Para archivos de multimedia
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,14 @@
+"""
+URL configuration for the ASGI deployment (see asgi.py).
+
+Same routes as urls.py, but the read-only Cursos views in Cursos/urls_asgi.py are
+served by their async versions. Those patterns go first so they win the match.
+"""
+
+from django.urls import include, path
+
+from .urls import urlpatterns as urlpatterns_wsgi
+
+urlpatterns = [
+    path('', include('Cursos.urls_asgi')),
+] + urlpatterns_wsgi